@@ -15,19 +15,17 @@ fi
 echo "Activating virtual environment..."
 source venv/bin/activate
 
-# Install dependencies if needed
+# Install dependencies only when requirements.txt changed since the last install
 echo "Checking dependencies..."
-pip install -r requirements.txt -q
-
-# Run sentiment analysis
-echo ""
-echo "Running sentiment analysis..."
-python src/sentiment_analyzer.py
+REQUIREMENTS_HASH=$(python -c "import hashlib; print(hashlib.sha1(open('requirements.txt', 'rb').read()).hexdigest())")
+if [ "$(cat venv/.requirements.sha1 2>/dev/null)" != "$REQUIREMENTS_HASH" ]; then
+    pip install -r requirements.txt -q && echo "$REQUIREMENTS_HASH" > venv/.requirements.sha1
+fi
 
-# Generate visualizations
+# Run the pipeline; stages whose inputs, settings and code are unchanged are skipped
 echo ""
-echo "Generating visualizations..."
-python src/visualizer.py
+echo "Running analysis pipeline..."
+python src/pipeline.py "$@" || exit 1
 
 echo ""
 echo "=============================================="
@@ -36,4 +34,6 @@ echo "=============================================="
 echo ""
 echo "Results saved to:"
 echo "  - results/analyzed_reviews.csv"
+echo "  - results/course_summaries.json"
+echo "  - results/trends.sqlite"
 echo "  - visualizations/*.png"
@@ -0,0 +1,225 @@
+"""
+Running Review Aggregates
+Per-course and overall statistics that are updated one chunk of analyzed
+reviews at a time, so summaries never need the full dataset in memory.
+"""
+
+from collections import Counter, defaultdict
+
+import numpy as np
+import pandas as pd
+
+from aspects import aspect_column, aspect_topics
+from batch_scorer import LABELS, VADER_THRESHOLD
+from topic_matcher import GENERAL_TOPIC, parse_topics
+
+
+def _topic_counts_by_course(df):
+    """Yield ((course_code, topic), count) pairs for a chunk of analyzed reviews."""
+    if 'topic_mask' in df.columns:
+        codes, courses = pd.factorize(df['course_code'], use_na_sentinel=True)
+        valid = codes >= 0
+        codes = codes[valid]
+        masks = df['topic_mask'].to_numpy(dtype=np.uint64)[valid]
+        topic_names = list(df.attrs.get('topics', []))
+        for bit, topic in enumerate(topic_names + [GENERAL_TOPIC]):
+            if topic == GENERAL_TOPIC:
+                hits = masks == 0
+            else:
+                hits = (masks & np.uint64(1 << bit)) != 0
+            counts = np.bincount(codes[hits], minlength=len(courses))
+            for index in np.flatnonzero(counts):
+                yield (courses[index], topic), int(counts[index])
+        return
+
+    topics = pd.DataFrame({
+        'course_code': df['course_code'],
+        'topic': df['topics'].map(parse_topics)
+    }).explode('topic').dropna()
+    for key, count in topics.groupby(['course_code', 'topic'], sort=False).size().items():
+        yield key, int(count)
+
+
+def _aspect_stats_by_course(df):
+    """
+    Yield ((course_code, topic), (mentions, score_sum, label_counts)) for a chunk of analyzed reviews.
+
+    Label counts are Negative/Neutral/Positive counts of the per-review
+    aspect scores, with the VADER thresholds.
+    """
+    topics = aspect_topics(df.columns)
+    if not topics:
+        return
+    codes, courses = pd.factorize(df['course_code'], use_na_sentinel=True)
+    valid = codes >= 0
+    codes = codes[valid]
+    for topic in topics:
+        scores = df[aspect_column(topic)].to_numpy(dtype=np.float64)[valid]
+        mentioned = ~np.isnan(scores)
+        if not mentioned.any():
+            continue
+        course_codes, scores = codes[mentioned], scores[mentioned]
+        mentions = np.bincount(course_codes, minlength=len(courses))
+        sums = np.bincount(course_codes, weights=scores, minlength=len(courses))
+        labels = np.where(scores >= VADER_THRESHOLD, 2, np.where(scores <= -VADER_THRESHOLD, 0, 1))
+        label_counts = np.zeros((len(courses), len(LABELS)), dtype=np.int64)
+        np.add.at(label_counts, (course_codes, labels), 1)
+        for index in np.flatnonzero(mentions):
+            yield (courses[index], topic), (int(mentions[index]), float(sums[index]), label_counts[index])
+
+
+def _topic_sentiment(mentions, score_sums, label_counts):
+    """Per-topic sentiment summary, most mentioned topic first."""
+    return {
+        topic: {
+            'mentions': count,
+            'avg_compound': score_sums[topic] / count,
+            'sentiment_distribution': dict(label_counts[topic].most_common())
+        }
+        for topic, count in mentions.most_common()
+    }
+
+
+class CourseStats:
+    """Running totals for a single course."""
+
+    def __init__(self, course_name):
+        self.course_name = course_name
+        self.total_reviews = 0
+        self.rating_sum = 0.0
+        self.rating_count = 0
+        self.sentiment_counts = Counter()
+        self.topic_counts = Counter()
+        # Aspect-level sentiment: mentions, score sums and labels per topic
+        self.aspect_mentions = Counter()
+        self.aspect_score_sums = defaultdict(float)
+        self.aspect_labels = defaultdict(Counter)
+
+    @property
+    def avg_rating(self):
+        return self.rating_sum / self.rating_count if self.rating_count else np.nan
+
+
+class ReviewAggregates:
+    """
+    Per-course aggregate index over analyzed reviews.
+
+    Holds review counts, rating sums, sentiment histograms, topic counters
+    and per-topic (aspect) sentiment per course, so summaries are dictionary
+    lookups instead of DataFrame scans.
+    """
+
+    def __init__(self, sentiment_column='sentiment_vader'):
+        """
+        Initialize empty aggregates.
+
+        Args:
+            sentiment_column: Label column used for the sentiment histograms
+        """
+        self.sentiment_column = sentiment_column
+        self.courses = {}
+        self.total_reviews = 0
+        self.rating_sum = 0.0
+        self.rating_count = 0
+        self.sentiment_counts = Counter()
+        self.sentiment_rating_sum = defaultdict(float)
+        self.sentiment_rating_count = Counter()
+        self.aspect_mentions = Counter()
+        self.aspect_score_sums = defaultdict(float)
+        self.aspect_labels = defaultdict(Counter)
+
+    def update(self, df):
+        """
+        Merge a chunk of analyzed reviews into the running totals.
+
+        Counts and rating sums come from a single groupby over
+        (course_code, sentiment); topics are counted per course from either
+        a 'topics' list column or a 'topic_mask' bitmask column, and
+        aspect-level sentiment from the aspect_<topic> score columns.
+
+        Args:
+            df: DataFrame with course_code, course_name, rating, the sentiment
+                column, topics and (optionally) aspect columns; rows flagged in
+                an is_duplicate column are skipped
+        """
+        if 'is_duplicate' in df.columns:
+            df = df[~df['is_duplicate'].to_numpy(dtype=bool)]
+        if df.empty:
+            return
+
+        cells = df.groupby(['course_code', self.sentiment_column], sort=False, dropna=False, observed=True).agg(
+            course_name=('course_name', 'first'),
+            reviews=('rating', 'size'),
+            rating_sum=('rating', 'sum'),
+            rating_count=('rating', 'count')
+        )
+
+        for (code, label), row in zip(cells.index, cells.itertuples(index=False)):
+            reviews = int(row.reviews)
+            rating_sum = float(row.rating_sum)
+            rating_count = int(row.rating_count)
+
+            self.total_reviews += reviews
+            self.rating_sum += rating_sum
+            self.rating_count += rating_count
+            self.sentiment_counts[label] += reviews
+            self.sentiment_rating_sum[label] += rating_sum
+            self.sentiment_rating_count[label] += rating_count
+
+            if pd.isna(code):
+                continue
+            stats = self.courses.get(code)
+            if stats is None:
+                stats = self.courses[code] = CourseStats(row.course_name)
+            stats.total_reviews += reviews
+            stats.rating_sum += rating_sum
+            stats.rating_count += rating_count
+            stats.sentiment_counts[label] += reviews
+
+        for (code, topic), count in _topic_counts_by_course(df):
+            self.courses[code].topic_counts[topic] += count
+
+        for (code, topic), (mentions, score_sum, label_counts) in _aspect_stats_by_course(df):
+            for stats in (self.courses[code], self):
+                stats.aspect_mentions[topic] += mentions
+                stats.aspect_score_sums[topic] += score_sum
+                labels = stats.aspect_labels[topic]
+                for label, count in zip(LABELS, label_counts):
+                    if count:
+                        labels[label] += int(count)
+
+    def course_codes(self):
+        """Course codes in the order they were first seen."""
+        return list(self.courses)
+
+    def course_summary(self, course_code):
+        """Get summary statistics for a course, or None if it has no reviews."""
+        stats = self.courses.get(course_code)
+        if stats is None:
+            return None
+
+        return {
+            'course_code': course_code,
+            'course_name': stats.course_name,
+            'total_reviews': stats.total_reviews,
+            'avg_rating': stats.avg_rating,
+            'sentiment_distribution': dict(stats.sentiment_counts.most_common()),
+            'common_topics': dict(stats.topic_counts.most_common(5)),
+            'topic_sentiment': _topic_sentiment(stats.aspect_mentions, stats.aspect_score_sums, stats.aspect_labels)
+        }
+
+    def overall_statistics(self):
+        """Get overall statistics in the same shape as CourseReviewAnalyzer.get_overall_statistics."""
+        rating_by_sentiment = {}
+        for label in sorted(self.sentiment_rating_sum):
+            count = self.sentiment_rating_count[label]
+            rating_by_sentiment[label] = self.sentiment_rating_sum[label] / count if count else np.nan
+
+        return {
+            'total_reviews': self.total_reviews,
+            'total_courses': len(self.courses),
+            'avg_rating': self.rating_sum / self.rating_count if self.rating_count else np.nan,
+            'sentiment_distribution': dict(self.sentiment_counts.most_common()),
+            'rating_by_sentiment': rating_by_sentiment,
+            'topic_sentiment': _topic_sentiment(self.aspect_mentions, self.aspect_score_sums, self.aspect_labels)
+        }
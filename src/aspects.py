@@ -0,0 +1,114 @@
+"""
+Aspect-Level Sentiment
+Per-topic VADER scores from the clauses of each review.
+
+"Great professor but brutal exams" mentions two topics with opposite
+sentiment. Each review that mentions a topic is split into clauses at
+sentence ends and contrastive conjunctions ('but', 'however', ...), and
+each clause's VADER score counts toward every topic matched in that clause.
+A review's score for a topic is the mean over the clauses that mention it.
+Single-clause reviews reuse the whole-review compound, and clauses seen
+before (short stock phrases repeat a lot) are looked up, so VADER runs once
+per distinct clause.
+"""
+
+import re
+
+import numpy as np
+
+from topic_matcher import iter_bits
+
+# Bump whenever clause splitting or attribution changes so cached aspects are invalidated
+ASPECT_VERSION = '1'
+
+# Split after sentence punctuation, at line breaks, and before contrastive conjunctions
+CLAUSE_BOUNDARY = re.compile(
+    r'(?<=[.!?;])\s+|\s*\n+\s*|\s+(?=(?:but|however|although|though|whereas)\b)',
+    re.IGNORECASE
+)
+
+# Prefix of the per-topic score columns added to analyzed reviews
+ASPECT_PREFIX = 'aspect_'
+
+
+def split_clauses(text):
+    """Split a review into its non-empty clauses."""
+    return [clause for clause in CLAUSE_BOUNDARY.split(text) if clause.strip()]
+
+
+def aspect_column(topic):
+    """Name of the score column of a topic."""
+    return ASPECT_PREFIX + topic
+
+
+def aspect_topics(columns):
+    """Topics of the aspect score columns among columns, in column order."""
+    return [column[len(ASPECT_PREFIX):] for column in columns if column.startswith(ASPECT_PREFIX)]
+
+
+class AspectScorer:
+    """Scores the topics of a batch of reviews clause by clause with VADER."""
+
+    def __init__(self, scorer, topic_matcher, max_clauses=1000000):
+        """
+        Initialize the aspect scorer.
+
+        Args:
+            scorer: BatchScorer providing VADER and its lexicon index
+            topic_matcher: TopicMatcher whose topics are scored
+            max_clauses: Distinct clauses remembered before the memo is reset
+        """
+        self.scorer = scorer
+        self.topic_matcher = topic_matcher
+        self.max_clauses = max_clauses
+        # Clause text -> (topic mask, compound)
+        self._clauses = {}
+
+    def _score_clause(self, clause):
+        """Topic mask and VADER compound of a clause (0 without topics or sentiment words)."""
+        mask = self.topic_matcher.match_mask(clause)
+        if mask and self.scorer.lexicon.has_sentiment(clause):
+            return mask, self.scorer.vader.polarity_scores(clause)['compound']
+        return mask, 0.0
+
+    def score(self, texts, compound, topic_masks):
+        """
+        Score every topic each review mentions.
+
+        Args:
+            texts: Review texts
+            compound: VADER compound score of each whole review
+            topic_masks: Topic bitmask of each review (ints, as from TopicMatcher)
+
+        Returns:
+            (len(texts), len(topics)) float64 array of mean clause compounds,
+            NaN where a review does not mention a topic
+        """
+        scores = np.full((len(texts), len(self.topic_matcher.topics)), np.nan)
+        if len(self._clauses) > self.max_clauses:
+            self._clauses.clear()
+        clause_scores = self._clauses
+        score_clause = self._score_clause
+
+        for i, mask in enumerate(topic_masks):
+            if not mask:
+                continue
+            clauses = split_clauses(texts[i])
+            if len(clauses) < 2:
+                scores[i, list(iter_bits(mask))] = compound[i]
+                continue
+
+            sums = {}
+            counts = {}
+            for clause in clauses:
+                entry = clause_scores.get(clause)
+                if entry is None:
+                    entry = clause_scores[clause] = score_clause(clause)
+                clause_mask, value = entry
+                for bit in iter_bits(clause_mask):
+                    sums[bit] = sums.get(bit, 0.0) + value
+                    counts[bit] = counts.get(bit, 0) + 1
+            # Phrases split across clauses still count for the review as a whole
+            for bit in iter_bits(mask):
+                scores[i, bit] = sums[bit] / counts[bit] if bit in counts else compound[i]
+        return scores
@@ -0,0 +1,380 @@
+"""
+Batch Sentiment Scorer
+Scores whole columns of reviews with VADER and TextBlob in one call.
+
+Reviews are deduplicated and tokenized once per batch by a Preprocessor.
+Reviews without a token in the VADER (or TextBlob) lexicon score exactly 0
+without calling that scorer; everything else goes through the exact VADER
+and TextBlob scorers, so the labels always match the per-review methods of
+CourseReviewAnalyzer.
+"""
+
+import hashlib
+import re
+import string
+
+import numpy as np
+import pandas as pd
+
+from instrumentation import NULL_METRICS
+from preprocess import Preprocessor
+from resources import load_vader
+
+# Bump whenever scoring logic changes so cached scores are invalidated
+SCORER_VERSION = '1'
+
+# Label thresholds shared with the per-review methods
+VADER_THRESHOLD = 0.05
+TEXTBLOB_THRESHOLD = 0.1
+
+LABELS = np.array(['Negative', 'Neutral', 'Positive'], dtype=object)
+
+
+def vader_labels(compound):
+    """Convert an array of VADER compound scores to sentiment labels."""
+    compound = np.asarray(compound, dtype=np.float64)
+    codes = np.where(compound >= VADER_THRESHOLD, 2, np.where(compound <= -VADER_THRESHOLD, 0, 1))
+    return LABELS[codes]
+
+
+def textblob_labels(polarity):
+    """Convert an array of TextBlob polarity scores to sentiment labels (None where polarity is NaN)."""
+    polarity = np.asarray(polarity, dtype=np.float64)
+    codes = np.where(polarity > TEXTBLOB_THRESHOLD, 2, np.where(polarity < -TEXTBLOB_THRESHOLD, 0, 1))
+    labels = LABELS[codes]
+    labels[np.isnan(polarity)] = None
+    return labels
+
+
+def rating_labels(ratings):
+    """
+    Sentiment implied by star ratings: 1-2 Negative, 3 Neutral, 4-5 Positive.
+
+    Args:
+        ratings: Array of ratings (missing or non-numeric values allowed)
+
+    Returns:
+        int8 indices into LABELS (-1 where the rating is missing)
+    """
+    ratings = pd.to_numeric(pd.Series(ratings), errors='coerce').to_numpy(dtype=float)
+    labels = np.full(len(ratings), -1, dtype=np.int8)
+    labels[ratings <= 2] = 0
+    labels[ratings == 3] = 1
+    labels[ratings >= 4] = 2
+    return labels
+
+
+class CascadePolicy:
+    """Decides which reviews cascade scoring escalates from VADER to TextBlob."""
+
+    def __init__(self, band=0.5, rating_conflict=True):
+        """
+        Initialize the policy.
+
+        Args:
+            band: Reviews whose VADER compound lies strictly between -band and
+                band are uncertain and escalated
+            rating_conflict: Also escalate reviews whose VADER label contradicts
+                their star rating (Positive at 1-2 stars, Negative at 4-5)
+        """
+        self.band = band
+        self.rating_conflict = rating_conflict
+
+    def escalate(self, compound, ratings=None):
+        """
+        Pick the reviews that need a TextBlob second opinion.
+
+        Args:
+            compound: Array of VADER compound scores
+            ratings: Star ratings of the same reviews (optional)
+
+        Returns:
+            Boolean array, True for reviews to escalate
+        """
+        compound = np.asarray(compound, dtype=np.float64)
+        escalate = np.abs(compound) < self.band
+        if self.rating_conflict and ratings is not None:
+            expected = rating_labels(ratings)
+            escalate |= (expected == 0) & (compound >= VADER_THRESHOLD)
+            escalate |= (expected == 2) & (compound <= -VADER_THRESHOLD)
+        return escalate
+
+
+class CascadeReport:
+    """Running escalation and agreement counts of cascade-scored reviews."""
+
+    def __init__(self):
+        self.reviews = 0
+        self.escalated = 0
+        self.rated = 0
+        self.escalated_rated = 0
+        self.vader_rating = 0
+        self.escalated_vader_rating = 0
+        self.textblob_rating = 0
+        self.vader_textblob = 0
+
+    def update(self, df):
+        """
+        Count a batch of analyzed reviews.
+
+        Args:
+            df: DataFrame with escalated, sentiment_vader, sentiment_textblob
+                and (optionally) rating columns; rows flagged in an
+                is_duplicate column are skipped
+        """
+        if 'is_duplicate' in df.columns:
+            df = df[~df['is_duplicate'].to_numpy(dtype=bool)]
+        escalated = df['escalated'].to_numpy(dtype=bool)
+        vader = np.asarray(df['sentiment_vader'], dtype=object)
+        textblob = np.asarray(df['sentiment_textblob'], dtype=object)
+        expected = rating_labels(df['rating']) if 'rating' in df.columns else np.full(len(df), -1, dtype=np.int8)
+        rated = expected >= 0
+        rating = np.where(rated, LABELS[np.maximum(expected, 0)], None)
+
+        self.reviews += len(df)
+        self.escalated += int(escalated.sum())
+        self.rated += int(rated.sum())
+        self.escalated_rated += int((escalated & rated).sum())
+        self.vader_rating += int((rated & (vader == rating)).sum())
+        self.escalated_vader_rating += int((escalated & rated & (vader == rating)).sum())
+        self.textblob_rating += int((escalated & rated & (textblob == rating)).sum())
+        self.vader_textblob += int((escalated & (vader == textblob)).sum())
+
+    def summary(self):
+        """
+        Escalation share and agreement rates (NaN where nothing was counted).
+
+        Returns:
+            Dict with reviews, escalated, escalated_share,
+            vader_rating_agreement (all rated reviews), and for escalated
+            reviews escalated_vader_rating_agreement,
+            textblob_rating_agreement and vader_textblob_agreement
+        """
+        def share(part, whole):
+            return part / whole if whole else float('nan')
+
+        return {
+            'reviews': self.reviews,
+            'escalated': self.escalated,
+            'escalated_share': share(self.escalated, self.reviews),
+            'vader_rating_agreement': share(self.vader_rating, self.rated),
+            'escalated_vader_rating_agreement': share(self.escalated_vader_rating, self.escalated_rated),
+            'textblob_rating_agreement': share(self.textblob_rating, self.escalated_rated),
+            'vader_textblob_agreement': share(self.vader_textblob, self.escalated)
+        }
+
+    def print_summary(self):
+        """Print the escalation share and agreement rates."""
+        summary = self.summary()
+        print(f"\nCascade: {summary['escalated_share']:.1%} of reviews escalated to TextBlob "
+              f"({summary['escalated']} of {summary['reviews']})")
+        print(f"  VADER agrees with ratings:    {summary['vader_rating_agreement']:.1%} (all), "
+              f"{summary['escalated_vader_rating_agreement']:.1%} (escalated)")
+        print(f"  TextBlob agrees with ratings: {summary['textblob_rating_agreement']:.1%} (escalated)")
+        print(f"  VADER agrees with TextBlob:   {summary['vader_textblob_agreement']:.1%} (escalated)")
+
+
+class LexiconIndex:
+    """Token index over the VADER lexicon."""
+
+    def __init__(self, lexicon):
+        """
+        Build the index.
+
+        Args:
+            lexicon: Mapping of lowercase token to VADER valence
+        """
+        self.ids = {token: i for i, token in enumerate(lexicon)}
+
+        digest = hashlib.sha1()
+        for token in sorted(lexicon):
+            digest.update(f'{token}\t{lexicon[token]!r}\n'.encode('utf-8'))
+        self.fingerprint = digest.hexdigest()
+
+    def __len__(self):
+        return len(self.ids)
+
+    def has_sentiment(self, text):
+        """
+        Check whether VADER could assign any valence to the text.
+
+        VADER splits on whitespace, drops single characters and strips a run
+        of punctuation from one end of a token before looking it up, so
+        checking those three forms is a superset of what VADER sees.
+        A text without any hit always scores a compound of exactly 0.
+        """
+        token_has_sentiment = self.token_has_sentiment
+        return any(token_has_sentiment(word) for word in text.split())
+
+    def token_has_sentiment(self, word):
+        """has_sentiment for a single whitespace-delimited token."""
+        if len(word) < 2:
+            return False
+        ids = self.ids
+        word = word.lower()
+        punctuation = string.punctuation
+        return word in ids or word.lstrip(punctuation) in ids or word.rstrip(punctuation) in ids
+
+
+class PatternLexicon:
+    """Words and emoticons TextBlob's PatternAnalyzer can assign a polarity to."""
+
+    def __init__(self):
+        from textblob._text import EMOTICONS
+        from textblob.en import sentiment
+
+        self.tokenizer = sentiment.tokenizer
+        self.words = set(sentiment.keys())
+        emoticons = sorted({emoticon.lower() for group in EMOTICONS.values() for emoticon in group}, key=len)
+        self.emoticons = re.compile('|'.join(re.escape(emoticon) for emoticon in reversed(emoticons)))
+
+    def token_has_polarity(self, word):
+        """
+        Check whether a whitespace-delimited token contains a word TextBlob scores.
+
+        The token goes through TextBlob's own tokenizer, so punctuation is
+        split off or kept attached exactly as it would be in a full review.
+        """
+        words = self.words
+        return any(piece.lower() in words for piece in ' '.join(self.tokenizer(word)).split())
+
+    def may_contain_emoticon(self, text):
+        """
+        Check whether TextBlob could find an emoticon in text.
+
+        TextBlob reassembles emoticons across whitespace (': )' becomes ':)'),
+        so this looks for them in the text with all whitespace removed. A
+        review with no scored word and no emoticon has a polarity of exactly 0.
+        """
+        return self.emoticons.search(''.join(text.lower().split())) is not None
+
+
+class BatchScorer:
+    """Scores batches of reviews with VADER and TextBlob."""
+
+    def __init__(self, vader=None, lexicon_cache=None, metrics=None):
+        """
+        Initialize the scorer. VADER and TextBlob are only loaded on first use.
+
+        Args:
+            vader: Existing SentimentIntensityAnalyzer to reuse (optional)
+            lexicon_cache: Prebuilt VADER lexicon from prepare_resources() (optional)
+            metrics: Metrics recorder timing the VADER and TextBlob passes (optional)
+        """
+        self.lexicon_cache = lexicon_cache
+        self.metrics = metrics or NULL_METRICS
+        self._vader = vader
+        self._textblob = None
+        self._lexicon = None
+        self._pattern_lexicon = None
+        self._preprocessor = None
+
+    @property
+    def vader(self):
+        """VADER SentimentIntensityAnalyzer."""
+        if self._vader is None:
+            self._vader = load_vader(self.lexicon_cache)
+        return self._vader
+
+    @property
+    def textblob(self):
+        """TextBlob's default PatternAnalyzer."""
+        if self._textblob is None:
+            from textblob.sentiments import PatternAnalyzer
+            self._textblob = PatternAnalyzer()
+        return self._textblob
+
+    @property
+    def lexicon(self):
+        """LexiconIndex over the VADER lexicon."""
+        if self._lexicon is None:
+            self._lexicon = LexiconIndex(self.vader.lexicon)
+        return self._lexicon
+
+    @property
+    def pattern_lexicon(self):
+        """PatternLexicon of the words TextBlob scores."""
+        if self._pattern_lexicon is None:
+            self._pattern_lexicon = PatternLexicon()
+        return self._pattern_lexicon
+
+    @property
+    def preprocessor(self):
+        """Preprocessor (without topic matching) used by score_batch."""
+        if self._preprocessor is None:
+            self._preprocessor = Preprocessor(self)
+        return self._preprocessor
+
+    def score_batch(self, texts):
+        """
+        Score a batch of reviews.
+
+        Args:
+            texts: Iterable of review texts (missing values score as Neutral)
+
+        Returns:
+            Dict of NumPy columns: sentiment_vader, sentiment_textblob,
+            vader_compound and textblob_polarity
+        """
+        return self.score_preprocessed(self.preprocessor.process(texts))
+
+    def score_preprocessed(self, batch, textblob=True):
+        """
+        Score a batch tokenized by a Preprocessor.
+
+        Only reviews whose tokens could carry a VADER valence or a TextBlob
+        polarity go through the exact scorers; the rest score exactly 0.
+
+        Args:
+            batch: PreprocessedBatch built from this scorer
+            textblob: Run TextBlob too; when False, textblob_polarity is NaN
+                and sentiment_textblob None (the first pass of cascade scoring)
+
+        Returns:
+            Same columns as score_batch
+        """
+        uniques = batch.texts
+        compound = np.zeros(len(uniques), dtype=np.float64)
+
+        polarity_scores = self.vader.polarity_scores
+        vader_rows = np.flatnonzero(batch.vader_candidates)
+        with self.metrics.stage('scorer.vader', rows=len(uniques)):
+            for i in vader_rows:
+                compound[i] = polarity_scores(uniques[i])['compound']
+        if textblob:
+            polarity = self._textblob_scores(batch)
+        else:
+            polarity = np.full(len(uniques), np.nan)
+
+        compound = compound[batch.codes]
+        polarity = polarity[batch.codes]
+        return {
+            'sentiment_vader': vader_labels(compound),
+            'sentiment_textblob': textblob_labels(polarity),
+            'vader_compound': compound,
+            'textblob_polarity': polarity,
+        }
+
+    def textblob_polarities(self, texts):
+        """
+        TextBlob polarity of each review, without VADER.
+
+        Args:
+            texts: Iterable of review texts (missing values score 0)
+
+        Returns:
+            float64 array of polarities
+        """
+        batch = self.preprocessor.process(texts)
+        return self._textblob_scores(batch)[batch.codes]
+
+    def _textblob_scores(self, batch):
+        """TextBlob polarity of each unique text of a batch."""
+        uniques = batch.texts
+        polarity = np.zeros(len(uniques), dtype=np.float64)
+        analyze = self.textblob.analyze
+        textblob_rows = np.flatnonzero(batch.textblob_candidates)
+        with self.metrics.stage('scorer.textblob', rows=len(uniques)):
+            for i in textblob_rows:
+                polarity[i] = analyze(uniques[i]).polarity
+        return polarity
@@ -0,0 +1,417 @@
+"""
+Benchmark Suite
+Times each stage of the analysis pipeline on seeded synthetic reviews.
+
+The synthetic generator follows the course_code,course_name,review,rating,semester
+schema of data/sample_reviews.csv, so the same code paths run at 10K, 1M or
+10M rows. Each stage is timed on its own and reported as JSON with
+throughput and peak RSS, optionally compared against a stored baseline.
+
+Usage:
+    python src/benchmark.py --rows 1m --output results/benchmark.json
+    python src/benchmark.py --rows 1m --baseline benchmarks/baseline.json
+"""
+
+import argparse
+import contextlib
+import gc
+import io
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+
+import numpy as np
+import pandas as pd
+
+from instrumentation import peak_rss_mb
+from linear_sentiment import LinearSentimentModel
+from sentiment_analyzer import CourseReviewAnalyzer
+
+# Named dataset sizes
+SIZES = {
+    '10k': 10_000,
+    '1m': 1_000_000,
+    '10m': 10_000_000
+}
+
+# Stages in the order they run
+STAGES = (
+    'clean_text', 'sentiment_vader', 'sentiment_textblob', 'sentiment_linear', 'extract_topics',
+    'analyze_all', 'get_course_summary', 'generate_all'
+)
+
+# Rows per generated block; blocks are seeded independently so output does not depend on memory
+GENERATOR_BLOCK = 100_000
+
+DEPARTMENTS = ['CS', 'ECE', 'MATH', 'STAT', 'PHYS', 'CHEM', 'ECON', 'IS', 'ME', 'BIOE']
+SUBJECTS = [
+    'Computer Science', 'Data Structures', 'Algorithms', 'Systems Programming', 'Machine Learning',
+    'Linear Algebra', 'Probability', 'Statistics', 'Calculus', 'Physics', 'Chemistry',
+    'Microeconomics', 'Databases', 'Networks', 'Signal Processing', 'Circuits'
+]
+SEMESTERS = [f'{term} {year}' for year in range(2019, 2026) for term in ('Spring', 'Fall')]
+
+# Review fragments by tone; most mention at least one topic keyword
+OPENINGS = {
+    'Positive': [
+        'Great course!', 'Loved this class.', 'Excellent experience overall.', 'Really enjoyed it.',
+        'One of the best classes I have taken.', 'Highly recommend this course.'
+    ],
+    'Neutral': [
+        'Average course.', 'It was okay.', 'Pretty standard class.', 'Nothing special.',
+        'Mixed feelings about this one.', 'Took it as a requirement.'
+    ],
+    'Negative': [
+        'Terrible course.', 'Did not enjoy this class.', 'Worst class this semester.',
+        'Very frustrating experience.', 'Would not recommend.', 'Really disappointing.'
+    ]
+}
+DETAILS = {
+    'Positive': [
+        'The professor explains concepts clearly.', 'TAs are helpful during office hours.',
+        'Assignments are practical and useful.', 'Lectures are engaging and well organized.',
+        'Exams are fair if you do the homework.', 'The projects were fun and applicable.'
+    ],
+    'Neutral': [
+        'The workload is manageable.', 'Exams are similar to the homework.',
+        'Lectures follow the textbook.', 'Labs take some time each week.',
+        'The midterm and final cover everything.', 'Office hours are available.'
+    ],
+    'Negative': [
+        'The exams are way too hard.', 'Too much homework every week.',
+        'The instructor rushes through lectures.', 'Projects take far too much time.',
+        'Tests are unfair and confusing.', 'I struggled to keep up with the workload.'
+    ]
+}
+FILLER = (
+    'week semester campus friends notes slides textbook deadline group partner quiz section '
+    'discussion grade curve online recording forum schedule morning evening library review '
+    'practice problems concepts material topics background prerequisites major elective'
+).split()
+
+
+def generate_reviews(n_rows, seed=0, n_courses=200):
+    """
+    Generate synthetic course reviews.
+
+    Output depends only on n_rows, seed and n_courses: rows are built in
+    independently seeded blocks of GENERATOR_BLOCK.
+
+    Args:
+        n_rows: Number of reviews
+        seed: Random seed
+        n_courses: Number of distinct courses
+
+    Returns:
+        DataFrame with the course_code, course_name, review, rating and semester columns
+    """
+    return pd.concat(
+        list(_generate_blocks(n_rows, seed, n_courses)) or [_generate_block(0, seed, 0, n_courses)],
+        ignore_index=True
+    )
+
+
+def _course_catalog(seed, n_courses):
+    """Course codes and names shared by every block of a dataset."""
+    rng = np.random.default_rng([seed, n_courses])
+    codes, names = [], []
+    seen = set()
+    while len(codes) < n_courses:
+        code = f'{DEPARTMENTS[rng.integers(len(DEPARTMENTS))]}{rng.integers(100, 600)}'
+        if code in seen:
+            continue
+        seen.add(code)
+        codes.append(code)
+        names.append(SUBJECTS[rng.integers(len(SUBJECTS))])
+    return np.array(codes, dtype=object), np.array(names, dtype=object)
+
+
+def _generate_blocks(n_rows, seed, n_courses):
+    """Yield DataFrames of at most GENERATOR_BLOCK rows."""
+    for block, start in enumerate(range(0, n_rows, GENERATOR_BLOCK)):
+        yield _generate_block(block, seed, min(GENERATOR_BLOCK, n_rows - start), n_courses)
+
+
+def _generate_block(block, seed, n_rows, n_courses):
+    rng = np.random.default_rng([seed, block])
+    codes, names = _course_catalog(seed, n_courses)
+
+    # Popular courses get more reviews
+    popularity = 1.0 / np.arange(1, n_courses + 1)
+    course = rng.choice(n_courses, size=n_rows, p=popularity / popularity.sum())
+    rating = rng.choice(np.arange(1, 6), size=n_rows, p=[0.1, 0.15, 0.2, 0.3, 0.25])
+
+    # Tone mostly follows the rating, with some disagreement
+    tone_index = np.clip(rating - 3 + rng.integers(-1, 2, size=n_rows) * (rng.random(n_rows) < 0.2), -1, 1)
+    tones = np.array(['Negative', 'Neutral', 'Positive'], dtype=object)[tone_index + 1]
+
+    opening = rng.integers(6, size=n_rows)
+    detail = rng.integers(6, size=(n_rows, 2))
+    n_details = rng.integers(1, 3, size=n_rows)
+    filler = rng.integers(len(FILLER), size=(n_rows, 3))
+    n_filler = rng.integers(0, 4, size=n_rows)
+
+    reviews = []
+    for i in range(n_rows):
+        tone = tones[i]
+        parts = [OPENINGS[tone][opening[i]]]
+        parts.extend(DETAILS[tone][detail[i, j]] for j in range(n_details[i]))
+        if n_filler[i]:
+            parts.append(' '.join(FILLER[word] for word in filler[i, :n_filler[i]]).capitalize() + '.')
+        reviews.append(' '.join(parts))
+
+    return pd.DataFrame({
+        'course_code': codes[course],
+        'course_name': names[course],
+        'review': reviews,
+        'rating': rating,
+        'semester': np.array(SEMESTERS, dtype=object)[rng.integers(len(SEMESTERS), size=n_rows)]
+    })
+
+
+def write_synthetic_csv(path, n_rows, seed=0, n_courses=200):
+    """
+    Write a synthetic review CSV block by block (10M rows never sit in memory at once).
+
+    Args:
+        path: Output CSV path
+        n_rows: Number of reviews
+        seed: Random seed
+        n_courses: Number of distinct courses
+    """
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    temp_path = f'{path}.tmp'
+    first = True
+    for block in _generate_blocks(n_rows, seed, n_courses):
+        block.to_csv(temp_path, mode='w' if first else 'a', header=first, index=False)
+        first = False
+    if first:
+        _generate_block(0, seed, 0, n_courses).to_csv(temp_path, index=False)
+    os.replace(temp_path, path)
+
+
+def _git_commit():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', 'HEAD'], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+class BenchmarkSuite:
+    """Times the analyzer and visualizer stages on one synthetic dataset."""
+
+    def __init__(self, rows, seed=0, sample_rows=20000, workers=1, work_dir=None, quiet=True):
+        """
+        Initialize the suite.
+
+        Args:
+            rows: Dataset size (an int or a key of SIZES)
+            seed: Random seed of the synthetic dataset
+            sample_rows: Rows used by the per-review stages (clean_text, the
+                sentiment backends, extract_topics), which would take hours at 10M
+            workers: Worker processes for analyze_all and generate_all
+            work_dir: Directory for the dataset and outputs (defaults to a temp dir)
+            quiet: Hide the pipeline's own progress output
+        """
+        self.rows = SIZES[rows] if isinstance(rows, str) else int(rows)
+        self.seed = seed
+        self.sample_rows = min(sample_rows, self.rows)
+        self.workers = workers
+        self.work_dir = work_dir
+        self.quiet = quiet
+        self.results = {}
+
+    def _measure(self, stage, rows, func):
+        """Run func once and record its wall time, throughput and the peak RSS so far."""
+        gc.collect()
+        output = io.StringIO() if self.quiet else None
+        start = time.perf_counter()
+        with contextlib.redirect_stdout(output) if output is not None else contextlib.nullcontext():
+            result = func()
+        seconds = time.perf_counter() - start
+        self.results[stage] = {
+            'rows': rows,
+            'seconds': round(seconds, 6),
+            'rows_per_sec': round(rows / seconds, 2) if seconds > 0 else None,
+            'peak_rss_mb': peak_rss_mb()
+        }
+        print(f"  {stage:<20} {seconds:10.3f}s  {rows / max(seconds, 1e-9):14,.0f} rows/s")
+        return result
+
+    def run(self, stages=STAGES):
+        """
+        Generate the dataset and time the requested stages.
+
+        Args:
+            stages: Stage names to run, a subset of STAGES
+
+        Returns:
+            Report dict (see report())
+        """
+        with contextlib.ExitStack() as stack:
+            work_dir = self.work_dir or stack.enter_context(tempfile.TemporaryDirectory(prefix='sentiment-bench-'))
+            os.makedirs(work_dir, exist_ok=True)
+            data_path = os.path.join(work_dir, f'synthetic_{self.rows}_{self.seed}.csv')
+            output_path = os.path.join(work_dir, 'analyzed_reviews.csv')
+
+            print("=" * 60)
+            print(f"Benchmark: {self.rows:,} synthetic reviews (seed {self.seed})")
+            print("=" * 60)
+            if not os.path.exists(data_path):
+                start = time.perf_counter()
+                write_synthetic_csv(data_path, self.rows, seed=self.seed)
+                print(f"Generated {data_path} in {time.perf_counter() - start:.1f}s")
+
+            analyzer = CourseReviewAnalyzer(data_path=data_path)
+            sample = pd.read_csv(data_path, nrows=self.sample_rows)['review']
+            cleaned = [analyzer.clean_text(text) for text in sample]
+            # Build VADER and TextBlob outside the timed stages
+            analyzer.analyze_sentiment_vader('warm up')
+            analyzer.analyze_sentiment_textblob('warm up')
+
+            if 'clean_text' in stages:
+                self._measure('clean_text', len(sample), lambda: [analyzer.clean_text(text) for text in sample])
+            if 'sentiment_vader' in stages:
+                self._measure('sentiment_vader', len(cleaned),
+                              lambda: [analyzer.analyze_sentiment_vader(text) for text in cleaned])
+            if 'sentiment_textblob' in stages:
+                self._measure('sentiment_textblob', len(cleaned),
+                              lambda: [analyzer.analyze_sentiment_textblob(text) for text in cleaned])
+            if 'sentiment_linear' in stages:
+                # Trained outside the timed stage; scored as one batch, the way analyze_all uses it
+                model = LinearSentimentModel().fit_csv(data_path)
+                self._measure('sentiment_linear', len(cleaned), lambda: model.predict(cleaned))
+            if 'extract_topics' in stages:
+                self._measure('extract_topics', len(sample), lambda: [analyzer.extract_topics(text) for text in sample])
+
+            needs_analysis = {'analyze_all', 'get_course_summary', 'generate_all'} & set(stages)
+            if needs_analysis:
+                analyze = lambda: analyzer.analyze_all(workers=self.workers, output_path=output_path)  # noqa: E731
+                if 'analyze_all' in stages:
+                    self._measure('analyze_all', self.rows, analyze)
+                else:
+                    with contextlib.redirect_stdout(io.StringIO()):
+                        analyze()
+
+            if 'get_course_summary' in stages:
+                codes = analyzer.get_aggregates().course_codes()
+                self._measure('get_course_summary', len(codes),
+                              lambda: [analyzer.get_course_summary(code) for code in codes])
+
+            if 'generate_all' in stages:
+                from visualizer import ReviewVisualizer
+
+                def render():
+                    visualizer = ReviewVisualizer(output_path, output_dir=os.path.join(work_dir, 'visualizations'))
+                    visualizer.generate_all(workers=self.workers, force=True)
+
+                self._measure('generate_all', self.rows, render)
+
+        return self.report()
+
+    def report(self):
+        """Machine-readable results of the last run."""
+        return {
+            'meta': {
+                'rows': self.rows,
+                'seed': self.seed,
+                'sample_rows': self.sample_rows,
+                'workers': self.workers,
+                'timestamp': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+                'git_commit': _git_commit(),
+                'python': platform.python_version(),
+                'platform': platform.platform(),
+                'cpu_count': os.cpu_count()
+            },
+            'stages': self.results
+        }
+
+
+def compare_to_baseline(report, baseline, tolerance=0.1):
+    """
+    Compare stage throughput against a baseline report.
+
+    Args:
+        report: Report from BenchmarkSuite.run
+        baseline: Earlier report to compare against
+        tolerance: Fractional throughput drop tolerated before a stage counts as a regression
+
+    Returns:
+        Dict of stage -> {baseline_rows_per_sec, rows_per_sec, speedup, regression}
+    """
+    if baseline['meta'].get('rows') != report['meta']['rows']:
+        print(f"Warning: baseline has {baseline['meta'].get('rows')} rows, this run has {report['meta']['rows']}")
+
+    comparison = {}
+    for stage, result in report['stages'].items():
+        previous = baseline['stages'].get(stage)
+        if not previous or not previous.get('rows_per_sec') or not result.get('rows_per_sec'):
+            continue
+        speedup = result['rows_per_sec'] / previous['rows_per_sec']
+        comparison[stage] = {
+            'baseline_rows_per_sec': previous['rows_per_sec'],
+            'rows_per_sec': result['rows_per_sec'],
+            'speedup': round(speedup, 3),
+            'regression': speedup < 1 - tolerance
+        }
+    return comparison
+
+
+def _write_json(data, path):
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with open(path, 'w') as f:
+        json.dump(data, f, indent=2)
+
+
+def main():
+    """Run the benchmark suite from the command line."""
+    parser = argparse.ArgumentParser(description='Benchmark the sentiment analysis pipeline on synthetic reviews.')
+    parser.add_argument('--rows', default='10k', help=f"dataset size: {', '.join(SIZES)} or a row count")
+    parser.add_argument('--seed', type=int, default=0, help='random seed of the synthetic dataset')
+    parser.add_argument('--sample-rows', type=int, default=20000, help='rows used by the per-review stages')
+    parser.add_argument('--workers', type=int, default=1, help='worker processes for analyze_all and generate_all')
+    parser.add_argument('--stages', nargs='+', choices=STAGES, default=list(STAGES), help='stages to run')
+    parser.add_argument('--work-dir', help='keep the dataset and outputs here (reused between runs)')
+    parser.add_argument('--output', default='results/benchmark.json', help='where to write the JSON report')
+    parser.add_argument('--baseline', help='earlier report to compare against')
+    parser.add_argument('--tolerance', type=float, default=0.1, help='throughput drop tolerated by --baseline')
+    parser.add_argument('--save-baseline', help='also write this run as a baseline file')
+    parser.add_argument('--verbose', action='store_true', help='show pipeline progress output')
+    args = parser.parse_args()
+
+    rows = args.rows.lower() if args.rows.lower() in SIZES else int(args.rows)
+    suite = BenchmarkSuite(rows, seed=args.seed, sample_rows=args.sample_rows, workers=args.workers,
+                           work_dir=args.work_dir, quiet=not args.verbose)
+    report = suite.run(args.stages)
+
+    status = 0
+    if args.baseline:
+        with open(args.baseline) as f:
+            report['baseline'] = compare_to_baseline(report, json.load(f), args.tolerance)
+        print("\nCompared to baseline:")
+        for stage, result in report['baseline'].items():
+            flag = '  REGRESSION' if result['regression'] else ''
+            print(f"  {stage:<20} {result['speedup']:6.2f}x{flag}")
+        status = 1 if any(result['regression'] for result in report['baseline'].values()) else 0
+
+    _write_json(report, args.output)
+    print(f"\nReport saved to {args.output}")
+    if args.save_baseline:
+        _write_json({'meta': report['meta'], 'stages': report['stages']}, args.save_baseline)
+        print(f"Baseline saved to {args.save_baseline}")
+    return status
+
+
+if __name__ == "__main__":
+    sys.exit(main())
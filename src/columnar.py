@@ -0,0 +1,298 @@
+"""
+Columnar Review Store
+Binary, memory-mappable storage for analyzed reviews.
+
+A store is a directory (conventionally ending in .cols) with one .npy file
+per column and a meta.json describing them:
+- repeated strings (course codes, sentiment labels, ...) as categorical codes
+- float scores as float32
+- free text as one contiguous UTF-8 buffer plus row offsets
+- topics as a uint64 bitmask per row, with the topic names in meta.json
+
+Only NumPy is required, and every array can be opened with mmap_mode='r'.
+
+compact_frame applies the same encodings to a DataFrame in memory.
+"""
+
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+from topic_matcher import GENERAL_TOPIC, parse_topics
+
+FORMAT_VERSION = 1
+
+# Columns stored as raw text rather than categoricals
+TEXT_COLUMNS = ('review', 'cleaned_review')
+
+# Sentiment label columns and their categories (the order of batch_scorer.LABELS)
+LABEL_COLUMNS = ('sentiment_vader', 'sentiment_textblob', 'sentiment_linear')
+SENTIMENT_LABELS = ['Negative', 'Neutral', 'Positive']
+
+
+def is_columnar(path):
+    """Whether path points at a columnar store."""
+    return os.path.isdir(path) and os.path.exists(os.path.join(path, 'meta.json'))
+
+
+def _code_dtype(n_categories):
+    """Smallest signed integer dtype that can hold the category codes (and -1 for missing)."""
+    for dtype in (np.int8, np.int16, np.int32):
+        if n_categories < np.iinfo(dtype).max:
+            return dtype
+    return np.int64
+
+
+def _topic_masks(topics, topic_names):
+    """Encode a column of topic lists as an (n, words) uint64 bitmask array."""
+    bits = {name: i for i, name in enumerate(topic_names)}
+    words = max(1, -(-len(topic_names) // 64))
+    masks = np.zeros((len(topics), words), dtype=np.uint64)
+    for row, cell in enumerate(topics):
+        for topic in parse_topics(cell):
+            bit = bits.get(topic)
+            if bit is not None:
+                masks[row, bit // 64] |= np.uint64(1) << np.uint64(bit % 64)
+    return masks
+
+
+def _mask_topics(words, topic_names):
+    """Decode one row of bitmask words back into a topic list."""
+    topics = [
+        name for bit, name in enumerate(topic_names)
+        if int(words[bit // 64]) >> (bit % 64) & 1
+    ]
+    return topics or [GENERAL_TOPIC]
+
+
+def write_columnar(df, path, topic_names=None):
+    """
+    Write an analyzed DataFrame to a columnar store.
+
+    Args:
+        df: DataFrame to write
+        path: Output directory (created if needed)
+        topic_names: Topic order for the bitmask (defaults to topics found in df)
+    """
+    os.makedirs(path, exist_ok=True)
+    columns = []
+
+    def save(name, array):
+        np.save(os.path.join(path, f'{name}.npy'), np.ascontiguousarray(array))
+
+    for name in df.columns:
+        series = df[name]
+        column = {'name': name}
+
+        if name == 'topic_mask':
+            # Already encoded by compact_frame
+            column.update(name='topics', kind='topics', topics=list(df.attrs.get('topics', [])))
+            save('topics', series.to_numpy(dtype=np.uint64)[:, None])
+        elif name == 'topics':
+            if topic_names is None:
+                seen = {}
+                for cell in series:
+                    for topic in parse_topics(cell):
+                        seen.setdefault(topic, None)
+                topic_names = [t for t in seen if t != GENERAL_TOPIC]
+            column.update(kind='topics', topics=list(topic_names))
+            save(name, _topic_masks(series, topic_names))
+        elif name in TEXT_COLUMNS:
+            nulls = series.isna().to_numpy()
+            encoded = [b'' if null else str(text).encode('utf-8') for text, null in zip(series, nulls)]
+            offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+            np.cumsum([len(text) for text in encoded], out=offsets[1:])
+            column.update(kind='text', has_nulls=bool(nulls.any()))
+            save(f'{name}.data', np.frombuffer(b''.join(encoded), dtype=np.uint8))
+            save(f'{name}.offsets', offsets)
+            if nulls.any():
+                save(f'{name}.nulls', nulls)
+        elif pd.api.types.is_float_dtype(series.dtype):
+            column.update(kind='numeric')
+            save(name, series.to_numpy(dtype=np.float32))
+        elif pd.api.types.is_bool_dtype(series.dtype) or pd.api.types.is_integer_dtype(series.dtype):
+            column.update(kind='numeric')
+            save(name, series.to_numpy())
+        else:
+            categorical = pd.Categorical(series)
+            categories = [str(c) for c in categorical.categories]
+            column.update(kind='category', categories=categories)
+            save(name, categorical.codes.astype(_code_dtype(len(categories))))
+        columns.append(column)
+
+    meta = {'version': FORMAT_VERSION, 'rows': len(df), 'columns': columns}
+    with open(os.path.join(path, 'meta.json'), 'w') as f:
+        json.dump(meta, f, indent=2)
+
+
+def compact_frame(df, topic_names=None, text_buffer=False):
+    """
+    Shrink an analyzed DataFrame in memory.
+
+    Repeated strings become categoricals (sentiment labels always get int8
+    codes), floats become float32, integers are downcast, and topic lists
+    become a uint64 'topic_mask' column with the topic names in
+    df.attrs['topics'] - the layout read_columnar returns. Frames with more
+    than 64 topics keep their 'topics' lists.
+
+    Args:
+        df: Analyzed reviews
+        topic_names: Topic order for the bitmask (defaults to topics found in df)
+        text_buffer: Store review text in one contiguous buffer with offsets
+            (pyarrow strings); requires pyarrow
+
+    Returns:
+        New compact DataFrame with the same rows
+    """
+    if text_buffer:
+        try:
+            import pyarrow  # noqa: F401
+        except ImportError:
+            raise ImportError("text_buffer=True requires pyarrow (pip install pyarrow)") from None
+
+    data = {}
+    topics = list(df.attrs.get('topics', topic_names or [])) if 'topic_mask' in df.columns else None
+    for name in df.columns:
+        series = df[name]
+        if name == 'topics':
+            if topic_names is None:
+                seen = {}
+                for cell in series:
+                    for topic in parse_topics(cell):
+                        seen.setdefault(topic, None)
+                topic_names = [t for t in seen if t != GENERAL_TOPIC]
+            if len(topic_names) > 64:
+                data[name] = series
+                continue
+            topics = list(topic_names)
+            data['topic_mask'] = _topic_masks(series, topics)[:, 0]
+        elif name in TEXT_COLUMNS:
+            data[name] = series.astype('string[pyarrow]') if text_buffer else series
+        elif name in LABEL_COLUMNS:
+            data[name] = pd.Categorical(series, categories=SENTIMENT_LABELS)
+        elif pd.api.types.is_float_dtype(series.dtype):
+            data[name] = series.astype(np.float32)
+        elif pd.api.types.is_bool_dtype(series.dtype):
+            data[name] = series
+        elif pd.api.types.is_integer_dtype(series.dtype):
+            data[name] = pd.to_numeric(series, downcast='integer')
+        elif isinstance(series.dtype, pd.CategoricalDtype):
+            data[name] = series.cat.remove_unused_categories()
+        else:
+            data[name] = series.astype('category')
+
+    compact = pd.DataFrame(data, index=df.index)
+    if topics is not None:
+        compact.attrs['topics'] = topics
+    return compact
+
+
+class ColumnarStore:
+    """Read access to a columnar review store."""
+
+    def __init__(self, path, mmap=True):
+        """
+        Open a store.
+
+        Args:
+            path: Store directory
+            mmap: Memory-map the column files instead of reading them into RAM
+        """
+        self.path = path
+        self.mmap_mode = 'r' if mmap else None
+        with open(os.path.join(path, 'meta.json')) as f:
+            self.meta = json.load(f)
+        if self.meta.get('version') != FORMAT_VERSION:
+            raise ValueError(f"Unsupported columnar store version: {self.meta.get('version')}")
+        self.columns = {column['name']: column for column in self.meta['columns']}
+
+    def __len__(self):
+        return self.meta['rows']
+
+    def _load(self, name):
+        return np.load(os.path.join(self.path, f'{name}.npy'), mmap_mode=self.mmap_mode)
+
+    @property
+    def topic_names(self):
+        """Topic names of the topics bitmask, or an empty list if there is none."""
+        column = self.columns.get('topics')
+        return list(column['topics']) if column else []
+
+    def text(self, name, rows=None):
+        """
+        Decode a text column.
+
+        Args:
+            name: Text column name
+            rows: Row positions to decode (defaults to every row)
+
+        Returns:
+            List of strings (None for missing values)
+        """
+        data = memoryview(self._load(f'{name}.data'))
+        offsets = self._load(f'{name}.offsets')
+        nulls = self._load(f'{name}.nulls') if self.columns[name].get('has_nulls') else None
+        if rows is None:
+            rows = range(len(self))
+
+        texts = []
+        for row in rows:
+            if nulls is not None and nulls[row]:
+                texts.append(None)
+            else:
+                start, end = int(offsets[row]), int(offsets[row + 1])
+                texts.append(str(data[start:end], 'utf-8'))
+        return texts
+
+    def column(self, name):
+        """Load one non-text column as an array or Categorical."""
+        column = self.columns[name]
+        kind = column['kind']
+        if kind == 'category':
+            return pd.Categorical.from_codes(self._load(name), categories=column['categories'])
+        if kind == 'topics':
+            return self._load(name)
+        if kind == 'text':
+            return self.text(name)
+        return self._load(name)
+
+    def to_frame(self, columns=None, include_text=True):
+        """
+        Load the store as a DataFrame.
+
+        Topics come back as a uint64 'topic_mask' column (bit i is the i-th
+        name in df.attrs['topics']); stores with more than 64 topics fall back
+        to a 'topics' list column.
+
+        Args:
+            columns: Column names to load (defaults to all)
+            include_text: Whether to decode text columns such as review
+
+        Returns:
+            DataFrame backed by the memory-mapped arrays where possible
+        """
+        names = columns if columns is not None else list(self.columns)
+        data = {}
+        for name in names:
+            kind = self.columns[name]['kind']
+            if kind == 'text' and not include_text:
+                continue
+            if kind == 'topics':
+                masks = self._load(name)
+                if masks.shape[1] == 1:
+                    data['topic_mask'] = masks[:, 0]
+                else:
+                    data['topics'] = [_mask_topics(row, self.topic_names) for row in masks]
+                continue
+            data[name] = self.column(name)
+
+        df = pd.DataFrame(data, copy=False)
+        df.attrs['topics'] = self.topic_names
+        return df
+
+
+def read_columnar(path, columns=None, mmap=True):
+    """Load a columnar store as a DataFrame (see ColumnarStore.to_frame)."""
+    return ColumnarStore(path, mmap=mmap).to_frame(columns)
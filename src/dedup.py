@@ -0,0 +1,360 @@
+"""
+Near-Duplicate Review Detection
+MinHash signatures with locality-sensitive hashing (LSH) over word shingles.
+
+Scraped reviews contain reposts, crossposts and quoted text, and the same
+post can be found under several course codes. Each review is reduced to a
+MinHash signature of its word 3-gram shingles. Signatures are split into
+bands, and reviews sharing a band become candidate pairs; only candidates
+whose signatures agree on at least `threshold` of their values are merged.
+
+Everything is NumPy and sort based, so time is O(n log n) rather than
+O(n^2). Memory is a few compact arrays per review. Signatures of large
+inputs are kept in a memory-mapped file instead of RAM.
+
+NearDuplicateDetector.cluster needs every text at once. DuplicateIndex
+takes reviews chunk by chunk instead (as analyze_stream reads them): it
+keeps the band keys of each cluster's representative in sorted arrays and
+their signatures on disk, so only about 16 bytes per band per distinct
+review stay in RAM. A chunk's reviews can join clusters of earlier chunks,
+but two clusters that are already written are never merged afterwards.
+"""
+
+import os
+import tempfile
+import zlib
+
+import numpy as np
+
+from topic_matcher import tokenize
+
+# Rows above which signatures are memory-mapped from a temporary file
+IN_MEMORY_ROWS = 1000000
+
+_MIX = np.uint64(0x9E3779B97F4A7C15)
+
+
+def _union(parent, a, b):
+    """Merge the components of each pair (a[i], b[i]); roots are the smallest row."""
+    while len(a):
+        ra, rb = _find(parent, a), _find(parent, b)
+        differ = ra != rb
+        if not differ.any():
+            return
+        ra, rb = ra[differ], rb[differ]
+        np.minimum.at(parent, np.maximum(ra, rb), np.minimum(ra, rb))
+        a, b = a[differ], b[differ]
+
+
+def _find(parent, rows):
+    """Roots of rows, pointing the rows straight at their roots."""
+    roots = parent[rows]
+    while True:
+        up = parent[roots]
+        if np.array_equal(up, roots):
+            parent[rows] = roots
+            return roots
+        roots = up
+
+
+class NearDuplicateDetector:
+    """Clusters exact and near-duplicate texts with MinHash LSH."""
+
+    def __init__(self, num_perm=64, bands=8, threshold=0.8, shingle_size=3, chunk_size=50000, seed=1,
+                 work_dir=None):
+        """
+        Initialize the detector.
+
+        With the defaults (8 bands of 8 values), pairs with a Jaccard
+        similarity around 0.77 have a 50% chance of becoming candidates, so
+        pairs near the threshold are rarely missed.
+
+        Args:
+            num_perm: MinHash values per review
+            bands: LSH bands (num_perm must be a multiple of bands)
+            threshold: Estimated Jaccard similarity at which candidates are merged
+            shingle_size: Words per shingle
+            chunk_size: Reviews hashed at a time
+            seed: Seed of the hash functions
+            work_dir: Directory for memory-mapped signatures (defaults to a temp dir)
+        """
+        if num_perm % bands:
+            raise ValueError("num_perm must be a multiple of bands")
+        self.num_perm = num_perm
+        self.bands = bands
+        self.rows_per_band = num_perm // bands
+        self.threshold = threshold
+        self.shingle_size = shingle_size
+        self.chunk_size = chunk_size
+        self.work_dir = work_dir
+
+        rng = np.random.default_rng(seed)
+        self.seeds = rng.integers(0, 2 ** 63, size=num_perm, dtype=np.uint64)
+        # Odd multipliers keep multiply-shift hashing a permutation
+        self.multipliers = rng.integers(0, 2 ** 63, size=num_perm, dtype=np.uint64) | np.uint64(1)
+        self._token_hashes = {}
+
+    def _shingles(self, texts):
+        """Hash every review's word shingles; returns (hashes, offsets) in CSR layout."""
+        token_hashes = self._token_hashes
+        k = self.shingle_size
+        padding = [0] * (k - 1)
+        flat = []
+        starts = []
+        offsets = np.zeros(len(texts) + 1, dtype=np.int64)
+        count = 0
+        for i, text in enumerate(texts):
+            tokens = tokenize(text) if isinstance(text, str) else []
+            if tokens:
+                starts.extend(range(len(flat), len(flat) + len(tokens)))
+                for token in tokens:
+                    value = token_hashes.get(token)
+                    if value is None:
+                        value = token_hashes[token] = zlib.crc32(token.encode('utf-8')) + 1
+                    flat.append(value)
+                # Padding lets reviews shorter than a shingle still get one
+                flat.extend(padding)
+                count += len(tokens)
+            offsets[i + 1] = count
+
+        if len(token_hashes) > 5000000:
+            token_hashes.clear()
+
+        tokens = np.asarray(flat, dtype=np.uint64)
+        starts = np.asarray(starts, dtype=np.int64)
+        hashes = np.zeros(len(starts), dtype=np.uint64)
+        for j in range(k):
+            hashes = (hashes ^ tokens[starts + j]) * _MIX
+        return hashes, offsets
+
+    def signatures(self, texts):
+        """
+        Compute MinHash signatures.
+
+        Args:
+            texts: Sequence of review texts (missing values are allowed)
+
+        Returns:
+            (len(texts), num_perm) uint32 array; reviews without words get all-ones rows
+        """
+        signatures = np.full((len(texts), self.num_perm), np.iinfo(np.uint32).max, dtype=np.uint32)
+        self._fill_signatures(texts, signatures)
+        return signatures
+
+    def _fill_signatures(self, texts, out):
+        block = 8
+        for start in range(0, len(texts), self.chunk_size):
+            chunk = texts[start:start + self.chunk_size]
+            hashes, offsets = self._shingles(chunk)
+            nonempty = np.flatnonzero(offsets[1:] > offsets[:-1])
+            if len(hashes) == 0:
+                continue
+            for first in range(0, self.num_perm, block):
+                seeds = self.seeds[first:first + block, None]
+                multipliers = self.multipliers[first:first + block, None]
+                values = ((hashes[None, :] ^ seeds) * multipliers) >> np.uint64(32)
+                minima = np.minimum.reduceat(values, offsets[nonempty], axis=1)
+                out[start + nonempty, first:first + block] = minima.T.astype(np.uint32)
+
+    def _band_keys(self, signatures, band, start, end):
+        columns = signatures[start:end, band * self.rows_per_band:(band + 1) * self.rows_per_band]
+        keys = np.full(end - start, band, dtype=np.uint64)
+        for column in columns.T:
+            keys = (keys ^ column.astype(np.uint64)) * _MIX
+        return keys
+
+    def cluster(self, texts):
+        """
+        Assign every review to a cluster of near-duplicates.
+
+        Args:
+            texts: Sequence of review texts (a list, array or Series)
+
+        Returns:
+            int64 array giving, for each row, the position of its cluster's
+            representative (the cluster's first row); unique rows map to themselves
+        """
+        if not isinstance(texts, (list, np.ndarray)):
+            # Slicing a Series by position below; no copy of the texts is made
+            texts = texts.to_numpy() if hasattr(texts, 'to_numpy') else list(texts)
+        n = len(texts)
+        if n < 2:
+            return np.arange(n, dtype=np.int64)
+
+        with tempfile.TemporaryDirectory(dir=self.work_dir, prefix='minhash-') as work_dir:
+            shape = (n, self.num_perm)
+            if n > IN_MEMORY_ROWS:
+                signatures = np.lib.format.open_memmap(
+                    os.path.join(work_dir, 'signatures.npy'), mode='w+', dtype=np.uint32, shape=shape
+                )
+                signatures[:] = np.iinfo(np.uint32).max
+            else:
+                signatures = np.full(shape, np.iinfo(np.uint32).max, dtype=np.uint32)
+            self._fill_signatures(texts, signatures)
+            roots = self._cluster_signatures(signatures)
+            del signatures
+        return roots
+
+    def _empty_rows(self, signatures):
+        """Rows of reviews without words (all-ones signatures), which are never merged."""
+        return np.concatenate([
+            (signatures[start:start + self.chunk_size] == np.iinfo(np.uint32).max).all(axis=1)
+            for start in range(0, len(signatures), self.chunk_size)
+        ]) if len(signatures) else np.zeros(0, dtype=bool)
+
+    def _cluster_signatures(self, signatures):
+        """Cluster representatives (see cluster) of rows with the given signatures."""
+        n = len(signatures)
+        parent = np.arange(n, dtype=np.int64)
+        if n < 2:
+            return parent
+        empty = self._empty_rows(signatures)
+
+        for band in range(self.bands):
+            keys = np.concatenate([
+                self._band_keys(signatures, band, start, min(start + self.chunk_size, n))
+                for start in range(0, n, self.chunk_size)
+            ])
+            order = np.argsort(keys, kind='stable')
+            sorted_keys = keys[order]
+            del keys
+            same = sorted_keys[1:] == sorted_keys[:-1]
+            if not same.any():
+                continue
+            # Pair every member of a bucket with the bucket's first (earliest) row
+            group_start = np.maximum.accumulate(np.where(np.concatenate([[False], same]), 0, np.arange(n)))
+            members = np.flatnonzero(np.concatenate([[False], same]))
+            first, other = order[group_start[members]], order[members]
+            candidates = ~(empty[first] | empty[other])
+            first, other = first[candidates], other[candidates]
+            self._merge_similar(signatures, parent, first, other)
+        return _find(parent, np.arange(n, dtype=np.int64))
+
+    def _merge_similar(self, signatures, parent, first, other):
+        """Union candidate pairs whose signatures agree on at least threshold of their values."""
+        # Pairs already in one component need no check
+        keep = _find(parent, first) != _find(parent, other)
+        first, other = first[keep], other[keep]
+        step = self.chunk_size * 4
+        for start in range(0, len(first), step):
+            a, b = first[start:start + step], other[start:start + step]
+            similarity = (signatures[a] == signatures[b]).mean(axis=1)
+            similar = similarity >= self.threshold
+            _union(parent, a[similar], b[similar])
+
+
+class DuplicateIndex:
+    """Near-duplicate clusters built up chunk by chunk, with bounded memory."""
+
+    # Entries of one LSH bucket compared with each new review, oldest first
+    MAX_BUCKET_CHECKS = 4
+
+    def __init__(self, detector=None):
+        """
+        Initialize an empty index.
+
+        Args:
+            detector: Configured NearDuplicateDetector (optional); its
+                work_dir holds the signature file
+        """
+        self.detector = detector or NearDuplicateDetector()
+        self.rows = 0
+        self.duplicates = 0
+        # Band keys of cluster representatives, sorted, with each key's signature slot
+        self._keys = np.zeros(0, dtype=np.uint64)
+        self._slots = np.zeros(0, dtype=np.int64)
+        # Row of the representative stored in each slot
+        self._representatives = np.zeros(0, dtype=np.int64)
+        self._dir = tempfile.TemporaryDirectory(dir=self.detector.work_dir, prefix='minhash-')
+        self._path = os.path.join(self._dir.name, 'signatures.u32')
+        self._file = open(self._path, 'w+b')
+        self._signatures = None
+
+    def __len__(self):
+        return self.rows
+
+    def _stored_signatures(self):
+        """Signatures of every representative, memory-mapped from the signature file."""
+        if self._signatures is None:
+            self._file.flush()
+            self._signatures = np.memmap(self._path, dtype=np.uint32, mode='r',
+                                         shape=(len(self._representatives), self.detector.num_perm))
+        return self._signatures
+
+    def add(self, texts):
+        """
+        Cluster the next chunk of reviews, against each other and every earlier chunk.
+
+        Args:
+            texts: Review texts of the chunk (a list, array or Series)
+
+        Returns:
+            int64 array giving, for each review, the row of its cluster's
+            representative, counting rows from the first review ever added
+        """
+        detector = self.detector
+        if not isinstance(texts, (list, np.ndarray)):
+            texts = texts.to_numpy() if hasattr(texts, 'to_numpy') else list(texts)
+        m = len(texts)
+        first_row = self.rows
+        self.rows += m
+        if m == 0:
+            return np.zeros(0, dtype=np.int64)
+
+        signatures = detector.signatures(texts)
+        empty = detector._empty_rows(signatures)
+        local = detector._cluster_signatures(signatures)
+        band_keys = [detector._band_keys(signatures, band, 0, m) for band in range(detector.bands)]
+
+        # Earliest earlier representative each review is similar to (-1 for none)
+        earlier = np.full(m, -1, dtype=np.int64)
+        if len(self._keys):
+            stored = self._stored_signatures()
+            last = len(self._keys) - 1
+            for keys in band_keys:
+                positions = np.searchsorted(self._keys, keys)
+                for _ in range(self.MAX_BUCKET_CHECKS):
+                    in_bucket = (positions <= last) & (self._keys[np.minimum(positions, last)] == keys)
+                    hits = np.flatnonzero(in_bucket & ~empty)
+                    if not len(hits):
+                        break
+                    slots = self._slots[positions[hits]]
+                    similar = (signatures[hits] == stored[slots]).mean(axis=1) >= detector.threshold
+                    reviews, rows = hits[similar], self._representatives[slots[similar]]
+                    better = (earlier[reviews] < 0) | (rows < earlier[reviews])
+                    earlier[reviews[better]] = rows[better]
+                    positions = positions + 1
+
+        # A cluster within the chunk joins the earliest earlier cluster any of its members matched
+        none = np.iinfo(np.int64).max
+        joined = np.full(m, none, dtype=np.int64)
+        matched = earlier >= 0
+        np.minimum.at(joined, local[matched], earlier[matched])
+        representatives = np.where(joined[local] != none, joined[local], first_row + local)
+        own = representatives == first_row + np.arange(m)
+        self.duplicates += int(np.count_nonzero(~own))
+
+        new = np.flatnonzero(own & ~empty)
+        if len(new):
+            first_slot = len(self._representatives)
+            self._file.seek(0, os.SEEK_END)
+            self._file.write(np.ascontiguousarray(signatures[new]).tobytes())
+            self._representatives = np.concatenate([self._representatives, first_row + new])
+            keys = np.concatenate([self._keys] + [band[new] for band in band_keys])
+            slots = np.concatenate([self._slots, np.tile(first_slot + np.arange(len(new)), detector.bands)])
+            # Stable, so older representatives come first within a bucket
+            order = np.argsort(keys, kind='stable')
+            self._keys, self._slots = keys[order], slots[order]
+            self._signatures = None
+        return representatives
+
+    def close(self):
+        """Delete the signature file."""
+        self._signatures = None
+        self._file.close()
+        self._dir.cleanup()
+
+
+def cluster_duplicates(texts, **options):
+    """Cluster near-duplicate texts; see NearDuplicateDetector.cluster."""
+    return NearDuplicateDetector(**options).cluster(texts)
@@ -0,0 +1,296 @@
+"""
+Pipeline Instrumentation
+Per-stage timing, throughput, memory and counter metrics.
+
+CourseReviewAnalyzer, ReviewVisualizer and RedditScraper take a metrics=
+argument. The default, NULL_METRICS, does nothing, so uninstrumented runs
+only pay for a method call per stage. A Metrics recorder keeps every stage's
+wall time, rows, rows/s and memory, and can:
+- append one JSON line per stage to a log file
+- write totals as a Prometheus text file (for node_exporter's textfile collector)
+- run each top-level stage under cProfile and save the stats
+
+The command-line entry points switch metrics on from the environment
+(see metrics_from_env).
+"""
+
+import cProfile
+import json
+import os
+import re
+import sys
+import threading
+import time
+from collections import Counter, defaultdict
+from datetime import datetime, timezone
+
+# Environment variables read by metrics_from_env
+METRICS_LOG_ENV = 'SENTIMENT_METRICS_LOG'
+METRICS_PROM_ENV = 'SENTIMENT_METRICS_PROM'
+PROFILE_DIR_ENV = 'SENTIMENT_PROFILE_DIR'
+
+
+def peak_rss_mb():
+    """Peak resident set size of this process in MB (None where unsupported)."""
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+
+def current_rss_mb():
+    """Current resident set size of this process in MB (None where unsupported)."""
+    try:
+        with open('/proc/self/statm') as f:
+            pages = int(f.read().split()[1])
+        return pages * os.sysconf('SC_PAGE_SIZE') / (1024 * 1024)
+    except (OSError, ValueError, AttributeError):
+        return None
+
+
+class _NullStage:
+    """Stage context that records nothing."""
+
+    rows = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+
+_NULL_STAGE = _NullStage()
+
+
+class NullMetrics:
+    """Metrics recorder that discards everything (the default)."""
+
+    enabled = False
+
+    def stage(self, name, rows=None):
+        return _NULL_STAGE
+
+    def count(self, name, value=1):
+        pass
+
+    def export(self):
+        pass
+
+
+NULL_METRICS = NullMetrics()
+
+
+class _Stage:
+    """Context manager timing one stage for a Metrics recorder."""
+
+    def __init__(self, metrics, name, rows):
+        self.metrics = metrics
+        self.name = name
+        # May be set inside the block once the row count is known
+        self.rows = rows
+        self.profile = None
+
+    def __enter__(self):
+        local = self.metrics._local
+        depth = getattr(local, 'depth', 0)
+        local.depth = depth + 1
+        # cProfile cannot nest, so only outermost stages are profiled
+        if self.metrics.profile_dir and depth == 0:
+            self.profile = cProfile.Profile()
+            self.profile.enable()
+        self.rss_before = current_rss_mb()
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, traceback):
+        seconds = time.perf_counter() - self.start
+        if self.profile is not None:
+            self.profile.disable()
+        self.metrics._local.depth -= 1
+        rss = current_rss_mb()
+        self.metrics._record({
+            'stage': self.name,
+            'seconds': round(seconds, 6),
+            'rows': self.rows,
+            'rows_per_sec': round(self.rows / seconds, 2) if self.rows and seconds > 0 else None,
+            'rss_mb': round(rss, 1) if rss is not None else None,
+            'rss_delta_mb': round(rss - self.rss_before, 1) if rss is not None and self.rss_before is not None else None,
+            'peak_rss_mb': peak_rss_mb(),
+            'failed': exc_type is not None
+        }, self.profile)
+        return False
+
+
+class Metrics:
+    """Records stage timings and counters; safe to share between threads."""
+
+    enabled = True
+
+    def __init__(self, log_path=None, prometheus_path=None, profile_dir=None, prefix='sentiment'):
+        """
+        Initialize the recorder.
+
+        Args:
+            log_path: File each finished stage is appended to as a JSON line ('-' for stderr)
+            prometheus_path: Default file for export() to write Prometheus metrics to
+            profile_dir: Save cProfile stats of every top-level stage here (opt-in, slow)
+            prefix: Metric name prefix used by write_prometheus
+        """
+        self.log_path = log_path
+        self.prometheus_path = prometheus_path
+        self.profile_dir = profile_dir
+        self.prefix = prefix
+        self.stages = []
+        self.counters = Counter()
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._profiles = Counter()
+        if profile_dir:
+            os.makedirs(profile_dir, exist_ok=True)
+        if log_path and log_path != '-' and os.path.dirname(log_path):
+            os.makedirs(os.path.dirname(log_path), exist_ok=True)
+
+    def stage(self, name, rows=None):
+        """
+        Time a block of work.
+
+        Args:
+            name: Stage name, e.g. 'analyzer.vader'
+            rows: Rows processed (can also be set on the returned object inside the block)
+
+        Returns:
+            Context manager
+        """
+        return _Stage(self, name, rows)
+
+    def count(self, name, value=1):
+        """Add value to a counter (cache hits, API retries, ...)."""
+        with self._lock:
+            self.counters[name] += value
+
+    def _record(self, entry, profile):
+        entry['timestamp'] = datetime.now(timezone.utc).isoformat(timespec='milliseconds')
+        with self._lock:
+            self.stages.append(entry)
+            if profile is not None:
+                self._profiles[entry['stage']] += 1
+                filename = f"{entry['stage']}.{self._profiles[entry['stage']]}.prof"
+                profile.dump_stats(os.path.join(self.profile_dir, filename))
+            if self.log_path:
+                line = json.dumps(entry)
+                if self.log_path == '-':
+                    print(line, file=sys.stderr)
+                else:
+                    with open(self.log_path, 'a') as f:
+                        f.write(line + '\n')
+
+    def summary(self):
+        """
+        Totals per stage name.
+
+        Returns:
+            Dict with 'stages' (stage -> {calls, seconds, rows, rows_per_sec}),
+            'counters' and 'peak_rss_mb'
+        """
+        totals = defaultdict(lambda: {'calls': 0, 'seconds': 0.0, 'rows': 0})
+        with self._lock:
+            for entry in self.stages:
+                total = totals[entry['stage']]
+                total['calls'] += 1
+                total['seconds'] += entry['seconds']
+                total['rows'] += entry['rows'] or 0
+            counters = dict(self.counters)
+
+        stages = {}
+        for name, total in totals.items():
+            total['seconds'] = round(total['seconds'], 6)
+            total['rows_per_sec'] = round(total['rows'] / total['seconds'], 2) if total['rows'] and total['seconds'] else None
+            stages[name] = total
+        return {'stages': stages, 'counters': counters, 'peak_rss_mb': peak_rss_mb()}
+
+    def _metric_name(self, name):
+        return re.sub(r'[^a-zA-Z0-9_]', '_', f'{self.prefix}_{name}')
+
+    def write_prometheus(self, path):
+        """
+        Write the totals in the Prometheus text exposition format.
+
+        The file is replaced atomically, as node_exporter's textfile collector expects.
+
+        Args:
+            path: Output file (conventionally ending in .prom)
+        """
+        summary = self.summary()
+        stage_metrics = (
+            ('stage_seconds_total', 'counter', 'Wall time spent in each stage', 'seconds'),
+            ('stage_rows_total', 'counter', 'Rows processed by each stage', 'rows'),
+            ('stage_calls_total', 'counter', 'Times each stage ran', 'calls')
+        )
+        lines = []
+        for metric, kind, help_text, field in stage_metrics:
+            name = self._metric_name(metric)
+            lines.append(f'# HELP {name} {help_text}')
+            lines.append(f'# TYPE {name} {kind}')
+            for stage, total in sorted(summary['stages'].items()):
+                lines.append(f'{name}{{stage="{stage}"}} {total[field]}')
+
+        for counter, value in sorted(summary['counters'].items()):
+            name = self._metric_name(f'{counter}_total')
+            lines.append(f'# TYPE {name} counter')
+            lines.append(f'{name} {value}')
+
+        if summary['peak_rss_mb'] is not None:
+            name = self._metric_name('peak_rss_bytes')
+            lines.append(f'# HELP {name} Peak resident set size of the process')
+            lines.append(f'# TYPE {name} gauge')
+            lines.append(f"{name} {int(summary['peak_rss_mb'] * 1024 * 1024)}")
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = path + '.tmp'
+        with open(tmp_path, 'w') as f:
+            f.write('\n'.join(lines) + '\n')
+        os.replace(tmp_path, path)
+
+    def export(self):
+        """Write the Prometheus file, if one was configured."""
+        if self.prometheus_path:
+            self.write_prometheus(self.prometheus_path)
+
+    def print_summary(self):
+        """Print a per-stage timing table."""
+        summary = self.summary()
+        print("\n" + "=" * 60)
+        print("STAGE TIMINGS")
+        print("=" * 60)
+        for stage, total in summary['stages'].items():
+            rate = f"{total['rows_per_sec']:,.0f} rows/s" if total['rows_per_sec'] else ''
+            print(f"{stage:<32} {total['seconds']:9.3f}s  {rate}")
+        for counter, value in summary['counters'].items():
+            print(f"{counter:<32} {value}")
+        if summary['peak_rss_mb'] is not None:
+            print(f"{'peak RSS':<32} {summary['peak_rss_mb']:9.1f} MB")
+
+
+def metrics_from_env():
+    """
+    Build a recorder from the environment.
+
+    $SENTIMENT_METRICS_LOG (JSON lines file, '-' for stderr),
+    $SENTIMENT_METRICS_PROM (Prometheus text file) and $SENTIMENT_PROFILE_DIR
+    (cProfile output) each switch instrumentation on.
+
+    Returns:
+        Metrics, or NULL_METRICS when none of the variables is set
+    """
+    log_path = os.environ.get(METRICS_LOG_ENV)
+    prometheus_path = os.environ.get(METRICS_PROM_ENV)
+    profile_dir = os.environ.get(PROFILE_DIR_ENV)
+    if not (log_path or prometheus_path or profile_dir):
+        return NULL_METRICS
+    return Metrics(log_path=log_path, prometheus_path=prometheus_path, profile_dir=profile_dir)
@@ -0,0 +1,228 @@
+"""
+Linear Sentiment Model
+A trainable third sentiment backend next to VADER and TextBlob.
+
+Reviews are turned into sparse vectors with scikit-learn's stateless
+HashingVectorizer (word unigrams by default), so there is no vocabulary
+to fit or store. A linear classifier is trained with SGD partial_fit one
+CSV chunk at a time, using star ratings as weak labels (1-2 Negative,
+3 Neutral, 4-5 Positive), so training data never has to fit in memory.
+
+Prediction is one sparse matrix product per batch. The saved model is
+just the non-zero weights as float32 in a compressed .npz file, plus the
+SGD step count, so a loaded model can keep training on new reviews.
+"""
+
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+from batch_scorer import LABELS, rating_labels
+
+# Bump whenever features or the file format change
+MODEL_VERSION = 2
+
+# Versions load() still reads (version 1 did not store the SGD step count)
+READABLE_VERSIONS = (1, 2)
+
+# Classes in weight-matrix order
+CLASSES = LABELS
+
+
+class LinearSentimentModel:
+    """Hashed bag-of-words linear classifier trained out of core."""
+
+    def __init__(self, n_features=2 ** 20, ngram_range=(1, 1), alpha=1e-6, seed=0):
+        """
+        Initialize an untrained model.
+
+        Args:
+            n_features: Hashed feature dimensions
+            ngram_range: Word n-gram lengths hashed into features; (1, 2)
+                also catches negations like "not good" but halves the speed
+            alpha: L2 regularization strength of the SGD classifier
+            seed: Seed of the SGD shuffling
+        """
+        self.n_features = n_features
+        self.ngram_range = tuple(ngram_range)
+        self.alpha = alpha
+        self.seed = seed
+        self.weights = None
+        self.intercept = None
+        self.trained_rows = 0
+        # SGD step count of a loaded model, restored into its classifier on the next partial_fit
+        self.steps = None
+        self._vectorizer = None
+        self._classifier = None
+
+    @property
+    def vectorizer(self):
+        """HashingVectorizer, created on first use."""
+        if self._vectorizer is None:
+            from sklearn.feature_extraction.text import HashingVectorizer
+            self._vectorizer = HashingVectorizer(
+                n_features=self.n_features, ngram_range=self.ngram_range,
+                alternate_sign=False, norm='l2', dtype=np.float32
+            )
+        return self._vectorizer
+
+    def transform(self, texts):
+        """Sparse (len(texts), n_features) feature matrix of review texts."""
+        texts = pd.Series(texts, dtype=object).fillna('').astype(str)
+        return self.vectorizer.transform(texts)
+
+    def partial_fit(self, texts, ratings):
+        """
+        Train on one batch of reviews.
+
+        Args:
+            texts: Review texts
+            ratings: Their star ratings; reviews without a rating are skipped
+
+        Returns:
+            Number of reviews trained on
+        """
+        labels = rating_labels(ratings)
+        rated = labels >= 0
+        if not rated.any():
+            return 0
+        if self._classifier is None:
+            self._classifier = self._new_classifier()
+
+        features = self.transform(pd.Series(texts, dtype=object)[rated])
+        self._classifier.partial_fit(features, labels[rated], classes=np.arange(len(CLASSES)))
+        self.weights = None
+        self.trained_rows += int(rated.sum())
+        return int(rated.sum())
+
+    def _new_classifier(self):
+        """SGD classifier, continuing from the loaded weights if there are any."""
+        from sklearn.linear_model import SGDClassifier
+        classifier = SGDClassifier(loss='log_loss', alpha=self.alpha, random_state=self.seed)
+        if self.weights is not None:
+            # The attributes partial_fit keeps between calls
+            classifier.classes_ = np.arange(len(CLASSES))
+            classifier.coef_ = np.ascontiguousarray(self.weights.T)
+            classifier.intercept_ = self.intercept.copy()
+            classifier.n_features_in_ = self.n_features
+            classifier.t_ = float(self.steps if self.steps is not None else self.trained_rows + 1)
+        return classifier
+
+    def fit_csv(self, path, chunk_size=50000, epochs=1, text_column='review', rating_column='rating'):
+        """
+        Train on a review CSV, one chunk at a time.
+
+        Args:
+            path: CSV file with review text and rating columns
+            chunk_size: Rows read per partial_fit call
+            epochs: Passes over the file
+
+        Returns:
+            self
+        """
+        for _ in range(epochs):
+            for chunk in pd.read_csv(path, chunksize=chunk_size, usecols=[text_column, rating_column]):
+                self.partial_fit(chunk[text_column], chunk[rating_column])
+        return self
+
+    def _finalize(self):
+        """Copy the classifier's weights into a transposed float32 matrix for prediction."""
+        if self.weights is None:
+            if self._classifier is None:
+                raise ValueError("The linear sentiment model has not been trained")
+            self.weights = np.ascontiguousarray(self._classifier.coef_.T, dtype=np.float32)
+            self.intercept = self._classifier.intercept_.astype(np.float32)
+
+    def decision(self, texts):
+        """(len(texts), 3) class scores: one sparse matrix product."""
+        self._finalize()
+        return np.asarray(self.transform(texts) @ self.weights) + self.intercept
+
+    def predict(self, texts):
+        """
+        Score a batch of reviews.
+
+        Args:
+            texts: Review texts
+
+        Returns:
+            Dict of NumPy columns: sentiment_linear (labels) and
+            linear_polarity (P(Positive) - P(Negative), from -1 to 1)
+        """
+        scores = self.decision(texts)
+        if len(scores) == 0:
+            return {'sentiment_linear': CLASSES[:0], 'linear_polarity': np.zeros(0)}
+        # One-vs-rest probabilities, normalized like SGDClassifier.predict_proba
+        probabilities = 1 / (1 + np.exp(-scores))
+        probabilities /= probabilities.sum(axis=1, keepdims=True)
+        return {
+            'sentiment_linear': CLASSES[scores.argmax(axis=1)],
+            'linear_polarity': probabilities[:, 2] - probabilities[:, 0]
+        }
+
+    def evaluate(self, texts, ratings):
+        """Accuracy against the rating labels of the rated reviews."""
+        labels = rating_labels(ratings)
+        rated = labels >= 0
+        predicted = self.decision(pd.Series(texts, dtype=object)[rated]).argmax(axis=1)
+        return float(np.mean(predicted == labels[rated])) if rated.any() else float('nan')
+
+    def save(self, path):
+        """Save the non-zero weights to a compressed .npz file."""
+        self._finalize()
+        rows, columns = np.nonzero(self.weights)
+        if self._classifier is not None:
+            steps = self._classifier.t_
+        else:
+            steps = self.steps if self.steps is not None else self.trained_rows + 1
+        np.savez_compressed(
+            path,
+            version=MODEL_VERSION,
+            n_features=self.n_features,
+            ngram_range=np.array(self.ngram_range),
+            alpha=self.alpha,
+            trained_rows=self.trained_rows,
+            steps=steps,
+            rows=rows.astype(np.int32),
+            columns=columns.astype(np.int8),
+            values=self.weights[rows, columns],
+            intercept=self.intercept
+        )
+
+    @classmethod
+    def load(cls, path):
+        """Load a model saved with save(); it can predict and continue training with partial_fit."""
+        with np.load(path) as data:
+            if int(data['version']) not in READABLE_VERSIONS:
+                raise ValueError(f"Unsupported linear sentiment model version: {int(data['version'])}")
+            model = cls(n_features=int(data['n_features']), ngram_range=tuple(data['ngram_range']),
+                        alpha=float(data['alpha']))
+            model.trained_rows = int(data['trained_rows'])
+            # Version 1 files lack it; one step per row is exact for a single epoch
+            model.steps = float(data['steps']) if 'steps' in data.files else None
+            model.weights = np.zeros((model.n_features, len(CLASSES)), dtype=np.float32)
+            model.weights[data['rows'], data['columns']] = data['values']
+            model.intercept = data['intercept'].astype(np.float32)
+        return model
+
+
+def main():
+    """Train the linear sentiment model on a review CSV."""
+    parser = argparse.ArgumentParser(description=main.__doc__)
+    parser.add_argument('data', nargs='?', default='data/sample_reviews.csv', help='CSV with review and rating columns')
+    parser.add_argument('--model', default='results/linear_sentiment.npz', help='where to save the model')
+    parser.add_argument('--chunk-size', type=int, default=50000, help='rows per partial_fit call')
+    parser.add_argument('--epochs', type=int, default=1, help='passes over the CSV')
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    model = LinearSentimentModel().fit_csv(args.data, chunk_size=args.chunk_size, epochs=args.epochs)
+    print(f"Trained on {model.trained_rows} rated reviews in {time.perf_counter() - start:.1f}s")
+    model.save(args.model)
+    print(f"Saved model to {args.model}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,545 @@
+"""
+Analysis Pipeline
+Runs scrape -> clean -> score -> aggregate / visualize as a stage graph.
+
+Every stage declares its input and output files. Its fingerprint is a hash
+of its own configuration section, the contents of its inputs, the source of
+its run function (and the helpers here it calls) and the source of every
+local module that function imports. Editing one stage's function reruns
+only that stage and whatever its changed outputs feed. A stage whose
+fingerprint and outputs match the last successful run is skipped, so
+changing a chart setting only reruns the visualizer, and a rescored dataset
+that comes out identical does not redraw anything. Stages whose dependencies are done run concurrently
+(aggregate and visualize both only need the scored reviews), and the run
+ends with a per-stage timing summary.
+
+Usage (from the repository root):
+    python src/pipeline.py
+    python src/pipeline.py --set visualize.dpi=150
+    python src/pipeline.py --config pipeline.json --force score
+"""
+
+import argparse
+import ast
+import copy
+import hashlib
+import json
+import os
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+import pandas as pd
+
+SRC_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Fingerprints of the last successful run of every stage
+STATE_PATH = 'results/.pipeline_state.json'
+
+DEFAULT_CONFIG = {
+    'scrape': {
+        # Reddit credentials come from REDDIT_CLIENT_ID, REDDIT_CLIENT_SECRET and REDDIT_USER_AGENT
+        'enabled': False,
+        'courses': [],
+        'include_comments': True,
+        'output': 'data/reddit_reviews.csv',
+        'state': 'data/reddit_sync.sqlite'
+    },
+    'clean': {
+        # The scrape output is added when scraping is enabled
+        'inputs': ['data/sample_reviews.csv'],
+        'output': 'results/reviews_clean.csv',
+        'drop_duplicates': False
+    },
+    'score': {
+        'output': 'results/analyzed_reviews.csv',
+        'workers': 1,
+        'dedup': False,
+        'cascade': False
+    },
+    'aggregate': {
+        'summaries': 'results/course_summaries.json',
+        # Not results/trends.sqlite: that store tracks sentiment_analyzer.py's input
+        # file, and two sources sharing one store would rebuild it on every switch
+        'trends': 'results/pipeline_trends.sqlite'
+    },
+    'visualize': {
+        'output_dir': 'visualizations',
+        'dpi': 300,
+        'approximate': False,
+        'workers': 1
+    }
+}
+
+
+def _hash_path(path):
+    """Content hash of a file or directory tree (None if it does not exist)."""
+    if not os.path.exists(path):
+        return None
+    digest = hashlib.sha1()
+    if os.path.isdir(path):
+        for root, dirs, files in os.walk(path):
+            dirs.sort()
+            for name in sorted(files):
+                file_path = os.path.join(root, name)
+                digest.update(os.path.relpath(file_path, path).encode('utf-8'))
+                digest.update(_hash_path(file_path).encode('ascii'))
+        return digest.hexdigest()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _imported_modules(tree):
+    """Names of the modules in SRC_DIR imported anywhere in an AST node."""
+    names = set()
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Import):
+            names.update(alias.name.split('.')[0] for alias in node.names)
+        elif isinstance(node, ast.ImportFrom) and node.module and not node.level:
+            names.add(node.module.split('.')[0])
+    return {name for name in names if os.path.exists(os.path.join(SRC_DIR, f'{name}.py'))}
+
+
+def _local_imports(module):
+    """Names of the modules in SRC_DIR that a module imports directly."""
+    with open(os.path.join(SRC_DIR, f'{module}.py')) as f:
+        return _imported_modules(ast.parse(f.read()))
+
+
+def code_fingerprint(modules):
+    """Hash of the source of modules and every local module they import, transitively."""
+    seen = set()
+    todo = list(modules)
+    while todo:
+        module = todo.pop()
+        if module not in seen:
+            seen.add(module)
+            todo.extend(_local_imports(module) - seen)
+    digest = hashlib.sha1()
+    for module in sorted(seen):
+        digest.update(module.encode('utf-8'))
+        digest.update(_hash_path(os.path.join(SRC_DIR, f'{module}.py')).encode('ascii'))
+    return digest.hexdigest()
+
+
+def function_fingerprint(name, modules=()):
+    """
+    Hash of a function of this module and the code it depends on.
+
+    Covers the function's source, the source of the functions of this module
+    it calls (transitively) and code_fingerprint() of the local modules they
+    import plus modules, but nothing else in this file, so editing one
+    stage's function does not change the other stages' fingerprints.
+    """
+    with open(os.path.abspath(__file__)) as f:
+        source = f.read()
+    functions = {node.name: node for node in ast.parse(source).body if isinstance(node, ast.FunctionDef)}
+
+    seen = set()
+    todo = [name]
+    imports = set(modules)
+    while todo:
+        current = todo.pop()
+        if current in seen:
+            continue
+        seen.add(current)
+        node = functions[current]
+        imports |= _imported_modules(node)
+        todo.extend(
+            child.id for child in ast.walk(node)
+            if isinstance(child, ast.Name) and child.id in functions and child.id not in seen
+        )
+
+    digest = hashlib.sha1()
+    for current in sorted(seen):
+        digest.update(ast.get_source_segment(source, functions[current]).encode('utf-8'))
+    digest.update(code_fingerprint(imports).encode('ascii'))
+    return digest.hexdigest()
+
+
+def _run_scrape(config):
+    """Append new Reddit posts and comments to the scrape output."""
+    from scraper import RedditScraper
+    from sync_state import SyncState
+
+    settings = config['scrape']
+    scraper = RedditScraper(
+        client_id=os.environ.get('REDDIT_CLIENT_ID'),
+        client_secret=os.environ.get('REDDIT_CLIENT_SECRET'),
+        user_agent=os.environ.get('REDDIT_USER_AGENT', 'UIUC Course Analyzer 1.0')
+    )
+    state = SyncState(settings['state'])
+    try:
+        scraper.sync(settings['courses'], state, output_path=settings['output'],
+                     include_comments=settings['include_comments'])
+    finally:
+        state.close()
+
+
+def _run_clean(config):
+    """Merge the raw review files and drop reviews without text."""
+    settings = config['clean']
+    frames = [pd.read_csv(path) for path in _clean_inputs(config) if os.path.exists(path)]
+    if not frames:
+        raise FileNotFoundError(f"No review files found among {_clean_inputs(config)}")
+    df = pd.concat(frames, ignore_index=True)
+    total = len(df)
+    df = df[df['review'].notna() & df['review'].astype(str).str.strip().ne('')]
+    if settings['drop_duplicates']:
+        df = df.drop_duplicates(subset=['course_code', 'review'])
+    _make_parent(settings['output'])
+    df.to_csv(settings['output'], index=False)
+    print(f"Cleaned {len(df)} reviews ({total - len(df)} dropped) into {settings['output']}")
+
+
+def _run_score(config):
+    """Score the cleaned reviews."""
+    from sentiment_analyzer import CourseReviewAnalyzer
+
+    settings = config['score']
+    _make_parent(settings['output'])
+    analyzer = CourseReviewAnalyzer(data_path=config['clean']['output'])
+    analyzer.analyze_all(workers=settings['workers'], output_path=settings['output'],
+                         dedup=settings['dedup'], cascade=settings['cascade'])
+
+
+def _run_aggregate(config):
+    """Write course summaries and bring the semester trend store up to date."""
+    from aggregates import ReviewAggregates
+    from trends import TrendStore
+
+    settings = config['aggregate']
+    df = pd.read_csv(config['score']['output'])
+    aggregates = ReviewAggregates()
+    aggregates.update(df)
+    summaries = {
+        'overall': aggregates.overall_statistics(),
+        'courses': [aggregates.course_summary(code) for code in aggregates.course_codes()]
+    }
+    _make_parent(settings['summaries'])
+    with open(settings['summaries'], 'w') as f:
+        json.dump(summaries, f, indent=2, default=str)
+    print(f"Wrote {len(summaries['courses'])} course summaries to {settings['summaries']}")
+
+    trends = TrendStore(settings['trends'])
+    try:
+        # Merge only the reviews appended since the last run; rebuild if earlier ones changed
+        source = os.path.abspath(config['score']['output'])
+        trend_rows = trends.appended(source)
+        trend_rows.update(df)
+        if not trend_rows.finish():
+            trends.rebuild(df, source=source)
+        for alert in trends.detect_changes():
+            print(f"  {alert['message']}")
+    finally:
+        trends.close()
+
+
+def _run_visualize(config):
+    """Draw the charts of the scored reviews."""
+    from trends import TrendStore
+    from visualizer import ReviewVisualizer
+
+    settings = config['visualize']
+    data_path = config['score']['output']
+    # Built here from the scored reviews rather than read from aggregate's
+    # store, so the two stages do not wait for each other
+    trends = TrendStore(':memory:')
+    columns = {'course_code', 'course_name', 'semester', 'rating', 'sentiment_vader', 'vader_compound',
+               'is_duplicate'}
+    for chunk in pd.read_csv(data_path, chunksize=200000, usecols=lambda column: column in columns):
+        trends.update(chunk)
+
+    visualizer = ReviewVisualizer(data_path=data_path, output_dir=settings['output_dir'], trends=trends,
+                                  approximate=settings['approximate'])
+    visualizer.DPI = settings['dpi']
+    visualizer.generate_all(workers=settings['workers'])
+    trends.close()
+
+
+def _clean_inputs(config):
+    inputs = list(config['clean']['inputs'])
+    if _scrape_enabled(config) and config['scrape']['output'] not in inputs:
+        inputs.append(config['scrape']['output'])
+    return inputs
+
+
+def _scrape_enabled(config):
+    return bool(config['scrape']['enabled'] and config['scrape']['courses'])
+
+
+def _make_parent(path):
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+
+
+class Stage:
+    """One step of the pipeline."""
+
+    def __init__(self, name, run, inputs, outputs, deps=(), always=False, enabled=None, modules=()):
+        """
+        Declare a stage.
+
+        Args:
+            name: Stage name, also its configuration section
+            run: Function of this module taking the full configuration; its
+                source and the local modules it imports are fingerprinted
+            inputs: Function of the configuration returning the files read
+            outputs: Function of the configuration returning the files written
+            deps: Stages that must finish first
+            always: Run even when the fingerprint matches (inputs outside the
+                repository, like the Reddit API)
+            enabled: Function of the configuration deciding whether the stage runs at all
+            modules: Further local modules the stage depends on without importing them
+        """
+        self.name = name
+        self.run = run
+        self.modules = modules
+        self.inputs = inputs
+        self.outputs = outputs
+        self.deps = deps
+        self.always = always
+        self.enabled = enabled or (lambda config: True)
+
+    def fingerprint(self, config):
+        """Hash of the stage's configuration, code and current input contents."""
+        payload = json.dumps({
+            'stage': self.name,
+            'config': config[self.name],
+            'code': function_fingerprint(self.run.__name__, self.modules),
+            'inputs': {path: _hash_path(path) for path in self.inputs(config)}
+        }, sort_keys=True)
+        return hashlib.sha1(payload.encode('utf-8')).hexdigest()
+
+
+STAGES = [
+    Stage('scrape', _run_scrape,
+          inputs=lambda config: [], outputs=lambda config: [config['scrape']['output']],
+          always=True, enabled=_scrape_enabled),
+    Stage('clean', _run_clean,
+          inputs=_clean_inputs, outputs=lambda config: [config['clean']['output']],
+          deps=('scrape',)),
+    Stage('score', _run_score,
+          inputs=lambda config: [config['clean']['output']], outputs=lambda config: [config['score']['output']],
+          deps=('clean',)),
+    Stage('aggregate', _run_aggregate,
+          inputs=lambda config: [config['score']['output']],
+          outputs=lambda config: [config['aggregate']['summaries'], config['aggregate']['trends']],
+          deps=('score',)),
+    Stage('visualize', _run_visualize,
+          inputs=lambda config: [config['score']['output']],
+          outputs=lambda config: [config['visualize']['output_dir']],
+          deps=('score',))
+]
+
+
+def load_config(path=None, overrides=()):
+    """
+    Build the pipeline configuration.
+
+    Args:
+        path: JSON file whose sections update DEFAULT_CONFIG (optional)
+        overrides: 'section.key=value' strings; values are parsed as JSON
+            where possible (e.g. visualize.dpi=150, score.cascade=true)
+
+    Returns:
+        Configuration dict with one section per stage
+    """
+    config = copy.deepcopy(DEFAULT_CONFIG)
+    if path:
+        with open(path) as f:
+            for section, values in json.load(f).items():
+                if section not in config:
+                    raise ValueError(f"Unknown pipeline section: {section!r}")
+                config[section].update(values)
+    for override in overrides:
+        key, _, value = override.partition('=')
+        section, _, name = key.partition('.')
+        if section not in config or not name:
+            raise ValueError(f"Expected section.key=value, got {override!r}")
+        try:
+            config[section][name] = json.loads(value)
+        except ValueError:
+            config[section][name] = value
+    return config
+
+
+class PipelineRunner:
+    """Runs the stage graph, skipping stages whose fingerprints are unchanged."""
+
+    def __init__(self, config=None, stages=None, state_path=STATE_PATH, jobs=None):
+        """
+        Initialize the runner.
+
+        Args:
+            config: Configuration from load_config() (defaults to DEFAULT_CONFIG)
+            stages: Stage list in dependency order (defaults to STAGES)
+            state_path: JSON file holding the fingerprints of the last run
+            jobs: Stages run at once (None uses every core; 1 runs in this process)
+        """
+        self.config = config or load_config()
+        self.stages = {stage.name: stage for stage in (stages or STAGES)}
+        self.state_path = state_path
+        self.jobs = jobs or os.cpu_count() or 1
+
+    def _load_state(self):
+        if not os.path.exists(self.state_path):
+            return {}
+        try:
+            with open(self.state_path) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _save_state(self, state):
+        _make_parent(self.state_path)
+        tmp_path = self.state_path + '.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump(state, f, indent=2, sort_keys=True)
+        os.replace(tmp_path, self.state_path)
+
+    def _up_to_date(self, stage, fingerprint, state):
+        """Whether the last run had this fingerprint and its outputs are untouched since."""
+        previous = state.get(stage.name)
+        if stage.always or not previous or previous.get('fingerprint') != fingerprint:
+            return False
+        recorded = previous.get('outputs', {})
+        for path in stage.outputs(self.config):
+            current = _hash_path(path)
+            if current is None or recorded.get(path) != current:
+                return False
+        return True
+
+    def run(self, force=()):
+        """
+        Run every stage that is out of date.
+
+        Args:
+            force: Stage names to run even if up to date ('all' for every stage)
+
+        Returns:
+            Dict of stage name to {'status': 'ran' | 'skipped' | 'disabled' |
+            'failed' | 'blocked', 'seconds': wall time or None}
+        """
+        force = set(self.stages) if 'all' in force else set(force)
+        unknown = force - set(self.stages)
+        if unknown:
+            raise ValueError(f"Unknown stages: {sorted(unknown)}")
+
+        print("=" * 60)
+        print("Analysis Pipeline")
+        print("=" * 60)
+
+        state = self._load_state()
+        results = {}
+        fingerprints = {}
+        pending = list(self.stages)
+        running = {}
+        start = time.perf_counter()
+        executor = ProcessPoolExecutor(max_workers=self.jobs) if self.jobs > 1 else None
+        try:
+            while pending or running:
+                for name in list(pending):
+                    stage = self.stages[name]
+                    statuses = [results.get(dep, {}).get('status') for dep in stage.deps if dep in self.stages]
+                    if any(status in ('failed', 'blocked') for status in statuses):
+                        pending.remove(name)
+                        results[name] = {'status': 'blocked', 'seconds': None}
+                        continue
+                    if any(status is None for status in statuses):
+                        continue
+                    pending.remove(name)
+
+                    if not stage.enabled(self.config):
+                        results[name] = {'status': 'disabled', 'seconds': None}
+                        continue
+                    fingerprint = stage.fingerprint(self.config)
+                    if name not in force and self._up_to_date(stage, fingerprint, state):
+                        print(f"Unchanged: {name}")
+                        results[name] = {'status': 'skipped', 'seconds': 0.0}
+                        continue
+
+                    print(f"Running: {name}")
+                    fingerprints[name] = fingerprint
+                    if executor is None:
+                        self._finish(name, _timed_run(stage.run, self.config), state, fingerprints, results)
+                    else:
+                        running[executor.submit(_timed_run, stage.run, self.config)] = name
+
+                if running:
+                    done, _ = wait(running, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        name = running.pop(future)
+                        try:
+                            outcome = future.result()
+                        except Exception as error:
+                            outcome = (error, None)
+                        self._finish(name, outcome, state, fingerprints, results)
+        finally:
+            if executor is not None:
+                executor.shutdown()
+
+        self._print_summary(results, time.perf_counter() - start)
+        return results
+
+    def _finish(self, name, outcome, state, fingerprints, results):
+        """Record a finished stage's status, and its fingerprint if it succeeded."""
+        error, seconds = outcome
+        if error is not None:
+            print(f"Failed: {name} ({type(error).__name__}: {error})")
+            results[name] = {'status': 'failed', 'seconds': seconds}
+            state.pop(name, None)
+        else:
+            results[name] = {'status': 'ran', 'seconds': seconds}
+            state[name] = {
+                'fingerprint': fingerprints[name],
+                'outputs': {path: _hash_path(path) for path in self.stages[name].outputs(self.config)}
+            }
+        self._save_state(state)
+
+    def _print_summary(self, results, total):
+        print("\n" + "=" * 60)
+        print("PIPELINE SUMMARY")
+        print("=" * 60)
+        for name in self.stages:
+            result = results.get(name, {'status': 'blocked', 'seconds': None})
+            seconds = f"{result['seconds']:9.2f}s" if result['seconds'] is not None else ''
+            print(f"  {name:<12} {result['status']:<9} {seconds}")
+        print(f"  {'total':<12} {'':<9} {total:9.2f}s")
+
+
+def _timed_run(run, config):
+    """Run a stage function, returning (error or None, seconds) instead of raising."""
+    start = time.perf_counter()
+    try:
+        run(config)
+    except Exception as error:
+        return error, time.perf_counter() - start
+    return None, time.perf_counter() - start
+
+
+def main():
+    """Run the analysis pipeline from the command line."""
+    parser = argparse.ArgumentParser(description=main.__doc__)
+    parser.add_argument('--config', help='JSON file overriding DEFAULT_CONFIG sections')
+    parser.add_argument('--set', dest='overrides', action='append', default=[], metavar='SECTION.KEY=VALUE',
+                        help='override one setting, e.g. visualize.dpi=150 (repeatable)')
+    parser.add_argument('--force', nargs='*', metavar='STAGE',
+                        help="rerun these stages even if unchanged (no names or 'all' for every stage)")
+    parser.add_argument('--jobs', type=int, default=None, help='stages run at once (default: every core)')
+    args = parser.parse_args()
+
+    if args.force is None:
+        force = []
+    else:
+        force = args.force or ['all']
+    runner = PipelineRunner(load_config(args.config, args.overrides), jobs=args.jobs)
+    results = runner.run(force=force)
+    if any(result['status'] in ('failed', 'blocked') for result in results.values()):
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
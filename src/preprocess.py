@@ -0,0 +1,182 @@
+"""
+Fused Review Preprocessing
+Tokenizes each review once for cleaning, sentiment prefiltering and topics.
+
+Reviews are split on whitespace and every token is interned into a
+vocabulary shared across batches. Everything the pipeline needs to know
+about a token is computed once per distinct token:
+- its clean_text form (lowercase letters only)
+- whether VADER or TextBlob could score it (emoticons, which TextBlob
+  reassembles across tokens, are checked per review)
+- the topics it matches
+
+Per-review results then come from array reductions over token ids instead
+of re-lowercasing and re-tokenizing the text for every stage.
+"""
+
+import re
+from array import array
+from itertools import islice
+
+import numpy as np
+import pandas as pd
+
+from topic_matcher import tokenize
+
+NON_LETTERS = re.compile(r'[^a-zA-Z]')
+
+# Topic masks are held in uint64 arrays; larger topic sets use the matcher directly
+MAX_MASK_TOPICS = 64
+
+
+class PreprocessedBatch:
+    """Deduplicated reviews of one batch with their per-review token features."""
+
+    def __init__(self, codes, texts, cleaned, vader_candidates, textblob_candidates, topic_masks):
+        # Row -> index into the unique texts
+        self.codes = codes
+        self.texts = texts
+        self.cleaned = cleaned
+        self.vader_candidates = vader_candidates
+        self.textblob_candidates = textblob_candidates
+        # Python int topic bitmask per unique text (None without a topic matcher)
+        self.topic_masks = topic_masks
+
+    def __len__(self):
+        return len(self.codes)
+
+    def cleaned_column(self):
+        """Cleaned text of every row."""
+        return self.cleaned[self.codes]
+
+    def topics_column(self, topic_matcher):
+        """Topic list of every row."""
+        topics = [topic_matcher.topics_from_mask(mask) for mask in self.topic_masks]
+        return [topics[code] for code in self.codes]
+
+
+def _any_per_row(flags, ids, offsets):
+    """For each row, whether any of its tokens has its flag set."""
+    hits = np.zeros(len(ids) + 1, dtype=np.int64)
+    np.cumsum(flags[ids], out=hits[1:])
+    return hits[offsets[1:]] > hits[offsets[:-1]]
+
+
+def _or_per_row(values, ids, offsets):
+    """For each row, the bitwise OR of its tokens' values (0 for rows without tokens)."""
+    result = np.zeros(len(offsets) - 1, dtype=np.uint64)
+    if len(ids) == 0:
+        return result
+    starts = offsets[:-1]
+    nonempty = starts < offsets[1:]
+    result[nonempty] = np.bitwise_or.reduceat(values[ids], starts[nonempty])
+    return result
+
+
+class Preprocessor:
+    """Single-pass tokenizer and token feature cache for a BatchScorer and TopicMatcher."""
+
+    def __init__(self, scorer, topic_matcher=None, max_vocabulary=1000000):
+        """
+        Initialize the preprocessor.
+
+        Args:
+            scorer: BatchScorer whose lexicons decide which tokens can be scored
+            topic_matcher: TopicMatcher for topic masks (optional)
+            max_vocabulary: Distinct tokens kept before the vocabulary is reset
+        """
+        self.scorer = scorer
+        self.topic_matcher = topic_matcher
+        self.max_vocabulary = max_vocabulary
+        self.use_masks = topic_matcher is not None and len(topic_matcher.topics) <= MAX_MASK_TOPICS
+        self._reset()
+
+    def _reset(self):
+        self.vocabulary = {}
+        self._cleaned = []
+        self._vader = np.zeros(0, dtype=bool)
+        self._textblob = np.zeros(0, dtype=bool)
+        self._masks = np.zeros(0, dtype=np.uint64)
+        self._phrases = np.zeros(0, dtype=bool)
+
+    def _add_tokens(self, tokens):
+        """Compute the features of newly interned tokens."""
+        token_has_sentiment = self.scorer.lexicon.token_has_sentiment
+        token_has_polarity = self.scorer.pattern_lexicon.token_has_polarity
+        self._cleaned.extend(NON_LETTERS.sub('', token.lower()) for token in tokens)
+        self._vader = np.concatenate([self._vader, [token_has_sentiment(token) for token in tokens]]).astype(bool)
+        self._textblob = np.concatenate([self._textblob, [token_has_polarity(token) for token in tokens]]).astype(bool)
+
+        if self.use_masks:
+            unigrams = self.topic_matcher.unigrams
+            phrases = self.topic_matcher.phrases
+            masks = np.zeros(len(tokens), dtype=np.uint64)
+            starts = np.zeros(len(tokens), dtype=bool)
+            for i, token in enumerate(tokens):
+                mask = 0
+                for word in tokenize(token):
+                    mask |= unigrams.get(word, 0)
+                    if word in phrases:
+                        starts[i] = True
+                masks[i] = mask
+            self._masks = np.concatenate([self._masks, masks])
+            self._phrases = np.concatenate([self._phrases, starts])
+
+    def process(self, texts):
+        """
+        Deduplicate and tokenize a batch of reviews.
+
+        Args:
+            texts: Iterable of review texts (missing values become '')
+
+        Returns:
+            PreprocessedBatch
+        """
+        texts = pd.Series(texts, dtype=object).fillna('').astype(str)
+        codes, uniques = pd.factorize(texts, sort=False)
+        uniques = np.asarray(uniques, dtype=object)
+
+        if len(self.vocabulary) > self.max_vocabulary:
+            self._reset()
+        vocabulary = self.vocabulary
+        intern = vocabulary.setdefault
+        known = len(vocabulary)
+
+        ids = array('q')
+        offsets = np.zeros(len(uniques) + 1, dtype=np.int64)
+        for i, text in enumerate(uniques):
+            ids.extend([intern(token, len(vocabulary)) for token in text.split()])
+            offsets[i + 1] = len(ids)
+        if len(vocabulary) > known:
+            self._add_tokens(list(islice(vocabulary, known, None)))
+        ids = np.frombuffer(ids, dtype=np.int64) if len(ids) else np.zeros(0, dtype=np.int64)
+
+        forms = self._cleaned
+        token_lists = ids.tolist()
+        cleaned = np.empty(len(uniques), dtype=object)
+        for i in range(len(uniques)):
+            cleaned[i] = ' '.join([form for form in map(forms.__getitem__, token_lists[offsets[i]:offsets[i + 1]]) if form])
+
+        topic_masks = None
+        if self.use_masks:
+            topic_masks = [int(mask) for mask in _or_per_row(self._masks, ids, offsets)]
+            # Phrases can span tokens, so reviews that may contain one are matched in full
+            match_mask = self.topic_matcher.match_mask
+            for i in np.flatnonzero(_any_per_row(self._phrases, ids, offsets)):
+                topic_masks[i] = match_mask(uniques[i])
+        elif self.topic_matcher is not None:
+            topic_masks = self.topic_matcher.match_masks(uniques)
+
+        textblob_candidates = _any_per_row(self._textblob, ids, offsets)
+        may_contain_emoticon = self.scorer.pattern_lexicon.may_contain_emoticon
+        for i in np.flatnonzero(~textblob_candidates):
+            textblob_candidates[i] = may_contain_emoticon(uniques[i])
+
+        return PreprocessedBatch(
+            codes=codes,
+            texts=uniques,
+            cleaned=cleaned,
+            vader_candidates=_any_per_row(self._vader, ids, offsets),
+            textblob_candidates=textblob_candidates,
+            topic_masks=topic_masks
+        )
@@ -0,0 +1,115 @@
+"""
+NLTK Resource Management
+Lazy loading of NLTK data and the VADER lexicon.
+
+Nothing here touches NLTK or the network at import time. Resources are
+checked the first time VADER is needed, and prepare_resources() fetches
+everything up front for offline batch workers. It can also write a prebuilt
+lexicon cache, which lets workers build VADER without parsing the NLTK
+lexicon file.
+"""
+
+import argparse
+import json
+import os
+
+# NLTK data used by the project, by download name
+NLTK_RESOURCES = {
+    'vader_lexicon': 'sentiment/vader_lexicon.zip',
+    'punkt': 'tokenizers/punkt',
+    'stopwords': 'corpora/stopwords'
+}
+
+# Environment variable pointing at a prebuilt lexicon cache
+LEXICON_CACHE_ENV = 'SENTIMENT_LEXICON_CACHE'
+
+
+def ensure_resource(name, download=True):
+    """
+    Make sure an NLTK resource is installed.
+
+    Args:
+        name: Key of NLTK_RESOURCES
+        download: Download the resource if it is missing
+
+    Raises:
+        LookupError: If the resource is missing (or failed to download)
+    """
+    import nltk
+
+    try:
+        nltk.data.find(NLTK_RESOURCES[name])
+    except LookupError:
+        if not download or not nltk.download(name, quiet=True):
+            raise
+
+
+def load_vader(lexicon_cache=None):
+    """
+    Build a VADER SentimentIntensityAnalyzer.
+
+    Args:
+        lexicon_cache: Prebuilt lexicon from prepare_resources() (defaults to
+            $SENTIMENT_LEXICON_CACHE); falls back to the NLTK lexicon file
+
+    Returns:
+        SentimentIntensityAnalyzer
+    """
+    from nltk.sentiment.vader import SentimentIntensityAnalyzer, VaderConstants
+
+    lexicon_cache = lexicon_cache or os.environ.get(LEXICON_CACHE_ENV)
+    if lexicon_cache and os.path.exists(lexicon_cache):
+        with open(lexicon_cache, encoding='utf-8') as f:
+            lexicon = json.load(f)
+        # Same state SentimentIntensityAnalyzer.__init__ sets up, minus parsing the lexicon file
+        vader = SentimentIntensityAnalyzer.__new__(SentimentIntensityAnalyzer)
+        vader.lexicon_file = None
+        vader.lexicon = lexicon
+        vader.constants = VaderConstants()
+        return vader
+
+    ensure_resource('vader_lexicon')
+    return SentimentIntensityAnalyzer()
+
+
+def prepare_resources(download=True, lexicon_cache=None):
+    """
+    Fetch every NLTK resource ahead of time.
+
+    Args:
+        download: Download missing resources (False only verifies them)
+        lexicon_cache: Also write the parsed VADER lexicon to this JSON file
+    """
+    for name in NLTK_RESOURCES:
+        ensure_resource(name, download=download)
+
+    if lexicon_cache:
+        from nltk.sentiment.vader import SentimentIntensityAnalyzer
+
+        # Parse the NLTK file itself: $SENTIMENT_LEXICON_CACHE may name the file being rewritten
+        ensure_resource('vader_lexicon', download=download)
+        lexicon = SentimentIntensityAnalyzer().lexicon
+        directory = os.path.dirname(lexicon_cache)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        # Write then rename, so readers never see a partial cache
+        tmp_path = lexicon_cache + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(lexicon, f)
+        os.replace(tmp_path, lexicon_cache)
+        print(f"Saved VADER lexicon cache to {lexicon_cache}")
+
+
+def main():
+    """Download NLTK resources (run once before going offline)."""
+    parser = argparse.ArgumentParser(description=main.__doc__)
+    parser.add_argument('--lexicon-cache', help='write a prebuilt VADER lexicon to this JSON file')
+    parser.add_argument('--offline', action='store_true', help='only verify resources, never download')
+    args = parser.parse_args()
+
+    prepare_resources(download=not args.offline, lexicon_cache=args.lexicon_cache)
+    print("All NLTK resources are available.")
+
+
+if __name__ == "__main__":
+    main()
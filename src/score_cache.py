@@ -0,0 +1,172 @@
+"""
+Score Cache
+Persistent, content-addressed cache of review scores backed by SQLite.
+
+Entries are keyed by a hash of the review text and hold the VADER compound
+score, TextBlob polarity (NULL where cascade scoring skipped TextBlob),
+topics and per-topic aspect scores. The whole cache is tied to a version string describing the scorer,
+lexicon and topic keywords; when it changes, every entry is dropped. The
+cache is capped at max_entries and evicts the least recently used entries
+first.
+"""
+
+import hashlib
+import json
+import os
+import sqlite3
+
+# SQLite limits the number of bound parameters per statement
+_BATCH = 500
+
+
+def text_key(text):
+    """Return the cache key of a review text."""
+    return hashlib.blake2b(text.encode('utf-8'), digest_size=16).digest()
+
+
+class ScoreCache:
+    """LRU-bounded SQLite cache of (compound, polarity, topics, aspects) per review text."""
+
+    def __init__(self, path='results/score_cache.sqlite', max_entries=5000000):
+        """
+        Open (or create) the cache.
+
+        Args:
+            path: SQLite database file
+            max_entries: Maximum number of cached reviews before LRU eviction
+        """
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self.path = path
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+
+        self.conn = sqlite3.connect(path)
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.execute('PRAGMA synchronous=NORMAL')
+        self.conn.execute('CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)')
+        self.conn.execute(
+            'CREATE TABLE IF NOT EXISTS scores ('
+            'key BLOB PRIMARY KEY, vader_compound REAL, textblob_polarity REAL, '
+            'topics TEXT, last_used INTEGER, aspects TEXT)'
+        )
+        # Caches created before aspect scores lack the column
+        columns = {row[1] for row in self.conn.execute('PRAGMA table_info(scores)')}
+        if 'aspects' not in columns:
+            self.conn.execute('ALTER TABLE scores ADD COLUMN aspects TEXT')
+        self.conn.execute('CREATE INDEX IF NOT EXISTS scores_last_used ON scores (last_used)')
+        self.conn.commit()
+
+        self.version = self._get_meta('version')
+        self._clock = self.conn.execute('SELECT COALESCE(MAX(last_used), 0) FROM scores').fetchone()[0]
+        self._entries = self.conn.execute('SELECT COUNT(*) FROM scores').fetchone()[0]
+
+    def _get_meta(self, key):
+        row = self.conn.execute('SELECT value FROM meta WHERE key = ?', (key,)).fetchone()
+        return row[0] if row else None
+
+    def __len__(self):
+        return self._entries
+
+    def set_version(self, version):
+        """Bind the cache to a scorer version, clearing it if the version changed."""
+        if version == self.version:
+            return
+        with self.conn:
+            self.conn.execute('DELETE FROM scores')
+            self.conn.execute('INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)', ('version', version))
+        self.version = version
+        self._entries = 0
+
+    def get_many(self, keys):
+        """
+        Look up many keys at once.
+
+        Args:
+            keys: Iterable of keys from text_key()
+
+        Returns:
+            Dict of key to (vader_compound, textblob_polarity, topics, aspects) for
+            the hits, where aspects maps topic to aspect score
+        """
+        keys = list(keys)
+        found = {}
+        for start in range(0, len(keys), _BATCH):
+            batch = keys[start:start + _BATCH]
+            placeholders = ','.join('?' * len(batch))
+            rows = self.conn.execute(
+                f'SELECT key, vader_compound, textblob_polarity, topics, aspects FROM scores '
+                f'WHERE key IN ({placeholders})',
+                batch
+            )
+            for key, compound, polarity, topics, aspects in rows:
+                found[key] = (compound, polarity, json.loads(topics), json.loads(aspects) if aspects else {})
+
+        self.hits += len(found)
+        self.misses += len(keys) - len(found)
+
+        if found:
+            self._clock += 1
+            with self.conn:
+                self.conn.executemany(
+                    'UPDATE scores SET last_used = ? WHERE key = ?',
+                    ((self._clock, key) for key in found)
+                )
+        return found
+
+    def put_many(self, entries):
+        """
+        Store scores, evicting least recently used entries past max_entries.
+
+        Args:
+            entries: Iterable of (key, vader_compound, textblob_polarity, topics, aspects)
+        """
+        self._clock += 1
+        rows = [
+            (key, float(compound), float(polarity), json.dumps(list(topics)), json.dumps(dict(aspects)), self._clock)
+            for key, compound, polarity, topics, aspects in entries
+        ]
+        if not rows:
+            return
+
+        with self.conn:
+            # Keep the entry count current from the keys already stored (primary key
+            # lookups) rather than counting the whole table after every write
+            keys = list(dict.fromkeys(row[0] for row in rows))
+            existing = 0
+            for start in range(0, len(keys), _BATCH):
+                batch = keys[start:start + _BATCH]
+                placeholders = ','.join('?' * len(batch))
+                existing += self.conn.execute(
+                    f'SELECT COUNT(*) FROM scores WHERE key IN ({placeholders})', batch
+                ).fetchone()[0]
+            self.conn.executemany(
+                'INSERT OR REPLACE INTO scores (key, vader_compound, textblob_polarity, topics, aspects, last_used) '
+                'VALUES (?, ?, ?, ?, ?, ?)',
+                rows
+            )
+            self._entries += len(keys) - existing
+            excess = self._entries - self.max_entries
+            if excess > 0:
+                self.conn.execute(
+                    'DELETE FROM scores WHERE key IN (SELECT key FROM scores ORDER BY last_used LIMIT ?)',
+                    (excess,)
+                )
+                self._entries -= excess
+
+    def stats(self):
+        """Return hit/miss counters and the current number of entries."""
+        lookups = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / lookups if lookups else 0.0,
+            'entries': self._entries
+        }
+
+    def close(self):
+        """Close the database connection."""
+        self.conn.close()
@@ -9,15 +9,80 @@ Requires Reddit API credentials:
 """
 
 import praw
+import prawcore
 import pandas as pd
+import itertools
+import json
+import os
+import queue
 import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime
 
+from instrumentation import NULL_METRICS
+
+# Reddit returns at most this many items per listing request
+PAGE_SIZE = 100
+
+# Columns of rows written by RedditScraper.sync
+SYNC_COLUMNS = [
+    'course_code', 'course_name', 'review', 'rating', 'semester', 'source', 'score', 'reddit_id', 'created_utc'
+]
+
+
+class RateLimiter:
+    """Token bucket shared by all scraper threads, with a global pause for throttling."""
+
+    def __init__(self, requests_per_minute=60, burst=5):
+        """
+        Initialize the limiter.
+
+        Args:
+            requests_per_minute: Sustained request budget across all threads
+            burst: Requests that may be made back to back before waiting
+        """
+        self.rate = requests_per_minute / 60.0
+        self.capacity = float(burst)
+        self.tokens = float(burst)
+        self.updated = time.monotonic()
+        self.paused_until = 0.0
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        """Block until a request may be made."""
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if now >= self.paused_until and self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = max(self.paused_until - now, (1 - self.tokens) / self.rate)
+            time.sleep(wait)
+
+    def pause(self, seconds):
+        """Stop every thread from making requests for the given number of seconds."""
+        with self.lock:
+            self.paused_until = max(self.paused_until, time.monotonic() + seconds)
+            self.tokens = 0.0
+
+
+def _is_throttled(error):
+    """Whether an API error means Reddit is rate limiting us."""
+    if isinstance(error, prawcore.exceptions.TooManyRequests):
+        return True
+    response = getattr(error, 'response', None)
+    return getattr(response, 'status_code', None) == 429
+
 
 class RedditScraper:
     """Scrapes course-related posts from r/UIUC subreddit."""
 
-    def __init__(self, client_id, client_secret, user_agent):
+    def __init__(self, client_id=None, client_secret=None, user_agent=None, reddit=None,
+                 subreddit='UIUC', metrics=None):
         """
         Initialize Reddit API connection.
 
@@ -25,13 +90,38 @@ class RedditScraper:
             client_id: Reddit API client ID
             client_secret: Reddit API client secret
             user_agent: Custom user agent string
+            reddit: Ready-made client exposing subreddit(name) (e.g. a fake for
+                tests); used instead of creating praw.Reddit from credentials
+            subreddit: Subreddit to search
+            metrics: instrumentation.Metrics recording per-course timings and API calls (optional)
+        """
+        self.metrics = metrics or NULL_METRICS
+        self.credentials = {
+            'client_id': client_id,
+            'client_secret': client_secret,
+            'user_agent': user_agent
+        }
+        self.subreddit_name = subreddit
+        self._injected = reddit is not None
+        self._local = threading.local()
+
+        self.reddit = reddit if reddit is not None else praw.Reddit(**self.credentials)
+        self.subreddit = self.reddit.subreddit(subreddit)
+
+    def _thread_subreddit(self):
         """
-        self.reddit = praw.Reddit(
-            client_id=client_id,
-            client_secret=client_secret,
-            user_agent=user_agent
-        )
-        self.subreddit = self.reddit.subreddit('UIUC')
+        Subreddit handle for the calling thread.
+
+        PRAW clients are not thread-safe, so each worker thread gets its own
+        praw.Reddit; an injected client is shared as-is.
+        """
+        if self._injected or threading.current_thread() is threading.main_thread():
+            return self.subreddit
+        subreddit = getattr(self._local, 'subreddit', None)
+        if subreddit is None:
+            subreddit = praw.Reddit(**self.credentials).subreddit(self.subreddit_name)
+            self._local.subreddit = subreddit
+        return subreddit
 
     def search_course_posts(self, course_code, limit=100):
         """
@@ -49,6 +139,7 @@ class RedditScraper:
 
         for post in self.subreddit.search(search_query, limit=limit):
             posts.append({
+                'id': post.id,
                 'title': post.title,
                 'text': post.selftext,
                 'score': post.score,
@@ -77,6 +168,7 @@ class RedditScraper:
             for comment in post.comments.list():
                 if hasattr(comment, 'body'):
                     comments.append({
+                        'id': comment.id,
                         'course_code': course_code,
                         'text': comment.body,
                         'score': comment.score,
@@ -116,9 +208,379 @@ class RedditScraper:
         df = pd.DataFrame(all_data)
         return df
 
-    def save_to_csv(self, df, output_path='data/reddit_reviews.csv'):
-        """Save scraped data to CSV file."""
+    def _call(self, limiter, func, max_retries=5, backoff=2.0):
+        """
+        Run one API call under the shared rate limit, backing off when throttled.
+
+        Args:
+            limiter: RateLimiter shared by all workers
+            func: Zero-argument function making the API call
+            max_retries: Attempts before a throttling error is re-raised
+            backoff: Initial pause in seconds, doubled after every throttled attempt
+        """
+        delay = backoff
+        for attempt in range(max_retries + 1):
+            limiter.acquire()
+            self.metrics.count('reddit_api_calls')
+            try:
+                return func()
+            except Exception as error:
+                if attempt == max_retries or not (
+                    _is_throttled(error) or isinstance(error, prawcore.exceptions.ServerError)
+                ):
+                    raise
+                self.metrics.count('reddit_api_retries')
+                wait = delay
+                retry_after = getattr(error, 'retry_after', None)
+                if retry_after:
+                    try:
+                        wait = max(wait, float(retry_after))
+                    except (TypeError, ValueError):
+                        pass
+                print(f"Throttled by Reddit, backing off {wait:.0f}s...")
+                limiter.pause(wait)
+                delay *= 2
+
+    def _iter_search(self, limiter, subreddit, query, limit, **kwargs):
+        """
+        Yield search results one listing page (one API request) at a time.
+
+        Every page takes its own rate limit token, and a throttled page is
+        retried on its own instead of refetching the pages before it.
+
+        Args:
+            limiter: RateLimiter shared by all workers
+            subreddit: Subreddit handle to search
+            query: Search query
+            limit: Maximum number of results (None for as many as Reddit returns)
+            **kwargs: Further subreddit.search arguments (e.g. sort='new')
+        """
+        after = None
+        remaining = limit
+        while remaining is None or remaining > 0:
+            size = PAGE_SIZE if remaining is None else min(PAGE_SIZE, remaining)
+            params = {'after': after} if after else {}
+            page = self._call(
+                limiter,
+                lambda size=size, params=params: list(subreddit.search(query, limit=size, params=params, **kwargs))
+            )
+            yield from page
+            if len(page) < size:
+                return
+            if remaining is not None:
+                remaining -= len(page)
+            after = page[-1].fullname
+
+    def _iter_course_rows(self, code, limit, include_comments, limiter):
+        """Yield review rows (posts, optionally comments) for one course as they are fetched."""
+        subreddit = self._thread_subreddit()
+
+        for post in self._iter_search(limiter, subreddit, code, limit):
+            yield {
+                'course_code': code,
+                'course_name': code,  # Will need manual mapping
+                'review': f"{post.title} {post.selftext}",
+                'rating': None,  # Reddit doesn't have ratings
+                'semester': None,
+                'source': 'reddit',
+                'score': post.score
+            }
+            if include_comments:
+                def fetch_comments(post=post):
+                    post.comments.replace_more(limit=0)
+                    return post.comments.list()
+
+                for comment in self._call(limiter, fetch_comments):
+                    if hasattr(comment, 'body'):
+                        yield {
+                            'course_code': code,
+                            'course_name': code,
+                            'review': comment.body,
+                            'rating': None,
+                            'semester': None,
+                            'source': 'reddit_comment',
+                            'score': comment.score
+                        }
+
+    def _scrape_course(self, code, limit, include_comments, limiter):
+        """Fetch review rows (posts, optionally comments) for one course."""
+        return list(self._iter_course_rows(code, limit, include_comments, limiter))
+
+    def _timed_scrape_course(self, code, limit, include_comments, limiter):
+        with self.metrics.stage('scraper.course') as stage:
+            rows = self._scrape_course(code, limit, include_comments, limiter)
+            stage.rows = len(rows)
+        return rows
+
+    def scrape_courses_concurrently(self, course_codes, limit_per_course=50, workers=8,
+                                    requests_per_minute=60, include_comments=False,
+                                    checkpoint_dir=None):
+        """
+        Scrape many courses in parallel under one shared rate limit.
+
+        Each finished course is written to checkpoint_dir, and courses already
+        checkpointed are loaded instead of scraped, so an interrupted run
+        resumes where it stopped.
+
+        Args:
+            course_codes: List of course codes
+            limit_per_course: Max posts per course
+            workers: Number of scraping threads
+            requests_per_minute: API budget shared by all threads
+            include_comments: Also collect the comments of every post
+            checkpoint_dir: Directory for per-course checkpoints (optional)
+
+        Returns:
+            DataFrame with all scraped data, in course_codes order
+        """
+        if checkpoint_dir:
+            os.makedirs(checkpoint_dir, exist_ok=True)
+
+        def checkpoint_path(code):
+            return os.path.join(checkpoint_dir, f"{re.sub(r'[^A-Za-z0-9_-]', '_', code)}.json")
+
+        results = {}
+        pending = []
+        for code in dict.fromkeys(course_codes):
+            if checkpoint_dir and os.path.exists(checkpoint_path(code)):
+                with open(checkpoint_path(code)) as f:
+                    results[code] = json.load(f)
+                print(f"Resumed {code} from checkpoint ({len(results[code])} rows)")
+            else:
+                pending.append(code)
+
+        limiter = RateLimiter(requests_per_minute)
+        with ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+            futures = {
+                executor.submit(self._timed_scrape_course, code, limit_per_course, include_comments, limiter): code
+                for code in pending
+            }
+            for future in as_completed(futures):
+                code = futures[future]
+                rows = future.result()
+                results[code] = rows
+                if checkpoint_dir:
+                    # Write then rename, so a crash never leaves a partial checkpoint
+                    tmp_path = checkpoint_path(code) + '.tmp'
+                    with open(tmp_path, 'w') as f:
+                        json.dump(rows, f)
+                    os.replace(tmp_path, checkpoint_path(code))
+                print(f"Scraped {len(rows)} rows for {code}")
+
+        all_data = [row for code in dict.fromkeys(course_codes) for row in results[code]]
+        return pd.DataFrame(all_data)
+
+    def iter_reviews(self, course_codes, limit_per_course=50, workers=1, requests_per_minute=60,
+                     include_comments=False, buffer_size=1000):
+        """
+        Yield review rows as they are scraped, without collecting a DataFrame.
+
+        Rows of one course arrive in order, but with several workers courses
+        are interleaved. At most buffer_size rows wait for the consumer, so a
+        slow consumer (such as CourseReviewAnalyzer.analyze_records) holds
+        scraping back instead of letting rows pile up in memory.
+
+        Args:
+            course_codes: Iterable of course codes
+            limit_per_course: Max posts per course
+            workers: Number of scraping threads (1 scrapes in the calling thread)
+            requests_per_minute: API budget shared by all threads
+            include_comments: Also yield the comments of every post
+            buffer_size: Rows scraped ahead of the consumer when workers > 1
+
+        Yields:
+            Dicts with the columns of scrape_multiple_courses
+        """
+        limiter = RateLimiter(requests_per_minute)
+        codes = list(dict.fromkeys(course_codes))
+        if workers <= 1:
+            for code in codes:
+                with self.metrics.stage('scraper.course') as stage:
+                    stage.rows = 0
+                    for row in self._iter_course_rows(code, limit_per_course, include_comments, limiter):
+                        stage.rows += 1
+                        yield row
+            return
+
+        todo = queue.Queue()
+        for code in codes:
+            todo.put(code)
+        rows = queue.Queue(maxsize=buffer_size)
+        stop = threading.Event()
+        done = object()
+
+        def put(item):
+            # Time out now and then so an abandoned generator lets workers exit
+            while not stop.is_set():
+                try:
+                    rows.put(item, timeout=0.1)
+                    return True
+                except queue.Full:
+                    pass
+            return False
+
+        def work():
+            try:
+                while not stop.is_set():
+                    try:
+                        code = todo.get_nowait()
+                    except queue.Empty:
+                        break
+                    with self.metrics.stage('scraper.course') as stage:
+                        stage.rows = 0
+                        for row in self._iter_course_rows(code, limit_per_course, include_comments, limiter):
+                            if not put(row):
+                                return
+                            stage.rows += 1
+            except Exception as error:
+                put(error)
+            finally:
+                put(done)
+
+        threads = [threading.Thread(target=work, daemon=True) for _ in range(min(workers, len(codes)))]
+        for thread in threads:
+            thread.start()
+        try:
+            running = len(threads)
+            while running:
+                item = rows.get()
+                if item is done:
+                    running -= 1
+                elif isinstance(item, Exception):
+                    raise item
+                else:
+                    yield item
+        finally:
+            stop.set()
+            for thread in threads:
+                thread.join()
+
+    def _sync_course(self, code, state, limit, include_comments, lookback, limiter):
+        """
+        Fetch one course's posts (and comments) that state has not saved yet.
+
+        Returns:
+            (rows, items, newest): new review rows, their (id, kind,
+            created_utc) for the state, and the newest post's created_utc
+        """
+        subreddit = self._thread_subreddit()
+        watermark = state.watermark(code)
+        cutoff = None if watermark is None else watermark - lookback
+
+        if cutoff is None:
+            listing = self._iter_search(limiter, subreddit, code, limit, sort='new')
+        else:
+            # Page down to the cutoff however many posts that takes: stopping at limit
+            # would move the watermark past posts that were never fetched. Newest first,
+            # so later pages are never requested once posts get older than the cutoff.
+            listing = self._iter_search(limiter, subreddit, code, None, sort='new')
+            listing = itertools.takewhile(lambda post: post.created_utc >= cutoff, listing)
+        posts = list(listing)
+        fresh = state.unseen(code, [post.id for post in posts])
+        rows = []
+        items = []
+        for post in posts:
+            if post.id in fresh:
+                fresh.discard(post.id)
+                rows.append({
+                    'course_code': code,
+                    'course_name': code,  # Will need manual mapping
+                    'review': f"{post.title} {post.selftext}",
+                    'rating': None,
+                    'semester': None,
+                    'source': 'reddit',
+                    'score': post.score,
+                    'reddit_id': post.id,
+                    'created_utc': datetime.fromtimestamp(post.created_utc)
+                })
+                items.append((post.id, 'post', post.created_utc))
+            if not include_comments:
+                continue
+
+            def fetch_comments(post=post):
+                post.comments.replace_more(limit=0)
+                return [comment for comment in post.comments.list() if hasattr(comment, 'body')]
+
+            # Posts inside the lookback window are revisited for comments added since the last sync
+            comments = self._call(limiter, fetch_comments)
+            fresh_comments = state.unseen(code, [comment.id for comment in comments])
+            for comment in comments:
+                if comment.id in fresh_comments:
+                    fresh_comments.discard(comment.id)
+                    rows.append({
+                        'course_code': code,
+                        'course_name': code,
+                        'review': comment.body,
+                        'rating': None,
+                        'semester': None,
+                        'source': 'reddit_comment',
+                        'score': comment.score,
+                        'reddit_id': comment.id,
+                        'created_utc': datetime.fromtimestamp(comment.created_utc)
+                    })
+                    items.append((comment.id, 'comment', comment.created_utc))
+
+        newest = max((post.created_utc for post in posts), default=None)
+        return rows, items, newest
+
+    def sync(self, course_codes, state, output_path='data/reddit_reviews.csv', limit_per_course=1000,
+             include_comments=False, requests_per_minute=60, comment_lookback_days=7):
+        """
+        Append only the posts (and comments) that earlier syncs have not saved.
+
+        Each course is searched newest first, down to its watermark (the
+        newest post saved before). Posts and comments whose IDs are in state
+        are skipped, and the rest are appended to output_path. A course's IDs
+        and watermark are recorded right after its rows are written, so an
+        interrupted sync resumes with the courses it did not finish.
+
+        Args:
+            course_codes: Iterable of course codes
+            state: SyncState of saved IDs and watermarks
+            output_path: CSV file new rows are appended to (created if missing)
+            limit_per_course: Max posts fetched by the first sync of a course;
+                later syncs fetch every post down to the watermark
+            include_comments: Also collect comments
+            requests_per_minute: API budget of the sync
+            comment_lookback_days: With include_comments, posts this much
+                older than the watermark are revisited for new comments
+
+        Returns:
+            DataFrame of the rows appended, with SYNC_COLUMNS
+        """
+        limiter = RateLimiter(requests_per_minute)
+        lookback = comment_lookback_days * 86400 if include_comments else 0
+        appended = []
+        for code in dict.fromkeys(course_codes):
+            with self.metrics.stage('scraper.sync') as stage:
+                rows, items, newest = self._sync_course(
+                    code, state, limit_per_course, include_comments, lookback, limiter
+                )
+                stage.rows = len(rows)
+            if rows:
+                self._append_csv(pd.DataFrame(rows, columns=SYNC_COLUMNS), output_path)
+            state.record(code, items, newest)
+            appended.extend(rows)
+            print(f"Synced {len(rows)} new rows for {code}")
+        return pd.DataFrame(appended, columns=SYNC_COLUMNS)
+
+    def _append_csv(self, df, output_path):
+        """Append rows to a CSV, matching the columns of an existing file."""
+        if os.path.exists(output_path) and os.path.getsize(output_path) > 0:
+            columns = pd.read_csv(output_path, nrows=0).columns
+            df.reindex(columns=columns).to_csv(output_path, mode='a', header=False, index=False)
+            return
+        directory = os.path.dirname(output_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
         df.to_csv(output_path, index=False)
+
+    def save_to_csv(self, df, output_path='data/reddit_reviews.csv', append=False):
+        """Save scraped data to CSV file (appended to an existing file with append=True)."""
+        if append:
+            self._append_csv(df, output_path)
+        else:
+            df.to_csv(output_path, index=False)
         print(f"Saved {len(df)} reviews to {output_path}")
 
 
@@ -149,6 +611,16 @@ def main():
     courses = ['CS124', 'CS225', 'CS374', 'STAT400']
     df = scraper.scrape_multiple_courses(courses)
     scraper.save_to_csv(df)
+
+    # Or scrape many courses in parallel, resumable after interruption
+    df = scraper.scrape_courses_concurrently(courses, workers=8, checkpoint_dir='data/scrape_checkpoints')
+
+    # Or score reviews while they are scraped, writing results as they come in
+    analyzer = CourseReviewAnalyzer(data_path=None)
+    analyzer.analyze_records(scraper.iter_reviews(courses, workers=8))
+
+    # Or refresh daily, appending only posts and comments not seen before
+    new_rows = scraper.sync(courses, SyncState('data/reddit_sync.sqlite'), include_comments=True)
     """)
 
 
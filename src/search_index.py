@@ -0,0 +1,422 @@
+"""
+Review Search Index
+Persisted inverted index with BM25 ranking and course, sentiment and topic facets.
+
+The index is a directory of immutable segments plus a meta.json listing
+them. Each segment holds, as .npy files:
+- postings in CSR layout: per-term offsets into document and term-frequency arrays
+- per-document lengths and row numbers (positions in the analyzed reviews)
+- facet columns: course code, sentiment and topic bitmask per document
+
+Adding reviews writes a new segment, so updates never rewrite existing
+ones; once there are more than max_segments they are merged into one.
+Queries score every segment with NumPy and pick the top hits with
+argpartition, so answering takes milliseconds on millions of reviews.
+"""
+
+import json
+import math
+import os
+import shutil
+from collections import Counter
+
+import numpy as np
+import pandas as pd
+
+from columnar import SENTIMENT_LABELS, _topic_masks
+from topic_matcher import GENERAL_TOPIC, parse_topics, tokenize
+
+FORMAT_VERSION = 1
+
+# Query words that carry no meaning for ranking ("reviews mentioning exams")
+QUERY_STOPWORDS = frozenset([
+    'a', 'about', 'an', 'and', 'for', 'in', 'mention', 'mentioning', 'mentions', 'of', 'on',
+    'review', 'reviews', 'say', 'saying', 'that', 'the', 'to', 'with'
+])
+
+SEGMENT_ARRAYS = ('offsets', 'docs', 'tfs', 'lengths', 'rows', 'courses', 'sentiments', 'topics')
+
+
+def _course_key(code):
+    """Course codes compare case- and space-insensitively ('CS 374' == 'cs374')."""
+    return ''.join(str(code).lower().split())
+
+
+class _Segment:
+    """One immutable index segment, memory-mapped from disk."""
+
+    def __init__(self, path):
+        self.path = path
+        with open(os.path.join(path, 'terms.json')) as f:
+            self.terms = {term: i for i, term in enumerate(json.load(f))}
+        for name in SEGMENT_ARRAYS:
+            setattr(self, name, np.load(os.path.join(path, f'{name}.npy'), mmap_mode='r'))
+
+    def __len__(self):
+        return len(self.lengths)
+
+    def postings(self, term):
+        """(documents, term frequencies) of a term, or None if the segment lacks it."""
+        term_id = self.terms.get(term)
+        if term_id is None:
+            return None
+        start, end = self.offsets[term_id], self.offsets[term_id + 1]
+        return self.docs[start:end], self.tfs[start:end]
+
+    def term_postings(self):
+        """Terms with their postings, in term id order."""
+        terms = sorted(self.terms, key=self.terms.get)
+        return terms, np.asarray(self.offsets), np.asarray(self.docs), np.asarray(self.tfs)
+
+
+def _write_segment(path, terms, term_ids, docs, tfs, lengths, rows, courses, sentiments, topics):
+    """Write a segment from unsorted (term id, doc, tf) postings."""
+    order = np.lexsort((docs, term_ids))
+    term_ids, docs, tfs = term_ids[order], docs[order], tfs[order]
+    offsets = np.zeros(len(terms) + 1, dtype=np.int64)
+    np.cumsum(np.bincount(term_ids, minlength=len(terms)), out=offsets[1:])
+
+    os.makedirs(path)
+    with open(os.path.join(path, 'terms.json'), 'w') as f:
+        json.dump(terms, f)
+    arrays = {
+        'offsets': offsets,
+        'docs': docs.astype(np.int32),
+        'tfs': np.minimum(tfs, np.iinfo(np.uint16).max).astype(np.uint16),
+        'lengths': lengths.astype(np.int32),
+        'rows': rows.astype(np.int64),
+        'courses': courses.astype(np.int32),
+        'sentiments': sentiments.astype(np.int8),
+        'topics': topics.astype(np.uint64)
+    }
+    for name, array in arrays.items():
+        np.save(os.path.join(path, f'{name}.npy'), array)
+
+
+class SearchIndex:
+    """Segmented inverted index over analyzed reviews."""
+
+    def __init__(self, path='results/search_index', topic_names=None, k1=1.2, b=0.75, max_segments=8):
+        """
+        Open (or create) an index.
+
+        Args:
+            path: Index directory
+            topic_names: Topic bit order for new indexes (defaults to topics
+                seen in the first batch); existing indexes keep theirs
+            k1: BM25 term frequency saturation
+            b: BM25 document length normalization
+            max_segments: Segments kept before they are merged into one
+        """
+        self.path = path
+        self.k1 = k1
+        self.b = b
+        self.max_segments = max_segments
+        os.makedirs(path, exist_ok=True)
+
+        meta_path = os.path.join(path, 'meta.json')
+        if os.path.exists(meta_path):
+            with open(meta_path) as f:
+                self.meta = json.load(f)
+            if self.meta.get('version') != FORMAT_VERSION:
+                raise ValueError(f"Unsupported search index version: {self.meta.get('version')}")
+        else:
+            self.meta = {'version': FORMAT_VERSION, 'segments': [], 'courses': [],
+                         'topics': list(topic_names) if topic_names is not None else None,
+                         'next_row': 0, 'next_segment': 0}
+        self._segments = {}
+
+    def __len__(self):
+        return sum(len(segment) for segment in self.segments())
+
+    @property
+    def topic_names(self):
+        """Topic bit order of the topic facet."""
+        return self.meta['topics'] or []
+
+    @topic_names.setter
+    def topic_names(self, names):
+        if self.meta['topics'] is not None and list(names) != self.meta['topics']:
+            raise ValueError("The index was built with different topics; clear(topic_names) it first")
+        self.meta['topics'] = list(names)
+
+    @property
+    def next_row(self):
+        """Row number the next added review gets by default."""
+        return self.meta['next_row']
+
+    def _save_meta(self):
+        tmp_path = os.path.join(self.path, 'meta.json.tmp')
+        with open(tmp_path, 'w') as f:
+            json.dump(self.meta, f)
+        os.replace(tmp_path, os.path.join(self.path, 'meta.json'))
+
+    def segments(self):
+        """Open segments, oldest first."""
+        for name in list(self._segments):
+            if name not in self.meta['segments']:
+                del self._segments[name]
+        for name in self.meta['segments']:
+            if name not in self._segments:
+                self._segments[name] = _Segment(os.path.join(self.path, name))
+        return [self._segments[name] for name in self.meta['segments']]
+
+    def _new_segment_path(self):
+        name = f"seg-{self.meta['next_segment']:06d}"
+        self.meta['next_segment'] += 1
+        return name, os.path.join(self.path, name)
+
+    def clear(self, topic_names=None):
+        """Remove every segment, switching to topic_names for the topic facet when given."""
+        old = list(self.meta['segments'])
+        self.meta.update(segments=[], courses=[], next_row=0)
+        if topic_names is not None:
+            self.meta['topics'] = list(topic_names)
+        self._save_meta()
+        self._segments = {}
+        for name in old:
+            shutil.rmtree(os.path.join(self.path, name), ignore_errors=True)
+
+    def add(self, df, first_row=None):
+        """
+        Index a batch of analyzed reviews as a new segment.
+
+        Args:
+            df: DataFrame with review, course_code, sentiment_vader and topics
+                (or topic_mask); rows flagged in an is_duplicate column are not indexed
+            first_row: Row number of df's first row (defaults to next_row)
+
+        Returns:
+            Number of reviews indexed
+        """
+        first_row = self.next_row if first_row is None else first_row
+        rows = first_row + np.arange(len(df), dtype=np.int64)
+        self.meta['next_row'] = max(self.next_row, int(first_row + len(df)))
+        if 'is_duplicate' in df.columns:
+            keep = ~df['is_duplicate'].to_numpy(dtype=bool)
+            df, rows = df[keep], rows[keep]
+        if df.empty:
+            self._save_meta()
+            return 0
+
+        if 'topic_mask' in df.columns:
+            topics = df['topic_mask'].to_numpy(dtype=np.uint64)
+            if self.meta['topics'] is None:
+                self.meta['topics'] = list(df.attrs.get('topics', []))
+        else:
+            if self.meta['topics'] is None:
+                seen = {}
+                for cell in df['topics']:
+                    for topic in parse_topics(cell):
+                        seen.setdefault(topic, None)
+                self.meta['topics'] = [t for t in seen if t != GENERAL_TOPIC]
+            topics = _topic_masks(df['topics'], self.meta['topics'][:64])[:, 0]
+
+        course_ids = {code: i for i, code in enumerate(self.meta['courses'])}
+        courses = np.empty(len(df), dtype=np.int32)
+        for i, code in enumerate(df['course_code'].astype(str)):
+            course = course_ids.get(code)
+            if course is None:
+                course = course_ids[code] = len(self.meta['courses'])
+                self.meta['courses'].append(code)
+            courses[i] = course
+        labels = {label: i for i, label in enumerate(SENTIMENT_LABELS)}
+        sentiments = np.array([labels.get(label, -1) for label in df['sentiment_vader'].astype(str)], dtype=np.int8)
+
+        vocabulary = {}
+        term_ids, docs, tfs = [], [], []
+        lengths = np.zeros(len(df), dtype=np.int32)
+        for doc, text in enumerate(df['review']):
+            tokens = tokenize(text) if isinstance(text, str) else []
+            lengths[doc] = len(tokens)
+            for term, tf in Counter(tokens).items():
+                term_ids.append(vocabulary.setdefault(term, len(vocabulary)))
+                docs.append(doc)
+                tfs.append(tf)
+
+        name, path = self._new_segment_path()
+        _write_segment(
+            path, list(vocabulary), np.array(term_ids, dtype=np.int64), np.array(docs, dtype=np.int64),
+            np.array(tfs, dtype=np.int64), lengths, rows, courses, sentiments, topics
+        )
+        self.meta['segments'].append(name)
+        self._save_meta()
+        if len(self.meta['segments']) > self.max_segments:
+            self.merge()
+        return len(df)
+
+    def merge(self):
+        """Merge every segment into one."""
+        segments = self.segments()
+        if len(segments) < 2:
+            return
+
+        vocabulary = {}
+        term_ids, docs, tfs, columns = [], [], [], {name: [] for name in SEGMENT_ARRAYS[3:]}
+        base = 0
+        for segment in segments:
+            terms, offsets, segment_docs, segment_tfs = segment.term_postings()
+            mapping = np.array([vocabulary.setdefault(term, len(vocabulary)) for term in terms], dtype=np.int64)
+            term_ids.append(np.repeat(mapping, np.diff(offsets)))
+            docs.append(segment_docs.astype(np.int64) + base)
+            tfs.append(segment_tfs)
+            for name in columns:
+                columns[name].append(np.asarray(getattr(segment, name)))
+            base += len(segment)
+
+        name, path = self._new_segment_path()
+        _write_segment(
+            path, list(vocabulary), np.concatenate(term_ids), np.concatenate(docs), np.concatenate(tfs),
+            *(np.concatenate(columns[column]) for column in SEGMENT_ARRAYS[3:])
+        )
+        old = self.meta['segments']
+        self.meta['segments'] = [name]
+        self._save_meta()
+        self._segments = {}
+        for old_name in old:
+            shutil.rmtree(os.path.join(self.path, old_name), ignore_errors=True)
+
+    def parse_query(self, query):
+        """
+        Split a free-text query into search terms and facet filters.
+
+        Course codes, sentiment words and topic names in the query become
+        filters ("negative CS374 reviews mentioning exams"). Topic names are
+        not search terms as well, so reviews tagged with the topic match
+        without containing its literal name ("Terrible final exam...").
+
+        Returns:
+            (terms, {'course': ..., 'sentiment': ..., 'topic': ...}) with
+            filters that were not mentioned left out
+        """
+        courses = {_course_key(code): code for code in self.meta['courses']}
+        sentiments = {label.lower(): label for label in SENTIMENT_LABELS}
+        topics = set(self.topic_names[:64])
+
+        words = str(query).split()
+        terms, filters = [], {}
+        i = 0
+        while i < len(words):
+            # Course codes may be written with a space ("CS 374")
+            pair = _course_key(''.join(words[i:i + 2]))
+            if i + 1 < len(words) and pair in courses:
+                filters['course'] = courses[pair]
+                i += 2
+                continue
+            word = words[i]
+            i += 1
+            if _course_key(word) in courses:
+                filters['course'] = courses[_course_key(word)]
+                continue
+            for token in tokenize(word):
+                if token in sentiments:
+                    filters['sentiment'] = sentiments[token]
+                elif token in topics:
+                    filters['topic'] = token
+                elif token not in QUERY_STOPWORDS:
+                    terms.append(token)
+        return terms, filters
+
+    def _filter(self, segment, course, sentiment, topic):
+        """Boolean mask of the segment's documents passing the facet filters (None for all)."""
+        mask = None
+
+        def both(a, b):
+            return b if a is None else a & b
+
+        if course is not None:
+            ids = [i for i, code in enumerate(self.meta['courses']) if _course_key(code) == _course_key(course)]
+            mask = both(mask, np.isin(segment.courses, ids))
+        if sentiment is not None:
+            label = str(sentiment).capitalize()
+            code = SENTIMENT_LABELS.index(label) if label in SENTIMENT_LABELS else -2
+            mask = both(mask, np.asarray(segment.sentiments) == code)
+        if topic is not None:
+            # Only the first 64 topics fit the bitmask
+            if topic not in self.topic_names[:64]:
+                return np.zeros(len(segment), dtype=bool)
+            bit = np.uint64(1 << self.topic_names.index(topic))
+            mask = both(mask, (np.asarray(segment.topics) & bit) != 0)
+        return mask
+
+    def search(self, query='', course=None, sentiment=None, topic=None, limit=10, parse=True):
+        """
+        Rank reviews against a query with BM25.
+
+        Args:
+            query: Free text; with parse=True, course codes, sentiment words and
+                topic names in it act as filters (see parse_query)
+            course: Only reviews of this course code
+            sentiment: Only reviews with this VADER label ('Negative', ...)
+            topic: Only reviews tagged with this topic
+            limit: Maximum number of hits
+            parse: Extract filters from the query text
+
+        Returns:
+            DataFrame of hits, best first, with row (position in the analyzed
+            reviews), score, course_code and sentiment. Without search terms,
+            every review passing the filters matches with score 0, in row order.
+        """
+        if parse:
+            terms, parsed = self.parse_query(query)
+            course = course if course is not None else parsed.get('course')
+            sentiment = sentiment if sentiment is not None else parsed.get('sentiment')
+            topic = topic if topic is not None else parsed.get('topic')
+        else:
+            terms = [token for token in tokenize(query) if token not in QUERY_STOPWORDS]
+
+        segments = self.segments()
+        n_docs = sum(len(segment) for segment in segments)
+        if n_docs == 0:
+            return self._hits([], [], [], [])
+        avg_length = sum(float(np.sum(segment.lengths)) for segment in segments) / n_docs
+        terms = list(dict.fromkeys(terms))
+        postings = [[segment.postings(term) for term in terms] for segment in segments]
+        idf = []
+        for t in range(len(terms)):
+            df = sum(len(p[t][0]) for p in postings if p[t] is not None)
+            idf.append(math.log(1 + (n_docs - df + 0.5) / (df + 0.5)))
+
+        hit_rows, hit_scores, hit_courses, hit_sentiments = [], [], [], []
+        for segment, segment_postings in zip(segments, postings):
+            mask = self._filter(segment, course, sentiment, topic)
+            if terms:
+                scores = np.zeros(len(segment), dtype=np.float64)
+                norm = self.k1 * (1 - self.b + self.b * np.asarray(segment.lengths) / max(avg_length, 1e-9))
+                for weight, found in zip(idf, segment_postings):
+                    if found is None:
+                        continue
+                    docs, tfs = np.asarray(found[0]), np.asarray(found[1], dtype=np.float64)
+                    scores[docs] += weight * tfs * (self.k1 + 1) / (tfs + norm[docs])
+                matched = scores > 0
+                if mask is not None:
+                    matched &= mask
+                candidates = np.flatnonzero(matched)
+                candidate_scores = scores[candidates]
+                if len(candidates) > limit:
+                    best = np.argpartition(-candidate_scores, limit - 1)[:limit]
+                    candidates, candidate_scores = candidates[best], candidate_scores[best]
+            else:
+                candidates = np.flatnonzero(mask) if mask is not None else np.arange(len(segment))
+                candidates = candidates[:limit]
+                candidate_scores = np.zeros(len(candidates))
+            hit_rows.append(np.asarray(segment.rows)[candidates])
+            hit_scores.append(candidate_scores)
+            hit_courses.append(np.asarray(segment.courses)[candidates])
+            hit_sentiments.append(np.asarray(segment.sentiments)[candidates])
+
+        return self._hits(hit_rows, hit_scores, hit_courses, hit_sentiments, limit)
+
+    def _hits(self, rows, scores, courses, sentiments, limit=0):
+        if not rows:
+            return pd.DataFrame({'row': [], 'score': [], 'course_code': [], 'sentiment': []})
+        rows, scores = np.concatenate(rows), np.concatenate(scores)
+        courses, sentiments = np.concatenate(courses), np.concatenate(sentiments)
+        order = np.lexsort((rows, -scores))[:limit]
+        labels = np.array(SENTIMENT_LABELS + [None], dtype=object)
+        return pd.DataFrame({
+            'row': rows[order],
+            'score': scores[order],
+            'course_code': np.array(self.meta['courses'], dtype=object)[courses[order]],
+            'sentiment': labels[sentiments[order]]
+        })
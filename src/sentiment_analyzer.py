@@ -5,45 +5,136 @@ Analyzes course reviews using VADER and TextBlob sentiment analysis.
 
 import pandas as pd
 import numpy as np
+import hashlib
+import json
+import os
 import re
-import nltk
-from nltk.sentiment.vader import SentimentIntensityAnalyzer
-from textblob import TextBlob
-
-# Download required NLTK data
-try:
-    nltk.data.find('sentiment/vader_lexicon.zip')
-except LookupError:
-    nltk.download('vader_lexicon')
-
-try:
-    nltk.data.find('tokenizers/punkt')
-except LookupError:
-    nltk.download('punkt')
-
-try:
-    nltk.data.find('corpora/stopwords')
-except LookupError:
-    nltk.download('stopwords')
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from aggregates import ReviewAggregates
+from aspects import ASPECT_VERSION, AspectScorer, aspect_column
+from batch_scorer import (
+    BatchScorer, CascadePolicy, CascadeReport, SCORER_VERSION, TEXTBLOB_THRESHOLD, VADER_THRESHOLD,
+    textblob_labels, vader_labels
+)
+from itertools import repeat
+from score_cache import text_key
+from search_index import SearchIndex
+from columnar import compact_frame, write_columnar
+from dedup import DuplicateIndex, NearDuplicateDetector
+from instrumentation import NULL_METRICS, metrics_from_env
+from linear_sentiment import LinearSentimentModel
+from preprocess import Preprocessor
+from resources import prepare_resources  # noqa: F401 (re-exported for batch workers)
+from topic_matcher import TopicMatcher
+from trends import TrendStore
+
+# NLTK, TextBlob and their data are loaded lazily on first use of VADER or
+# TextBlob; call prepare_resources() to fetch everything ahead of time.
 
 
 class CourseReviewAnalyzer:
     """Analyzes course reviews for sentiment and topic extraction."""
 
-    def __init__(self, data_path='data/sample_reviews.csv'):
-        """Initialize the analyzer with data from CSV file."""
+    # Topic keywords for extraction
+    TOPIC_KEYWORDS = {
+        'difficulty': ['hard', 'difficult', 'easy', 'challenging', 'tough', 'struggle', 'simple'],
+        'workload': ['homework', 'assignments', 'projects', 'work', 'time', 'workload', 'labs'],
+        'teaching': ['professor', 'instructor', 'lecture', 'teaching', 'explains', 'teacher', 'lectures'],
+        'exams': ['exam', 'test', 'midterm', 'final', 'quiz', 'exams', 'tests'],
+        'helpful': ['helpful', 'useful', 'practical', 'applicable', 'TAs', 'office hours', 'resources']
+    }
+
+    def __init__(self, data_path='data/sample_reviews.csv', topic_keywords=None, cache=None,
+                 lexicon_cache=None, metrics=None, trends=None, index=None, linear_model=None):
+        """
+        Initialize the analyzer.
+
+        Args:
+            data_path: CSV file of reviews, loaded on first access to self.df
+            topic_keywords: Mapping of topic to keywords (defaults to TOPIC_KEYWORDS)
+            cache: ScoreCache of scores from earlier runs (optional)
+            lexicon_cache: Prebuilt VADER lexicon from prepare_resources() (optional)
+            metrics: instrumentation.Metrics recording per-stage timings (optional)
+            trends: TrendStore of per-(course, semester) aggregates to keep
+                current (optional); analyze_all and analyze_stream merge the
+                rows appended to data_path since the last run (rebuilding it
+                only if earlier rows changed), add_reviews and
+                analyze_records merge just their rows
+            index: SearchIndex answering search() (optional); rebuilt by
+                analyze_all, analyze_stream and analyze_records, extended by
+                add_reviews
+            linear_model: Trained LinearSentimentModel, or the path of a saved
+                one (optional); adds sentiment_linear and linear_polarity columns
+        """
         self.data_path = data_path
-        self.df = pd.read_csv(data_path)
-        self.vader = SentimentIntensityAnalyzer()
-
-        # Topic keywords for extraction
-        self.topic_keywords = {
-            'difficulty': ['hard', 'difficult', 'easy', 'challenging', 'tough', 'struggle', 'simple'],
-            'workload': ['homework', 'assignments', 'projects', 'work', 'time', 'workload', 'labs'],
-            'teaching': ['professor', 'instructor', 'lecture', 'teaching', 'explains', 'teacher', 'lectures'],
-            'exams': ['exam', 'test', 'midterm', 'final', 'quiz', 'exams', 'tests'],
-            'helpful': ['helpful', 'useful', 'practical', 'applicable', 'TAs', 'office hours', 'resources']
-        }
+        self._df = None
+        self.aggregates = None
+        self.cache = cache
+        self.lexicon_cache = lexicon_cache
+        self.metrics = metrics or NULL_METRICS
+        self.trends = trends
+        self.cascade_report = None
+        self.index = index
+        # Whether the index's row numbers are positions in self.df (not in
+        # records analyze_records has not kept)
+        self._index_on_df = True
+        if isinstance(linear_model, str):
+            linear_model = LinearSentimentModel.load(linear_model)
+        self.linear_model = linear_model
+        self.scorer = BatchScorer(lexicon_cache=lexicon_cache, metrics=self.metrics)
+
+        source = topic_keywords if topic_keywords is not None else self.TOPIC_KEYWORDS
+        self.topic_keywords = {topic: list(keywords) for topic, keywords in source.items()}
+        self._topic_matcher = TopicMatcher(self.topic_keywords)
+        self._preprocessor = None
+        self._aspect_scorer = None
+        if index is not None and not index.topic_names:
+            index.topic_names = self.topic_matcher.topics
+
+    @property
+    def df(self):
+        """Reviews DataFrame, read from data_path the first time it is needed."""
+        if self._df is None:
+            with self.metrics.stage('analyzer.load') as stage:
+                self._df = pd.read_csv(self.data_path)
+                stage.rows = len(self._df)
+        return self._df
+
+    @df.setter
+    def df(self, value):
+        self._df = value
+        # Aggregates describe the previous frame
+        self.aggregates = None
+
+    @property
+    def vader(self):
+        """VADER SentimentIntensityAnalyzer, created on first use."""
+        return self.scorer.vader
+
+    @property
+    def topic_matcher(self):
+        """TopicMatcher compiled from topic_keywords, rebuilt whenever they change."""
+        if self._topic_matcher.topic_keywords != self.topic_keywords:
+            self._topic_matcher = TopicMatcher(self.topic_keywords)
+        return self._topic_matcher
+
+    @property
+    def preprocessor(self):
+        """Preprocessor sharing one tokenization between cleaning, scoring and topic_matcher."""
+        matcher = self.topic_matcher
+        if self._preprocessor is None or self._preprocessor.topic_matcher is not matcher:
+            self._preprocessor = Preprocessor(self.scorer, matcher)
+        return self._preprocessor
+
+    @property
+    def aspect_scorer(self):
+        """AspectScorer of per-topic clause sentiment over topic_matcher's topics."""
+        matcher = self.topic_matcher
+        if self._aspect_scorer is None or self._aspect_scorer.topic_matcher is not matcher:
+            self._aspect_scorer = AspectScorer(self.scorer, matcher)
+        return self._aspect_scorer
 
     def clean_text(self, text):
         """Clean and preprocess text."""
@@ -63,9 +154,9 @@ class CourseReviewAnalyzer:
             return 'Neutral'
         scores = self.vader.polarity_scores(text)
         compound = scores['compound']
-        if compound >= 0.05:
+        if compound >= VADER_THRESHOLD:
             return 'Positive'
-        elif compound <= -0.05:
+        elif compound <= -VADER_THRESHOLD:
             return 'Negative'
         else:
             return 'Neutral'
@@ -74,101 +165,653 @@ class CourseReviewAnalyzer:
         """Analyze sentiment using TextBlob. Returns 'Positive', 'Negative', or 'Neutral'."""
         if not text:
             return 'Neutral'
-        analysis = TextBlob(text)
-        polarity = analysis.sentiment.polarity
-        if polarity > 0.1:
+        # Same analyzer TextBlob(text).sentiment uses, without building a TextBlob
+        polarity = self.scorer.textblob.analyze(text).polarity
+        if polarity > TEXTBLOB_THRESHOLD:
             return 'Positive'
-        elif polarity < -0.1:
+        elif polarity < -TEXTBLOB_THRESHOLD:
             return 'Negative'
         else:
             return 'Neutral'
 
-    def extract_topics(self, text):
-        """Extract topics from text based on keyword matching."""
+    def analyze_sentiment_linear(self, text):
+        """Analyze sentiment using the trained linear model. Returns 'Positive', 'Negative', or 'Neutral'."""
+        if self.linear_model is None:
+            raise ValueError("No linear sentiment model; pass linear_model to CourseReviewAnalyzer")
         if not text:
-            return ['general']
+            return 'Neutral'
+        return self.linear_model.predict([text])['sentiment_linear'][0]
+
+    def score_batch(self, texts):
+        """
+        Score many reviews at once with VADER and TextBlob.
+
+        Produces the same labels as analyze_sentiment_vader and
+        analyze_sentiment_textblob, without the per-review overhead.
+
+        Args:
+            texts: Iterable of review texts
 
-        text_lower = text.lower()
-        found_topics = []
+        Returns:
+            Dict of NumPy columns: sentiment_vader, sentiment_textblob,
+            vader_compound and textblob_polarity
+        """
+        return self.scorer.score_batch(texts)
 
-        for topic, keywords in self.topic_keywords.items():
-            for keyword in keywords:
-                if keyword.lower() in text_lower:
-                    found_topics.append(topic)
-                    break
+    def score_texts(self, texts):
+        """
+        Score a batch of reviews as analyze_all does, without touching self.df.
 
-        return found_topics if found_topics else ['general']
+        Args:
+            texts: Iterable of review texts
+
+        Returns:
+            DataFrame with one row per text: cleaned_review, the VADER and
+            TextBlob columns, topics and one aspect column per topic
+        """
+        return self._score_reviews(pd.Series(list(texts), dtype=object))
+
+    def extract_topics(self, text):
+        """Extract topics from text based on whole-word keyword matching."""
+        return self.topic_matcher.extract(text)
+
+    def topic_matrix(self, texts):
+        """Return a sparse review x topic indicator matrix (columns follow topic_keywords)."""
+        return self.topic_matcher.match_matrix(texts)
+
+    def _score_reviews(self, reviews, textblob=True):
+        """
+        Compute the cleaned text, sentiment, topic and aspect columns for a Series of reviews.
+
+        Without textblob only VADER runs (the first pass of cascade scoring).
+        """
+        results = pd.DataFrame(index=reviews.index)
+
+        # Tokenize once; cleaning, both scorers and topics share the tokens
+        with self.metrics.stage('analyzer.preprocess', rows=len(reviews)):
+            batch = self.preprocessor.process(reviews)
+            results['cleaned_review'] = batch.cleaned_column()
+
+        # Sentiment analysis
+        for column, values in self.scorer.score_preprocessed(batch, textblob=textblob).items():
+            results[column] = values
+
+        # Topic extraction
+        with self.metrics.stage('analyzer.topics', rows=len(reviews)):
+            results['topics'] = batch.topics_column(self.topic_matcher)
+
+        # Per-topic sentiment of the clauses mentioning each topic
+        with self.metrics.stage('analyzer.aspects', rows=len(reviews)):
+            compound = np.zeros(len(batch.texts))
+            compound[batch.codes] = results['vader_compound'].to_numpy()
+            aspects = self.aspect_scorer.score(batch.texts, compound, batch.topic_masks)[batch.codes]
+            for j, topic in enumerate(self.topic_matcher.topics):
+                results[aspect_column(topic)] = aspects[:, j]
+
+        return results
+
+    def _aspect_entries(self, results):
+        """Per-row {topic: score} dicts of the aspect columns, as stored in the score cache."""
+        topics = self.topic_matcher.topics
+        values = results[[aspect_column(topic) for topic in topics]].to_numpy(dtype=np.float64)
+        return [
+            {topics[j]: float(row[j]) for j in np.flatnonzero(~np.isnan(row))}
+            for row in values
+        ]
+
+    def _worker_pool(self, workers):
+        """Create a process pool whose workers each hold their own analyzer."""
+        return ProcessPoolExecutor(
+            max_workers=workers,
+            initializer=_init_worker,
+            initargs=(self.topic_keywords, self.lexicon_cache)
+        )
+
+    def _score_reviews_parallel(self, reviews, executor, chunk_size, textblob=True):
+        """Score reviews in a process pool, returning results in the original row order."""
+        chunks = [reviews.iloc[start:start + chunk_size] for start in range(0, len(reviews), chunk_size)]
+        if not chunks:
+            return self._score_reviews(reviews, textblob)
+
+        # map() yields results in submission order, so rows stay aligned
+        with self.metrics.stage('analyzer.score_parallel', rows=len(reviews)):
+            return pd.concat(executor.map(_score_chunk, chunks, repeat(textblob)))
+
+    def cache_version(self):
+        """Identify the scorer, lexicon and topic keywords that cached scores depend on."""
+        description = json.dumps({
+            'scorer': SCORER_VERSION,
+            'lexicon': self.scorer.lexicon.fingerprint,
+            'topic_keywords': self.topic_keywords,
+            'aspects': ASPECT_VERSION
+        }, sort_keys=True)
+        return hashlib.sha1(description.encode('utf-8')).hexdigest()
+
+    def _run_scoring(self, reviews, executor=None, chunk_size=10000, ratings=None, cascade=None):
+        """
+        Score reviews locally or in a worker pool, only computing reviews missing from the cache.
+
+        With a CascadePolicy, every review is scored with VADER and only the
+        reviews the policy escalates (given their ratings) with TextBlob; the
+        rest get a NaN textblob_polarity, and an escalated column is added.
+        """
+        results = self._run_rule_scoring(reviews, executor, chunk_size, textblob=cascade is None)
+        self._fill_textblob(reviews, results, executor, chunk_size, ratings, cascade)
+        if self.linear_model is not None:
+            # One sparse matrix product per batch; cheap enough to skip the cache and workers
+            with self.metrics.stage('analyzer.linear', rows=len(reviews)):
+                for column, values in self.linear_model.predict(reviews).items():
+                    results[column] = values
+        return results
+
+    def _run_rule_scoring(self, reviews, executor=None, chunk_size=10000, textblob=True):
+        """VADER, TextBlob and topic columns, computed locally or in a worker pool and cached."""
+        if self.cache is None:
+            if executor is not None:
+                return self._score_reviews_parallel(reviews, executor, chunk_size, textblob)
+            return self._score_reviews(reviews, textblob)
+
+        self.cache.set_version(self.cache_version())
+        codes, uniques = pd.factorize(reviews.fillna('').astype(str), sort=False)
+        keys = [text_key(text) for text in uniques]
+        scores = self.cache.get_many(keys)
+
+        missing = [i for i, key in enumerate(keys) if key not in scores]
+        self.metrics.count('score_cache_hits', len(keys) - len(missing))
+        self.metrics.count('score_cache_misses', len(missing))
+        if missing:
+            texts = pd.Series(uniques[missing], index=missing, dtype=object)
+            if executor is not None:
+                computed = self._score_reviews_parallel(texts, executor, chunk_size, textblob)
+            else:
+                computed = self._score_reviews(texts, textblob)
+            entries = []
+            for i, compound, polarity, topics, aspects in zip(
+                missing, computed['vader_compound'], computed['textblob_polarity'], computed['topics'],
+                self._aspect_entries(computed)
+            ):
+                scores[keys[i]] = (compound, polarity, topics, aspects)
+                entries.append((keys[i], compound, polarity, topics, aspects))
+            self.cache.put_many(entries)
+
+        unique_scores = [scores[key] for key in keys]
+        compound = np.array([entry[0] for entry in unique_scores], dtype=np.float64)[codes]
+        polarity = np.array([entry[1] for entry in unique_scores], dtype=np.float64)[codes]
+        topic_bits = {topic: j for j, topic in enumerate(self.topic_matcher.topics)}
+        aspects = np.full((len(unique_scores), len(topic_bits)), np.nan)
+        for i, entry in enumerate(unique_scores):
+            for topic, value in entry[3].items():
+                aspects[i, topic_bits[topic]] = value
+        aspects = aspects[codes]
+
+        results = pd.DataFrame(index=reviews.index)
+        with self.metrics.stage('analyzer.clean', rows=len(reviews)):
+            results['cleaned_review'] = reviews.apply(self.clean_text)
+        results['sentiment_vader'] = vader_labels(compound)
+        results['sentiment_textblob'] = textblob_labels(polarity)
+        results['vader_compound'] = compound
+        results['textblob_polarity'] = polarity
+        results['topics'] = [list(unique_scores[code][2]) for code in codes]
+        for topic, j in topic_bits.items():
+            results[aspect_column(topic)] = aspects[:, j]
+        return results
+
+    def _fill_textblob(self, reviews, results, executor, chunk_size, ratings, cascade):
+        """
+        Run TextBlob where results still need it, updating results in place.
+
+        Without a cascade policy that is only reviews cached by an earlier
+        cascade run; with one, the escalated reviews, and TextBlob columns of
+        the other reviews are cleared.
+        """
+        polarity = results['textblob_polarity'].to_numpy(dtype=np.float64, copy=True)
+        if cascade is None:
+            needed = np.isnan(polarity)
+            if not needed.any():
+                return
+        else:
+            escalated = cascade.escalate(results['vader_compound'].to_numpy(dtype=np.float64), ratings)
+            needed = escalated & np.isnan(polarity)
+            polarity[~escalated] = np.nan
+            results['escalated'] = escalated
+
+        rows = np.flatnonzero(needed)
+        if len(rows):
+            texts = reviews.iloc[rows]
+            with self.metrics.stage('analyzer.escalate', rows=len(rows)):
+                if executor is not None and len(rows) > chunk_size:
+                    chunks = [texts.iloc[start:start + chunk_size] for start in range(0, len(texts), chunk_size)]
+                    polarity[rows] = np.concatenate(list(executor.map(_textblob_chunk, chunks)))
+                else:
+                    polarity[rows] = self.scorer.textblob_polarities(texts)
+            if self.cache is not None:
+                compound = results['vader_compound'].to_numpy()
+                topics = results['topics'].to_numpy()
+                aspects = self._aspect_entries(results.iloc[rows])
+                entries = {
+                    text_key(text): (compound[row], polarity[row], topics[row], row_aspects)
+                    for text, row, row_aspects in zip(texts.fillna('').astype(str), rows, aspects)
+                }
+                self.cache.put_many((key, *entry) for key, entry in entries.items())
+
+        results['textblob_polarity'] = polarity
+        results['sentiment_textblob'] = textblob_labels(polarity)
+
+    def find_duplicates(self, reviews, detector=None):
+        """
+        Cluster exact and near-duplicate reviews with MinHash LSH.
+
+        Args:
+            reviews: Series of review texts
+            detector: Configured NearDuplicateDetector (optional)
+
+        Returns:
+            int64 array with the position of each review's representative
+            (the first review of its cluster)
+        """
+        detector = detector or NearDuplicateDetector()
+        with self.metrics.stage('analyzer.dedup', rows=len(reviews)):
+            return detector.cluster(reviews.tolist())
+
+    def _run_scoring_deduplicated(self, reviews, representatives, executor=None, chunk_size=10000, ratings=None,
+                                  cascade=None):
+        """Score one review per duplicate cluster and copy its results to the rest of the cluster."""
+        positions = np.arange(len(reviews))
+        unique_rows = np.flatnonzero(representatives == positions)
+        if ratings is not None:
+            # Cascade escalation follows the representative's rating
+            ratings = ratings.iloc[unique_rows]
+        results = self._run_scoring(reviews.iloc[unique_rows], executor, chunk_size, ratings, cascade)
+
+        lookup = np.empty(len(reviews), dtype=np.int64)
+        lookup[unique_rows] = np.arange(len(unique_rows))
+        results = results.iloc[lookup[representatives]]
+        results.index = reviews.index
+        results['duplicate_of'] = representatives
+        results['is_duplicate'] = representatives != positions
+        return results
+
+    def analyze_all(self, workers=1, chunk_size=10000, output_format='csv', output_path=None, dedup=False,
+                    compact=False, cascade=False):
+        """
+        Run complete analysis pipeline on all reviews.
+
+        Args:
+            workers: Number of worker processes (None uses every core)
+            chunk_size: Reviews per task when running with several workers
+            output_format: 'csv', or 'columnar' for a memory-mappable binary store
+            output_path: Where to save results (defaults to results/analyzed_reviews.csv or .cols)
+            dedup: Score one review per cluster of near-duplicates (True, or a
+                configured NearDuplicateDetector). Adds duplicate_of and
+                is_duplicate columns; duplicates are left out of the aggregates.
+                Clusters the whole dataset at once; analyze_stream(dedup=True)
+                does it chunk by chunk in bounded memory.
+            compact: Keep the analyzed reviews in compact form afterwards (see compact())
+            cascade: Run TextBlob only on reviews VADER is unsure of or that
+                contradict their rating (True, or a configured CascadePolicy).
+                Adds an escalated column; other reviews get no TextBlob
+                scores. Escalation and agreement rates go to self.cascade_report.
+
+        Returns:
+            The analyzed DataFrame
+        """
+        if workers is None:
+            workers = os.cpu_count() or 1
 
-    def analyze_all(self):
-        """Run complete analysis pipeline on all reviews."""
         print("=" * 60)
         print("UIUC Course Review Sentiment Analyzer")
         print("=" * 60)
         print(f"Loaded {len(self.df)} reviews from {self.data_path}")
         print("\nAnalyzing reviews...")
 
-        # Clean text
-        self.df['cleaned_review'] = self.df['review'].apply(self.clean_text)
-
-        # Sentiment analysis
-        self.df['sentiment_vader'] = self.df['review'].apply(self.analyze_sentiment_vader)
-        self.df['sentiment_textblob'] = self.df['review'].apply(self.analyze_sentiment_textblob)
-
-        # Topic extraction
-        self.df['topics'] = self.df['review'].apply(self.extract_topics)
+        reviews = self.df['review']
+        cascade = _cascade_policy(cascade)
+        ratings = self.df['rating'] if cascade is not None and 'rating' in self.df.columns else None
+        representatives = None
+        if dedup:
+            representatives = self.find_duplicates(reviews, dedup if isinstance(dedup, NearDuplicateDetector) else None)
+            duplicates = int(np.count_nonzero(representatives != np.arange(len(reviews))))
+            print(f"Found {duplicates} near-duplicate reviews")
+
+        with self.metrics.stage('analyzer.score', rows=len(self.df)):
+            executor = self._worker_pool(workers) if workers > 1 else None
+            if executor is not None:
+                print(f"Using {workers} worker processes")
+            try:
+                if representatives is not None:
+                    results = self._run_scoring_deduplicated(
+                        reviews, representatives, executor, chunk_size, ratings, cascade
+                    )
+                else:
+                    results = self._run_scoring(reviews, executor, chunk_size, ratings, cascade)
+            finally:
+                if executor is not None:
+                    executor.shutdown()
+
+        if self.cache is not None:
+            stats = self.cache.stats()
+            print(f"Score cache: {stats['hits']} hits, {stats['misses']} misses")
+
+        # A compact frame's topic mask (and escalation flags) describe the previous analysis
+        self._df = self.df.drop(columns=['topic_mask', 'escalated'], errors='ignore')
+        for column in results.columns:
+            self.df[column] = results[column]
+
+        # Per-course aggregate index, built in one pass
+        with self.metrics.stage('analyzer.aggregate', rows=len(self.df)):
+            self.aggregates = ReviewAggregates()
+            self.aggregates.update(self.df)
+        self.cascade_report = None
+        if cascade is not None:
+            self.cascade_report = CascadeReport()
+            self.cascade_report.update(self.df)
+            self.cascade_report.print_summary()
+        if self.trends is not None:
+            with self.metrics.stage('analyzer.trends', rows=len(self.df)):
+                self._merge_trends(self.df)
+        if self.index is not None:
+            with self.metrics.stage('analyzer.index', rows=len(self.df)):
+                self.index.clear(self.topic_matcher.topics)
+                for start in range(0, len(self.df), INDEX_SEGMENT_ROWS):
+                    self.index.add(self.df.iloc[start:start + INDEX_SEGMENT_ROWS], first_row=start)
+            self._index_on_df = True
 
         # Save results
-        output_path = 'results/analyzed_reviews.csv'
-        self.df.to_csv(output_path, index=False)
+        with self.metrics.stage('analyzer.write', rows=len(self.df)):
+            if output_format == 'columnar':
+                output_path = output_path or 'results/analyzed_reviews.cols'
+                write_columnar(self.df, output_path, topic_names=self.topic_matcher.topics)
+            elif output_format == 'csv':
+                output_path = output_path or 'results/analyzed_reviews.csv'
+                self.df.to_csv(output_path, index=False)
+            else:
+                raise ValueError(f"Unknown output_format: {output_format!r}")
         print(f"\nAnalysis complete! Results saved to {output_path}")
 
+        if compact:
+            self.compact()
         return self.df
 
+    def compact(self, text_buffer=False):
+        """
+        Shrink self.df in memory after analysis.
+
+        Course strings become categoricals, sentiment labels int8 category
+        codes, scores float32, and topic lists a uint64 'topic_mask' column
+        (bit order in df.attrs['topics']). Summaries, add_reviews and
+        ReviewVisualizer(df=...) work on the compact frame.
+
+        Args:
+            text_buffer: Also hold review text in one contiguous buffer (needs pyarrow)
+
+        Returns:
+            The compact DataFrame
+        """
+        self._df = compact_frame(self.df, self.topic_matcher.topics, text_buffer=text_buffer)
+        return self._df
+
+    def analyze_stream(self, chunk_size=50000, output_path='results/analyzed_reviews.csv', workers=1,
+                       cascade=False, dedup=False):
+        """
+        Analyze data_path chunk by chunk without loading the whole file.
+
+        Each chunk is cleaned, scored and tagged, appended to output_path and
+        folded into self.aggregates, so peak memory is bounded by chunk_size.
+        get_overall_statistics and get_course_summary read from the aggregates
+        afterwards without loading the file.
+
+        Args:
+            chunk_size: Number of CSV rows read and analyzed at a time
+            output_path: CSV file the analyzed rows are appended to
+            workers: Number of worker processes (None uses every core)
+            cascade: Cascade scoring as in analyze_all (True or a CascadePolicy)
+            dedup: Flag near-duplicates as in analyze_all (True or a configured
+                NearDuplicateDetector). Each chunk is clustered against the
+                reviews before it (see dedup.DuplicateIndex); reviews repeated
+                within a chunk are scored once.
+
+        Returns:
+            ReviewAggregates for the whole dataset
+        """
+        if workers is None:
+            workers = os.cpu_count() or 1
+
+        print("=" * 60)
+        print("UIUC Course Review Sentiment Analyzer (streaming)")
+        print("=" * 60)
+        print(f"Streaming reviews from {self.data_path} in chunks of {chunk_size}")
+
+        self.aggregates = ReviewAggregates()
+        trend_rows = self.trends.appended(os.path.abspath(self.data_path)) if self.trends is not None else None
+        if self.index is not None:
+            # Index rows are positions in data_path; a frame in memory is stale
+            self.index.clear(self.topic_matcher.topics)
+            self._df = None
+            self._index_on_df = True
+        self._analyze_chunks(pd.read_csv(self.data_path, chunksize=chunk_size), output_path, workers, cascade,
+                             trend_rows, dedup)
+        if trend_rows is not None and not trend_rows.finish():
+            print("Reviews already in the trend store changed; rebuilding it")
+            self.trends.clear()
+            trend_rows = self.trends.appended(os.path.abspath(self.data_path))
+            for chunk in pd.read_csv(output_path, chunksize=chunk_size):
+                trend_rows.update(chunk)
+            trend_rows.finish()
+
+        print(f"\nAnalysis complete! Results saved to {output_path}")
+        return self.aggregates
+
+    def analyze_records(self, records, batch_size=500, max_wait=2.0, output_path='results/analyzed_reviews.csv',
+                        workers=1, cascade=False, dedup=False):
+        """
+        Analyze review records while they are produced, e.g. by RedditScraper.iter_reviews.
+
+        Records are scored in batches of at most batch_size, and a batch is
+        also cut once max_wait seconds have passed since its first record,
+        so results of a slow source are written within seconds. Each batch is
+        appended to output_path and merged into self.aggregates (and
+        self.trends), so memory stays bounded by the batch size however many
+        records arrive.
+
+        Args:
+            records: Iterable of dicts with at least a 'review' key (the input CSV columns)
+            batch_size: Maximum records scored at a time
+            max_wait: Seconds a partial batch may wait for more records
+            output_path: CSV file the analyzed rows are written to (replaced)
+            workers: Number of worker processes (None uses every core)
+            cascade: Cascade scoring as in analyze_all (True or a CascadePolicy)
+            dedup: Flag near-duplicates across batches as in analyze_stream
+
+        Unlike analyze_stream, the records are merged into self.trends
+        rather than replacing it, since they are usually new reviews.
+
+        Returns:
+            ReviewAggregates of the analyzed records
+        """
+        if workers is None:
+            workers = os.cpu_count() or 1
+
+        print("=" * 60)
+        print("UIUC Course Review Sentiment Analyzer (live)")
+        print("=" * 60)
+        print(f"Analyzing incoming reviews in batches of up to {batch_size}")
+
+        self.aggregates = ReviewAggregates()
+        if self.index is not None:
+            # Index rows now count the records, which are not kept in memory
+            self.index.clear(self.topic_matcher.topics)
+            self._df = None
+            self._index_on_df = False
+        self._analyze_chunks(batch_records(records, batch_size, max_wait), output_path, workers, cascade,
+                             dedup=dedup)
+
+        print(f"\nAnalysis complete! Results saved to {output_path}")
+        return self.aggregates
+
+    def _analyze_chunks(self, chunks, output_path, workers, cascade=False, trend_rows=None, dedup=False):
+        """
+        Score DataFrame chunks, appending each to output_path and merging it into the aggregates.
+
+        Chunks go to trend_rows (TrendStore.appended) when given, else straight
+        into self.trends. With dedup, each chunk is clustered against the
+        earlier ones through a DuplicateIndex.
+        """
+        output_dir = os.path.dirname(output_path)
+        if output_dir:
+            os.makedirs(output_dir, exist_ok=True)
+
+        cascade = _cascade_policy(cascade)
+        self.cascade_report = CascadeReport() if cascade is not None else None
+
+        duplicates = None
+        if dedup:
+            duplicates = DuplicateIndex(dedup if isinstance(dedup, NearDuplicateDetector) else None)
+        executor = self._worker_pool(workers) if workers > 1 else None
+        try:
+            first = True
+            for chunk in chunks:
+                part_size = max(1, -(-len(chunk) // workers))
+                representatives = None
+                if duplicates is not None:
+                    first_row = duplicates.rows
+                    with self.metrics.stage('analyzer.dedup', rows=len(chunk)):
+                        representatives = duplicates.add(chunk['review'])
+                with self.metrics.stage('analyzer.score', rows=len(chunk)):
+                    ratings = chunk['rating'] if cascade is not None and 'rating' in chunk.columns else None
+                    if representatives is not None:
+                        # Duplicates of earlier chunks are scored themselves; their representatives are not in memory
+                        positions = np.arange(len(chunk))
+                        local = np.where(representatives >= first_row, representatives - first_row, positions)
+                        results = self._run_scoring_deduplicated(
+                            chunk['review'], local, executor, part_size, ratings, cascade
+                        )
+                        results['duplicate_of'] = representatives
+                        results['is_duplicate'] = representatives != first_row + positions
+                    else:
+                        results = self._run_scoring(chunk['review'], executor, part_size, ratings, cascade)
+                for column in results.columns:
+                    chunk[column] = results[column]
+
+                with self.metrics.stage('analyzer.write', rows=len(chunk)):
+                    chunk.to_csv(output_path, mode='w' if first else 'a', header=first, index=False)
+                with self.metrics.stage('analyzer.aggregate', rows=len(chunk)):
+                    self.aggregates.update(chunk)
+                if self.cascade_report is not None:
+                    self.cascade_report.update(chunk)
+                if trend_rows is not None:
+                    with self.metrics.stage('analyzer.trends', rows=len(chunk)):
+                        trend_rows.update(chunk)
+                elif self.trends is not None:
+                    with self.metrics.stage('analyzer.trends', rows=len(chunk)):
+                        self.trends.update(chunk)
+                if self.index is not None:
+                    with self.metrics.stage('analyzer.index', rows=len(chunk)):
+                        self.index.add(chunk)
+                first = False
+                print(f"  Analyzed {self.aggregates.total_reviews} reviews")
+        finally:
+            if executor is not None:
+                executor.shutdown()
+            if duplicates is not None:
+                duplicates.close()
+        if duplicates is not None:
+            print(f"Found {duplicates.duplicates} near-duplicate reviews")
+        if self.cascade_report is not None:
+            self.cascade_report.print_summary()
+
+    def _merge_trends(self, df):
+        """Merge the analyzed reviews appended to data_path since the last run into self.trends."""
+        if not isinstance(self.data_path, str):
+            # Without a source there is no telling which rows are new
+            self.trends.rebuild(df)
+            return
+        source = os.path.abspath(self.data_path)
+        trend_rows = self.trends.appended(source)
+        trend_rows.update(df)
+        if not trend_rows.finish():
+            print("Reviews already in the trend store changed; rebuilding it")
+            self.trends.rebuild(df, source=source)
+
+    def add_reviews(self, reviews):
+        """
+        Analyze new reviews and append them to self.df.
+
+        The aggregate index is updated with just the new rows, so summaries
+        stay current without rescanning earlier reviews.
+
+        Args:
+            reviews: DataFrame of new reviews with the input CSV columns
+
+        Returns:
+            The new reviews with their analysis columns
+        """
+        aggregates = self.get_aggregates()
+        first_row = len(self.df)
+        new = reviews.reset_index(drop=True)
+        results = self._run_scoring(new['review'])
+        for column in results.columns:
+            new[column] = results[column]
+
+        if 'topic_mask' in self.df.columns:
+            # Categories of the two frames differ, so re-encode the combined frame
+            text_buffer = self.df['review'].dtype == 'string[pyarrow]'
+            combined = pd.concat([self.df, compact_frame(new, self.topic_matcher.topics)], ignore_index=True)
+            self._df = compact_frame(combined, self.topic_matcher.topics, text_buffer=text_buffer)
+        else:
+            self._df = pd.concat([self.df, new], ignore_index=True)
+        aggregates.update(new)
+        if self.trends is not None:
+            self.trends.update(new)
+        if self.index is not None:
+            self.index.add(new, first_row=first_row)
+        return new
+
+    def search(self, query='', course=None, sentiment=None, topic=None, limit=10):
+        """
+        Find reviews with the search index, e.g. search("negative CS374 reviews mentioning exams").
+
+        Args:
+            query: Free text; course codes, sentiment words and topic names in
+                it act as filters
+            course: Only reviews of this course code
+            sentiment: Only reviews with this VADER label
+            topic: Only reviews tagged with this topic
+            limit: Maximum number of results
+
+        Returns:
+            The matching rows of self.df, best first, with a search_score
+            column (just row, score, course_code and sentiment after
+            analyze_stream or analyze_records, which do not keep the reviews
+            in memory)
+        """
+        if self.index is None:
+            raise ValueError("No search index; create the analyzer with index=SearchIndex(...)")
+        hits = self.index.search(query, course=course, sentiment=sentiment, topic=topic, limit=limit)
+        if self._df is None or not self._index_on_df:
+            return hits
+        results = self._df.iloc[hits['row'].to_numpy()].copy()
+        results['search_score'] = hits['score'].to_numpy()
+        return results
+
+    def get_aggregates(self):
+        """Per-course aggregate index, built from self.df if analysis has not produced one."""
+        if self.aggregates is None:
+            self.aggregates = ReviewAggregates()
+            self.aggregates.update(self.df)
+        return self.aggregates
+
     def get_course_summary(self, course_code):
         """Get summary statistics for a specific course."""
-        course_df = self.df[self.df['course_code'] == course_code]
-
-        if course_df.empty:
-            return None
-
-        summary = {
-            'course_code': course_code,
-            'course_name': course_df['course_name'].iloc[0],
-            'total_reviews': len(course_df),
-            'avg_rating': course_df['rating'].mean(),
-            'sentiment_distribution': course_df['sentiment_vader'].value_counts().to_dict(),
-            'common_topics': self._get_common_topics(course_df)
-        }
-
-        return summary
-
-    def _get_common_topics(self, df):
-        """Get the most common topics from a dataframe."""
-        all_topics = []
-        for topics in df['topics']:
-            if isinstance(topics, list):
-                all_topics.extend(topics)
-            else:
-                # Handle string representation of list
-                try:
-                    topics_list = eval(topics)
-                    all_topics.extend(topics_list)
-                except:
-                    pass
+        return self.get_aggregates().course_summary(course_code)
 
-        from collections import Counter
-        return dict(Counter(all_topics).most_common(5))
+    def get_all_course_summaries(self):
+        """Get summary statistics for every course, in the order courses first appear."""
+        aggregates = self.get_aggregates()
+        return [aggregates.course_summary(code) for code in aggregates.course_codes()]
 
     def get_overall_statistics(self):
         """Get overall statistics for all reviews."""
-        stats = {
-            'total_reviews': len(self.df),
-            'total_courses': self.df['course_code'].nunique(),
-            'avg_rating': self.df['rating'].mean(),
-            'sentiment_distribution': self.df['sentiment_vader'].value_counts().to_dict(),
-            'rating_by_sentiment': self.df.groupby('sentiment_vader')['rating'].mean().to_dict()
-        }
-        return stats
+        return self.get_aggregates().overall_statistics()
 
     def print_sample_results(self, n=5):
         """Print sample results."""
@@ -184,13 +827,91 @@ class CourseReviewAnalyzer:
         print("\n" + "=" * 60)
         print("OVERALL STATISTICS")
         print("=" * 60)
+        topic_sentiment = stats.pop('topic_sentiment', {})
         for key, value in stats.items():
             print(f"{key}: {value}")
+        if topic_sentiment:
+            print("topic_sentiment:")
+            for topic, topic_stats in topic_sentiment.items():
+                print(f"  {topic}: {topic_stats['avg_compound']:+.2f} avg compound over {topic_stats['mentions']} "
+                      f"mentions {topic_stats['sentiment_distribution']}")
+
+
+def batch_records(records, batch_size=500, max_wait=2.0):
+    """
+    Group an iterable of review dicts into DataFrames.
+
+    A batch is emitted when it holds batch_size records, or when a record
+    arrives more than max_wait seconds after the batch's first one. Every
+    batch has the columns of the first batch, so CSV appends stay aligned.
+
+    Args:
+        records: Iterable of dicts
+        batch_size: Maximum records per batch
+        max_wait: Seconds after which a partial batch is emitted
+
+    Yields:
+        DataFrames of at most batch_size rows
+    """
+    columns = None
+
+    def to_frame(batch):
+        frame = pd.DataFrame(batch, columns=columns)
+        if 'rating' in frame.columns:
+            # Scraped rows have None for a missing rating
+            frame['rating'] = pd.to_numeric(frame['rating'], errors='coerce')
+        return frame
+
+    batch = []
+    started = None
+    for record in records:
+        if not batch:
+            started = time.monotonic()
+        batch.append(record)
+        if len(batch) >= batch_size or time.monotonic() - started >= max_wait:
+            frame = to_frame(batch)
+            columns = list(frame.columns)
+            yield frame
+            batch = []
+    if batch:
+        yield to_frame(batch)
+
+
+# Reviews per search index segment built by analyze_all
+INDEX_SEGMENT_ROWS = 500000
+
+
+# Per-process analyzer for parallel analyze_all, built once by _init_worker
+_worker_analyzer = None
+
+
+def _init_worker(topic_keywords, lexicon_cache):
+    """Build the VADER analyzer and topic matcher once per worker process."""
+    global _worker_analyzer
+    _worker_analyzer = CourseReviewAnalyzer(topic_keywords=topic_keywords, lexicon_cache=lexicon_cache)
+
+
+def _score_chunk(reviews, textblob=True):
+    """Score one chunk of reviews inside a worker process."""
+    return _worker_analyzer._score_reviews(reviews, textblob)
+
+
+def _textblob_chunk(reviews):
+    """TextBlob polarities of one chunk of escalated reviews inside a worker process."""
+    return _worker_analyzer.scorer.textblob_polarities(reviews)
+
+
+def _cascade_policy(cascade):
+    """CascadePolicy for a cascade argument (True, False or a configured policy)."""
+    if isinstance(cascade, CascadePolicy):
+        return cascade
+    return CascadePolicy() if cascade else None
 
 
 def main():
     """Main function to run the analyzer."""
-    analyzer = CourseReviewAnalyzer()
+    metrics = metrics_from_env()
+    analyzer = CourseReviewAnalyzer(metrics=metrics, trends=TrendStore())
     analyzer.analyze_all()
     analyzer.print_sample_results()
     analyzer.print_overall_statistics()
@@ -199,12 +920,26 @@ def main():
     print("\n" + "=" * 60)
     print("COURSE SUMMARIES")
     print("=" * 60)
-    for course in analyzer.df['course_code'].unique():
-        summary = analyzer.get_course_summary(course)
-        if summary:
-            print(f"\n{summary['course_code']} - {summary['course_name']}")
-            print(f"  Reviews: {summary['total_reviews']}, Avg Rating: {summary['avg_rating']:.2f}")
-            print(f"  Sentiment: {summary['sentiment_distribution']}")
+    for summary in analyzer.get_all_course_summaries():
+        print(f"\n{summary['course_code']} - {summary['course_name']}")
+        print(f"  Reviews: {summary['total_reviews']}, Avg Rating: {summary['avg_rating']:.2f}")
+        print(f"  Sentiment: {summary['sentiment_distribution']}")
+        aspects = [f"{topic} {stats['avg_compound']:+.2f} ({stats['mentions']})"
+                   for topic, stats in summary['topic_sentiment'].items()]
+        if aspects:
+            print(f"  Topic sentiment: {', '.join(aspects)}")
+
+    alerts = analyzer.trends.detect_changes()
+    if alerts:
+        print("\n" + "=" * 60)
+        print("TREND ALERTS")
+        print("=" * 60)
+        for alert in alerts:
+            print(f"  {alert['message']}")
+
+    if metrics.enabled:
+        metrics.print_summary()
+        metrics.export()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,451 @@
+"""
+Review Scoring Service
+Long-running HTTP service that scores reviews with warm models.
+
+VADER, TextBlob and the topic matcher are loaded once at startup. Concurrent
+requests are coalesced into micro-batches (up to max_batch_size reviews, or
+whatever arrived within max_wait seconds) and scored together by a single
+worker thread. When the queue is full, requests are rejected with 503 so
+callers back off instead of piling up.
+
+Endpoints:
+    POST /score   {"review": "..."} or {"reviews": ["...", ...]}
+    GET  /stats   request counts, batch sizes, queue depth, p50/p99 latency
+    GET  /health  liveness check
+
+Usage:
+    python src/service.py --port 8080
+    python src/service.py --unix-socket /tmp/sentiment.sock
+    python src/service.py --load-test 5000 --concurrency 32
+"""
+
+import argparse
+import json
+import os
+import queue
+import socketserver
+import threading
+import time
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+
+from sentiment_analyzer import CourseReviewAnalyzer
+
+# Result fields returned for every review
+RESULT_COLUMNS = ('sentiment_vader', 'sentiment_textblob', 'vader_compound', 'textblob_polarity', 'topics')
+
+
+class Overloaded(Exception):
+    """Raised when the request queue is full."""
+
+
+class _Request:
+    """Reviews of one caller waiting for their batch to be scored."""
+
+    def __init__(self, reviews):
+        self.reviews = reviews
+        self.submitted = time.perf_counter()
+        self.done = threading.Event()
+        self.results = None
+        self.error = None
+
+
+class MicroBatcher:
+    """Coalesces concurrent scoring requests into batches for one CourseReviewAnalyzer."""
+
+    def __init__(self, analyzer=None, max_batch_size=64, max_wait=0.005, max_queue=1024,
+                 latency_window=10000):
+        """
+        Initialize the batcher (call start() to begin scoring).
+
+        Args:
+            analyzer: CourseReviewAnalyzer to score with (defaults to a new one)
+            max_batch_size: Most reviews scored in one batch
+            max_wait: Seconds to wait for more requests once a batch has started
+            max_queue: Requests allowed to wait before submit() raises Overloaded
+            latency_window: Recent request latencies kept for the percentiles
+        """
+        self.analyzer = analyzer or CourseReviewAnalyzer()
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait
+        self.queue = queue.Queue(maxsize=max_queue)
+        self.latencies = deque(maxlen=latency_window)
+        self.batch_sizes = deque(maxlen=latency_window)
+        self.requests = 0
+        self.rejected = 0
+        self.reviews = 0
+        self.batches = 0
+        self._lock = threading.Lock()
+        self._thread = None
+        self._stopping = threading.Event()
+
+    def warm_up(self):
+        """Load VADER, TextBlob and the lexicon indexes before the first request."""
+        self.analyzer.score_texts(['Great course, hard exams :)'])
+
+    def start(self):
+        """Warm the models and start the scoring thread."""
+        self.warm_up()
+        self._thread = threading.Thread(target=self._run, name='micro-batcher', daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        """Stop the scoring thread after the current batch."""
+        self._stopping.set()
+        if self._thread is not None:
+            self._thread.join()
+
+    def submit(self, reviews):
+        """
+        Queue reviews for scoring without waiting.
+
+        Args:
+            reviews: List of review texts
+
+        Returns:
+            Request whose done event is set once results are available
+
+        Raises:
+            Overloaded: If the queue is full
+        """
+        request = _Request(list(reviews))
+        try:
+            self.queue.put_nowait(request)
+        except queue.Full:
+            with self._lock:
+                self.rejected += 1
+            raise Overloaded(f"{self.queue.maxsize} requests already queued")
+        return request
+
+    def score(self, reviews, timeout=30.0):
+        """
+        Score reviews, blocking until their batch has been processed.
+
+        Args:
+            reviews: List of review texts
+            timeout: Seconds to wait for the result
+
+        Returns:
+            List of result dicts, one per review
+
+        Raises:
+            Overloaded: If the queue is full
+            TimeoutError: If the batch did not finish in time
+        """
+        request = self.submit(reviews)
+        if not request.done.wait(timeout):
+            raise TimeoutError(f"No result within {timeout}s")
+        if request.error is not None:
+            raise request.error
+        return request.results
+
+    def _collect(self):
+        """Block for the first request, then gather more until the batch is full or max_wait passes."""
+        while not self._stopping.is_set():
+            try:
+                first = self.queue.get(timeout=0.1)
+                break
+            except queue.Empty:
+                continue
+        else:
+            return []
+
+        batch = [first]
+        size = len(first.reviews)
+        deadline = time.perf_counter() + self.max_wait
+        while size < self.max_batch_size:
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                break
+            try:
+                request = self.queue.get(timeout=remaining)
+            except queue.Empty:
+                break
+            batch.append(request)
+            size += len(request.reviews)
+        return batch
+
+    def _run(self):
+        while not self._stopping.is_set():
+            batch = self._collect()
+            if batch:
+                self._process(batch)
+
+    def _process(self, batch):
+        texts = [review for request in batch for review in request.reviews]
+        try:
+            scored = self.analyzer.score_texts(texts)
+            columns = {column: scored[column].tolist() for column in RESULT_COLUMNS}
+        except Exception as error:
+            for request in batch:
+                request.error = error
+                request.done.set()
+            return
+
+        start = 0
+        finished = time.perf_counter()
+        latencies = []
+        for request in batch:
+            end = start + len(request.reviews)
+            request.results = [
+                {column: columns[column][i] for column in RESULT_COLUMNS} for i in range(start, end)
+            ]
+            start = end
+            latencies.append(finished - request.submitted)
+            request.done.set()
+
+        with self._lock:
+            self.latencies.extend(latencies)
+            self.batch_sizes.append(len(texts))
+            self.requests += len(batch)
+            self.reviews += len(texts)
+            self.batches += 1
+
+    def stats(self):
+        """Request, batch and latency statistics (latencies in milliseconds)."""
+        with self._lock:
+            latencies = np.array(self.latencies, dtype=np.float64) * 1000
+            batch_sizes = np.array(self.batch_sizes, dtype=np.float64)
+            stats = {
+                'requests': self.requests,
+                'reviews': self.reviews,
+                'batches': self.batches,
+                'rejected': self.rejected,
+                'queue_depth': self.queue.qsize(),
+                'max_batch_size': self.max_batch_size,
+                'max_wait_ms': self.max_wait * 1000
+            }
+        if len(latencies):
+            stats.update(
+                latency_p50_ms=round(float(np.percentile(latencies, 50)), 3),
+                latency_p99_ms=round(float(np.percentile(latencies, 99)), 3),
+                mean_batch_size=round(float(batch_sizes.mean()), 2)
+            )
+        return stats
+
+
+class ScoringRequestHandler(BaseHTTPRequestHandler):
+    """JSON endpoints for a MicroBatcher (set as server.batcher)."""
+
+    # Largest accepted request body
+    MAX_BODY = 1024 * 1024
+
+    def address_string(self):
+        # Unix socket peers have no host/port
+        return self.client_address[0] if isinstance(self.client_address, tuple) else 'unix'
+
+    def log_message(self, format, *args):
+        if not getattr(self.server, 'quiet', False):
+            super().log_message(format, *args)
+
+    def _send_json(self, status, payload, headers=None):
+        body = json.dumps(payload).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        if self.path == '/health':
+            self._send_json(200, {'status': 'ok'})
+        elif self.path == '/stats':
+            self._send_json(200, self.server.batcher.stats())
+        else:
+            self._send_json(404, {'error': 'not found'})
+
+    def do_POST(self):
+        if self.path != '/score':
+            self._send_json(404, {'error': 'not found'})
+            return
+
+        length = int(self.headers.get('Content-Length') or 0)
+        if length > self.MAX_BODY:
+            self._send_json(413, {'error': 'request body too large'})
+            return
+        try:
+            payload = json.loads(self.rfile.read(length) or b'{}')
+            if 'reviews' in payload:
+                reviews = payload['reviews']
+            else:
+                reviews = [payload['review']]
+            if not isinstance(reviews, list) or not all(isinstance(r, str) for r in reviews):
+                raise ValueError
+        except (ValueError, KeyError, TypeError, AttributeError):
+            self._send_json(400, {'error': 'expected {"review": str} or {"reviews": [str, ...]}'})
+            return
+
+        try:
+            results = self.server.batcher.score(reviews)
+        except Overloaded as error:
+            self._send_json(503, {'error': str(error)}, headers={'Retry-After': '1'})
+            return
+        except TimeoutError as error:
+            self._send_json(504, {'error': str(error)})
+            return
+        self._send_json(200, {'results': results})
+
+
+class ScoringHTTPServer(ThreadingHTTPServer):
+    """Threaded TCP HTTP server with a listen backlog sized for bursts of clients."""
+
+    daemon_threads = True
+    request_queue_size = 128
+
+
+class UnixHTTPServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    """HTTP server listening on a Unix domain socket."""
+
+    daemon_threads = True
+    request_queue_size = 128
+
+    def server_bind(self):
+        if os.path.exists(self.server_address):
+            os.unlink(self.server_address)
+        super().server_bind()
+        self.server_name = 'localhost'
+        self.server_port = 0
+
+
+def create_server(batcher, host='127.0.0.1', port=8080, unix_socket=None, quiet=False):
+    """
+    Create an HTTP server for a started MicroBatcher.
+
+    Args:
+        batcher: MicroBatcher serving the requests
+        host: Interface to listen on
+        port: TCP port (0 picks a free one)
+        unix_socket: Listen on this Unix socket path instead of TCP
+        quiet: Do not log every request
+
+    Returns:
+        Server; call serve_forever() to handle requests
+    """
+    if unix_socket:
+        server = UnixHTTPServer(unix_socket, ScoringRequestHandler)
+    else:
+        server = ScoringHTTPServer((host, port), ScoringRequestHandler)
+    server.batcher = batcher
+    server.quiet = quiet
+    return server
+
+
+def load_test(n_requests=2000, concurrency=16, reviews_per_request=1, seed=0, **batcher_options):
+    """
+    Load-test the service over loopback HTTP with synthetic reviews (no network needed).
+
+    Args:
+        n_requests: Total requests to send
+        concurrency: Client threads sending requests in parallel
+        reviews_per_request: Reviews in each request body
+        seed: Seed of the synthetic reviews
+        **batcher_options: Passed to MicroBatcher
+
+    Returns:
+        Dict of client-side throughput and latency plus the server's stats
+    """
+    import http.client
+
+    from benchmark import generate_reviews
+
+    reviews = generate_reviews(n_requests * reviews_per_request, seed=seed)['review'].tolist()
+    batcher = MicroBatcher(**batcher_options).start()
+    server = create_server(batcher, port=0, quiet=True)
+    port = server.server_address[1]
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    latencies = []
+    statuses = {}
+    lock = threading.Lock()
+    counter = iter(range(n_requests))
+
+    def client():
+        connection = http.client.HTTPConnection('127.0.0.1', port)
+        while True:
+            with lock:
+                index = next(counter, None)
+            if index is None:
+                break
+            body = json.dumps({'reviews': reviews[index * reviews_per_request:(index + 1) * reviews_per_request]})
+            start = time.perf_counter()
+            connection.request('POST', '/score', body, {'Content-Type': 'application/json'})
+            response = connection.getresponse()
+            response.read()
+            elapsed = time.perf_counter() - start
+            with lock:
+                latencies.append(elapsed)
+                statuses[response.status] = statuses.get(response.status, 0) + 1
+        connection.close()
+
+    start = time.perf_counter()
+    threads = [threading.Thread(target=client) for _ in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    seconds = time.perf_counter() - start
+
+    server.shutdown()
+    server.server_close()
+    batcher.stop()
+
+    latencies = np.array(latencies) * 1000
+    return {
+        'requests': n_requests,
+        'concurrency': concurrency,
+        'seconds': round(seconds, 3),
+        'requests_per_sec': round(n_requests / seconds, 1),
+        'reviews_per_sec': round(n_requests * reviews_per_request / seconds, 1),
+        'client_p50_ms': round(float(np.percentile(latencies, 50)), 3),
+        'client_p99_ms': round(float(np.percentile(latencies, 99)), 3),
+        'statuses': statuses,
+        'server': batcher.stats()
+    }
+
+
+def main():
+    """Run the scoring service, or load-test it."""
+    parser = argparse.ArgumentParser(description='Serve review sentiment and topics over HTTP.')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8080)
+    parser.add_argument('--unix-socket', help='listen on a Unix socket instead of TCP')
+    parser.add_argument('--max-batch-size', type=int, default=64, help='most reviews scored per batch')
+    parser.add_argument('--max-wait-ms', type=float, default=5.0, help='how long a batch waits to fill up')
+    parser.add_argument('--max-queue', type=int, default=1024, help='queued requests before answering 503')
+    parser.add_argument('--lexicon-cache', help='prebuilt VADER lexicon from resources.py')
+    parser.add_argument('--load-test', type=int, metavar='N', help='send N synthetic requests and report latency')
+    parser.add_argument('--concurrency', type=int, default=16, help='client threads for --load-test')
+    parser.add_argument('--quiet', action='store_true', help='do not log every request')
+    args = parser.parse_args()
+
+    options = dict(
+        analyzer=CourseReviewAnalyzer(lexicon_cache=args.lexicon_cache),
+        max_batch_size=args.max_batch_size,
+        max_wait=args.max_wait_ms / 1000,
+        max_queue=args.max_queue
+    )
+
+    if args.load_test:
+        print(json.dumps(load_test(args.load_test, args.concurrency, **options), indent=2))
+        return
+
+    batcher = MicroBatcher(**options).start()
+    server = create_server(batcher, args.host, args.port, args.unix_socket, quiet=args.quiet)
+    where = args.unix_socket or f'http://{args.host}:{server.server_address[1]}'
+    print(f"Scoring service listening on {where}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        batcher.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,176 @@
+"""
+Streaming Sketches
+Fixed-memory summaries for charting datasets too large to hold in memory.
+
+- CountMinSketch estimates item frequencies; estimates never undercount and
+  overcount by at most epsilon * total with probability 1 - delta
+- TopK keeps the k most frequent items of a count-min sketch
+- ReservoirSample keeps a uniform random sample of a stream of numbers
+
+Everything is updated one chunk of the stream at a time.
+"""
+
+import heapq
+import math
+from collections import Counter
+
+import numpy as np
+import pandas as pd
+
+
+def hash_items(items):
+    """64-bit hashes of a sequence of strings."""
+    return pd.util.hash_array(np.asarray(items, dtype=object))
+
+
+class SketchSettings:
+    """Error bounds of an approximate ReviewVisualizer."""
+
+    def __init__(self, epsilon=1e-4, delta=0.01, top_k=1000, sample_size=100000, chunk_size=200000, seed=0):
+        """
+        Initialize settings.
+
+        Args:
+            epsilon: Count-min overcount bound, as a fraction of all words counted
+            delta: Probability that a word count exceeds the epsilon bound
+            top_k: Words kept per sentiment for word clouds
+            sample_size: Ratings kept per sentiment for box plots; quartiles
+                are off by roughly 1/sqrt(sample_size) in rank
+            chunk_size: Reviews read at a time
+            seed: Seed of the sketch hashes and the reservoir sampling
+        """
+        self.epsilon = epsilon
+        self.delta = delta
+        self.top_k = top_k
+        self.sample_size = sample_size
+        self.chunk_size = chunk_size
+        self.seed = seed
+
+
+class CountMinSketch:
+    """Count-min sketch over 64-bit item hashes."""
+
+    def __init__(self, epsilon=1e-4, delta=0.01, seed=0):
+        """
+        Initialize an empty sketch.
+
+        Args:
+            epsilon: Overcount bound as a fraction of the total count
+            delta: Probability of exceeding the bound
+            seed: Seed of the row hash functions
+        """
+        self.width = int(math.ceil(math.e / epsilon))
+        self.depth = max(1, int(math.ceil(math.log(1 / delta))))
+        self.table = np.zeros((self.depth, self.width), dtype=np.int64)
+        self.total = 0
+        rng = np.random.default_rng(seed)
+        # Odd multipliers for multiply-shift hashing of each row
+        self.multipliers = rng.integers(0, 2 ** 63, size=self.depth, dtype=np.uint64) | np.uint64(1)
+
+    def _columns(self, hashes, row):
+        return (((hashes * self.multipliers[row]) >> np.uint64(32)) % np.uint64(self.width)).astype(np.int64)
+
+    def add(self, hashes, counts=None):
+        """
+        Count items.
+
+        Args:
+            hashes: uint64 array of item hashes (see hash_items)
+            counts: Occurrences of each item (defaults to 1 each)
+        """
+        hashes = np.asarray(hashes, dtype=np.uint64)
+        if counts is None:
+            counts = np.ones(len(hashes), dtype=np.int64)
+        for row in range(self.depth):
+            columns = self._columns(hashes, row)
+            self.table[row] += np.bincount(columns, weights=counts, minlength=self.width).astype(np.int64)
+        self.total += int(np.sum(counts))
+
+    def estimate(self, hashes):
+        """Estimated counts of items (never below the true counts)."""
+        hashes = np.asarray(hashes, dtype=np.uint64)
+        estimates = self.table[0, self._columns(hashes, 0)]
+        for row in range(1, self.depth):
+            estimates = np.minimum(estimates, self.table[row, self._columns(hashes, row)])
+        return estimates
+
+
+class TopK:
+    """Heavy hitters of a stream, ranked by count-min estimates."""
+
+    def __init__(self, k=1000, epsilon=1e-4, delta=0.01, seed=0):
+        """
+        Initialize an empty top-k summary.
+
+        Args:
+            k: Items to keep
+            epsilon: Count-min overcount bound (fraction of the total)
+            delta: Probability of exceeding the bound
+            seed: Seed of the sketch hashes
+        """
+        self.k = k
+        self.sketch = CountMinSketch(epsilon, delta, seed)
+        # item -> (hash, estimate)
+        self.candidates = {}
+
+    def update(self, items):
+        """Count one chunk of items (an iterable of strings)."""
+        chunk = Counter(items)
+        if not chunk:
+            return
+        uniques = list(chunk)
+        hashes = hash_items(uniques)
+        self.sketch.add(hashes, np.fromiter(chunk.values(), dtype=np.int64, count=len(chunk)))
+
+        # Re-rank current candidates and this chunk's items by their updated estimates
+        pool = {item: value[0] for item, value in self.candidates.items()}
+        pool.update(zip(uniques, hashes))
+        items = list(pool)
+        estimates = self.sketch.estimate(np.fromiter(pool.values(), dtype=np.uint64, count=len(pool)))
+        best = heapq.nlargest(self.k, range(len(items)), key=estimates.__getitem__)
+        self.candidates = {items[i]: (pool[items[i]], int(estimates[i])) for i in best}
+
+    def most_common(self, n=None):
+        """(item, estimated count) pairs, most frequent first."""
+        ranked = sorted(((item, count) for item, (_, count) in self.candidates.items()), key=lambda p: (-p[1], p[0]))
+        return ranked[:n] if n is not None else ranked
+
+
+class ReservoirSample:
+    """Uniform fixed-size sample of a stream of numbers (Algorithm R)."""
+
+    def __init__(self, size=100000, seed=0):
+        """
+        Initialize an empty reservoir.
+
+        Args:
+            size: Values kept
+            seed: Seed of the sampling
+        """
+        self.size = size
+        self.values = np.empty(size, dtype=np.float64)
+        self.seen = 0
+        self.rng = np.random.default_rng(seed)
+
+    def update(self, values):
+        """Offer one chunk of values to the sample."""
+        values = np.asarray(values, dtype=np.float64)
+        fill = min(len(values), max(0, self.size - self.seen))
+        self.values[self.seen:self.seen + fill] = values[:fill]
+        rest = values[fill:]
+        positions = self.seen + fill + np.arange(len(rest))
+        self.seen += len(values)
+        if not len(rest):
+            return
+
+        # Value i of the stream replaces a random slot with probability size / (i + 1)
+        slots = (self.rng.random(len(rest)) * (positions + 1)).astype(np.int64)
+        keep = slots < self.size
+        # Later values overwrite earlier ones drawn for the same slot, as in the sequential algorithm
+        slots, kept = slots[keep], rest[keep]
+        last = len(slots) - 1 - np.unique(slots[::-1], return_index=True)[1]
+        self.values[slots[last]] = kept[last]
+
+    def sample(self):
+        """The sampled values."""
+        return self.values[:min(self.seen, self.size)].copy()
@@ -0,0 +1,100 @@
+"""
+Reddit Sync State
+Seen post/comment IDs and per-course high-water marks backed by SQLite.
+
+RedditScraper.sync uses the store to fetch only posts newer than each
+course's watermark and to skip posts and comments it has already saved, so
+a daily refresh costs as much as the new activity rather than the full
+history. IDs are tracked per course, since one post can mention several
+courses and is kept under each of them.
+"""
+
+import os
+import sqlite3
+
+# SQLite limits the number of bound parameters per statement
+_BATCH = 500
+
+
+class SyncState:
+    """Persistent record of what an incremental Reddit sync has already saved."""
+
+    def __init__(self, path='data/reddit_sync.sqlite'):
+        """
+        Open (or create) the store.
+
+        Args:
+            path: SQLite database file (':memory:' for a throwaway store)
+        """
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self.path = path
+        self.conn = sqlite3.connect(path)
+        self.conn.execute(
+            'CREATE TABLE IF NOT EXISTS seen ('
+            'course_code TEXT, item_id TEXT, kind TEXT, created_utc REAL, '
+            'PRIMARY KEY (course_code, item_id))'
+        )
+        self.conn.execute('CREATE TABLE IF NOT EXISTS watermarks (course_code TEXT PRIMARY KEY, created_utc REAL)')
+        self.conn.commit()
+
+    def __len__(self):
+        return self.conn.execute('SELECT COUNT(*) FROM seen').fetchone()[0]
+
+    def watermark(self, course_code):
+        """created_utc of the newest post saved for a course, or None before its first sync."""
+        row = self.conn.execute(
+            'SELECT created_utc FROM watermarks WHERE course_code = ?', (course_code,)
+        ).fetchone()
+        return row[0] if row else None
+
+    def unseen(self, course_code, item_ids):
+        """
+        Filter out IDs already saved for a course.
+
+        Args:
+            course_code: Course the items were found for
+            item_ids: Reddit post or comment IDs
+
+        Returns:
+            Set of the IDs not saved yet
+        """
+        item_ids = list(dict.fromkeys(item_ids))
+        seen = set()
+        for start in range(0, len(item_ids), _BATCH):
+            batch = item_ids[start:start + _BATCH]
+            placeholders = ','.join('?' * len(batch))
+            rows = self.conn.execute(
+                f'SELECT item_id FROM seen WHERE course_code = ? AND item_id IN ({placeholders})',
+                [course_code, *batch]
+            )
+            seen.update(row[0] for row in rows)
+        return set(item_ids) - seen
+
+    def record(self, course_code, items, watermark=None):
+        """
+        Mark items as saved and advance the course's watermark, in one transaction.
+
+        Args:
+            course_code: Course the items were found for
+            items: Iterable of (item_id, kind, created_utc)
+            watermark: created_utc of the newest post fetched; the stored
+                watermark only ever moves forward
+        """
+        with self.conn:
+            self.conn.executemany(
+                'INSERT OR IGNORE INTO seen (course_code, item_id, kind, created_utc) VALUES (?, ?, ?, ?)',
+                ((course_code, item_id, kind, created_utc) for item_id, kind, created_utc in items)
+            )
+            if watermark is not None:
+                self.conn.execute(
+                    'INSERT INTO watermarks (course_code, created_utc) VALUES (?, ?) '
+                    'ON CONFLICT (course_code) DO UPDATE SET created_utc = MAX(created_utc, excluded.created_utc)',
+                    (course_code, watermark)
+                )
+
+    def close(self):
+        """Close the database connection."""
+        self.conn.close()
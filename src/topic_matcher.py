@@ -0,0 +1,172 @@
+"""
+Topic Matcher
+Single-pass multi-keyword topic tagging for course reviews.
+
+Keywords are compiled into hash tables keyed by token, so tagging a review
+costs one tokenization plus one lookup per token no matter how many topics
+or keywords are configured. Matches respect word boundaries ('work' does not
+match 'homework') and multi-word phrases such as 'office hours' are matched
+token by token.
+"""
+
+import ast
+import re
+from collections import Counter
+
+import numpy as np
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+(?:'[a-z0-9]+)*")
+
+GENERAL_TOPIC = 'general'
+
+
+def tokenize(text):
+    """Lowercase a text and split it into word tokens."""
+    return TOKEN_PATTERN.findall(text.lower())
+
+
+def iter_bits(mask):
+    """Yield the indices of the set bits of mask, lowest first."""
+    while mask:
+        low = mask & -mask
+        yield low.bit_length() - 1
+        mask ^= low
+
+
+def parse_topics(topics):
+    """Return a topics cell as a list, whether it is a list or its string repr from CSV."""
+    if isinstance(topics, list):
+        return topics
+    if isinstance(topics, str):
+        try:
+            parsed = ast.literal_eval(topics)
+        except (ValueError, SyntaxError):
+            return []
+        return list(parsed) if isinstance(parsed, (list, tuple)) else []
+    return []
+
+
+def count_topics(df, topic_names=None):
+    """
+    Count topic mentions in a DataFrame of analyzed reviews.
+
+    Works with a 'topics' column of lists (or their CSV string form) and
+    with the uint64 'topic_mask' column of columnar stores.
+
+    Args:
+        df: Analyzed reviews
+        topic_names: Bit order of topic_mask (defaults to df.attrs['topics'])
+
+    Returns:
+        Counter of topic name to number of reviews mentioning it
+    """
+    counts = Counter()
+    if 'topic_mask' in df.columns:
+        if topic_names is None:
+            topic_names = df.attrs.get('topics', [])
+        masks = df['topic_mask'].to_numpy(dtype=np.uint64)
+        for bit, name in enumerate(topic_names):
+            count = int(np.count_nonzero(masks & np.uint64(1 << bit)))
+            if count:
+                counts[name] = count
+        general = int(np.count_nonzero(masks == 0))
+        if general:
+            counts[GENERAL_TOPIC] = general
+        return counts
+
+    for topics in df['topics']:
+        counts.update(parse_topics(topics))
+    return counts
+
+
+class TopicMatcher:
+    """Matches reviews against a mapping of topic to keywords."""
+
+    def __init__(self, topic_keywords):
+        """
+        Compile the keyword tables.
+
+        Args:
+            topic_keywords: Mapping of topic name to a list of keywords or phrases
+        """
+        self.topic_keywords = {topic: list(keywords) for topic, keywords in topic_keywords.items()}
+        self.topics = list(self.topic_keywords)
+
+        # Each keyword maps to a bitmask of the topics it belongs to
+        self.unigrams = {}
+        self.phrases = {}
+        for bit, keywords in enumerate(self.topic_keywords.values()):
+            for keyword in keywords:
+                tokens = tuple(tokenize(keyword))
+                if not tokens:
+                    continue
+                if len(tokens) == 1:
+                    self.unigrams[tokens[0]] = self.unigrams.get(tokens[0], 0) | (1 << bit)
+                else:
+                    entries = self.phrases.setdefault(tokens[0], {})
+                    entries[tokens] = entries.get(tokens, 0) | (1 << bit)
+
+    def match_mask(self, text):
+        """Return a bitmask of the topics found in text (bit i is self.topics[i])."""
+        if not isinstance(text, str) or not text:
+            return 0
+
+        tokens = tokenize(text)
+        unigrams = self.unigrams
+        phrases = self.phrases
+        mask = 0
+        for i, token in enumerate(tokens):
+            mask |= unigrams.get(token, 0)
+            candidates = phrases.get(token)
+            if candidates:
+                for phrase, phrase_mask in candidates.items():
+                    if tuple(tokens[i:i + len(phrase)]) == phrase:
+                        mask |= phrase_mask
+        return mask
+
+    def topics_from_mask(self, mask):
+        """Convert a topic bitmask to a list of topic names, in topic order."""
+        if not mask:
+            return [GENERAL_TOPIC]
+        topics = self.topics
+        return [topics[bit] for bit in iter_bits(mask)]
+
+    def extract(self, text):
+        """Return the topics found in text, or ['general'] if there are none."""
+        return self.topics_from_mask(self.match_mask(text))
+
+    def match_masks(self, texts):
+        """Return the topic bitmask of every text as a list of ints."""
+        match_mask = self.match_mask
+        return [match_mask(text) for text in texts]
+
+    def extract_batch(self, texts):
+        """Return the topic list of every text."""
+        topics_from_mask = self.topics_from_mask
+        return [topics_from_mask(mask) for mask in self.match_masks(texts)]
+
+    def match_matrix(self, texts):
+        """
+        Build a sparse review x topic indicator matrix.
+
+        Args:
+            texts: Iterable of review texts
+
+        Returns:
+            scipy.sparse.csr_matrix of shape (len(texts), len(self.topics)),
+            with a 1 where a review mentions a topic. Reviews without any
+            topic have an empty row rather than a 'general' column.
+        """
+        from scipy.sparse import csr_matrix
+
+        indptr = [0]
+        indices = []
+        for mask in self.match_masks(texts):
+            indices.extend(iter_bits(mask))
+            indptr.append(len(indices))
+
+        data = np.ones(len(indices), dtype=np.int8)
+        return csr_matrix(
+            (data, np.asarray(indices, dtype=np.int32), np.asarray(indptr, dtype=np.int64)),
+            shape=(len(indptr) - 1, len(self.topics))
+        )
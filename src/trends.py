@@ -0,0 +1,405 @@
+"""
+Semester Trend Store
+Per-(course, semester) sentiment and rating aggregates backed by SQLite.
+
+Each cell holds review counts, rating sums, sentiment label counts and the
+VADER compound sum for one course in one semester. New batches of analyzed
+reviews are merged into the cells with an upsert, so nightly updates only
+touch the semesters they contain and history is never recomputed. The
+store also remembers how many rows of each source (the analyzer's input
+file) it has merged, with a digest of them, so rerunning the analysis over
+a file that grew merges just the appended rows. Trends, rolling windows and
+change alerts are computed from the cells alone.
+"""
+
+import hashlib
+import os
+import re
+import sqlite3
+
+import numpy as np
+import pandas as pd
+
+# Term order within a year
+TERMS = {'winter': 0, 'spring': 1, 'summer': 2, 'fall': 3}
+
+SEMESTER_PATTERN = re.compile(r'^\s*(winter|spring|summer|fall)\s+(\d{4})\s*$', re.IGNORECASE)
+
+# Counted columns of a cell, in table order
+CELL_COLUMNS = ('reviews', 'rating_sum', 'rating_count', 'positive', 'neutral', 'negative', 'compound_sum')
+
+
+def semester_key(semester):
+    """
+    Chronological sort key of a semester name such as 'Fall 2024'.
+
+    Unrecognized names sort after every recognized semester, alphabetically.
+    """
+    match = SEMESTER_PATTERN.match(str(semester))
+    if match is None:
+        return (1, 0, 0, str(semester))
+    return (0, int(match.group(2)), TERMS[match.group(1).lower()], '')
+
+
+def _row_hashes(df, sentiment_column):
+    """Hash of each row's trend inputs, stable across CSV round trips and compact frames."""
+    columns = {
+        'course_code': df['course_code'].astype(str).to_numpy(),
+        'semester': df['semester'].astype(str).to_numpy(),
+        'rating': np.round(df['rating'].to_numpy(dtype=float), 6),
+        'label': df[sentiment_column].astype(str).to_numpy()
+    }
+    if 'vader_compound' in df.columns:
+        columns['compound'] = np.round(df['vader_compound'].to_numpy(dtype=float), 6)
+    if 'is_duplicate' in df.columns:
+        columns['is_duplicate'] = df['is_duplicate'].to_numpy(dtype=bool)
+    return pd.util.hash_pandas_object(pd.DataFrame(columns), index=False).to_numpy()
+
+
+def _add_rates(cells):
+    """Derive averages and sentiment shares from summed cell counts."""
+    reviews = cells['reviews'].replace(0, np.nan)
+    cells['avg_rating'] = cells['rating_sum'] / cells['rating_count'].replace(0, np.nan)
+    cells['positive_share'] = cells['positive'] / reviews
+    cells['negative_share'] = cells['negative'] / reviews
+    # Share of positive minus share of negative reviews, from -1 to 1
+    cells['net_sentiment'] = cells['positive_share'] - cells['negative_share']
+    cells['avg_compound'] = cells['compound_sum'] / reviews
+    return cells
+
+
+class TrendStore:
+    """Incrementally updated per-(course, semester) aggregates."""
+
+    def __init__(self, path='results/trends.sqlite', sentiment_column='sentiment_vader'):
+        """
+        Open (or create) the store.
+
+        Args:
+            path: SQLite database file (':memory:' for a throwaway store)
+            sentiment_column: Label column counted into the sentiment totals
+        """
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self.path = path
+        self.sentiment_column = sentiment_column
+        self.conn = sqlite3.connect(path)
+        self.conn.execute(
+            'CREATE TABLE IF NOT EXISTS cells ('
+            'course_code TEXT, semester TEXT, course_name TEXT, '
+            'reviews INTEGER, rating_sum REAL, rating_count INTEGER, '
+            'positive INTEGER, neutral INTEGER, negative INTEGER, compound_sum REAL, '
+            'PRIMARY KEY (course_code, semester))'
+        )
+        self.conn.execute('CREATE TABLE IF NOT EXISTS batches (batch_id TEXT PRIMARY KEY)')
+        self.conn.execute('CREATE TABLE IF NOT EXISTS sources (source TEXT PRIMARY KEY, rows INTEGER, digest TEXT)')
+        self.conn.commit()
+
+    def __len__(self):
+        return self.conn.execute('SELECT COUNT(*) FROM cells').fetchone()[0]
+
+    def clear(self):
+        """Drop every cell, applied batch id and source."""
+        with self.conn:
+            self.conn.execute('DELETE FROM cells')
+            self.conn.execute('DELETE FROM batches')
+            self.conn.execute('DELETE FROM sources')
+
+    def update(self, df, batch_id=None):
+        """
+        Merge a batch of analyzed reviews into the store.
+
+        Args:
+            df: DataFrame with course_code, course_name, semester, rating and
+                the sentiment column (vader_compound is summed when present);
+                rows flagged in an is_duplicate column and rows without a
+                course or semester are skipped
+            batch_id: Identifier of the batch; a batch already applied under
+                the same id is ignored, so reruns of a nightly job are safe
+
+        Returns:
+            Number of reviews merged
+        """
+        return self._merge(df, batch_id=batch_id)
+
+    def _merge(self, df, batch_id=None, source=None):
+        """update(), also recording (source, rows, digest) progress in the same transaction."""
+        if batch_id is not None:
+            applied = self.conn.execute('SELECT 1 FROM batches WHERE batch_id = ?', (batch_id,)).fetchone()
+            if applied:
+                return 0
+
+        if 'is_duplicate' in df.columns:
+            df = df[~df['is_duplicate'].to_numpy(dtype=bool)]
+        df = df[df['course_code'].notna().to_numpy() & df['semester'].notna().to_numpy()]
+
+        labels = df[self.sentiment_column].astype(str).to_numpy()
+        frame = pd.DataFrame({
+            'course_code': df['course_code'].astype(str).to_numpy(),
+            'semester': df['semester'].astype(str).to_numpy(),
+            'course_name': df['course_name'].astype(object).to_numpy(),
+            'rating': df['rating'].to_numpy(dtype=float),
+            'positive': labels == 'Positive',
+            'neutral': labels == 'Neutral',
+            'negative': labels == 'Negative',
+            'compound': df['vader_compound'].to_numpy(dtype=float) if 'vader_compound' in df.columns else 0.0
+        })
+        cells = frame.groupby(['course_code', 'semester'], sort=False).agg(
+            course_name=('course_name', 'first'),
+            reviews=('rating', 'size'),
+            rating_sum=('rating', 'sum'),
+            rating_count=('rating', 'count'),
+            positive=('positive', 'sum'),
+            neutral=('neutral', 'sum'),
+            negative=('negative', 'sum'),
+            compound_sum=('compound', 'sum')
+        )
+
+        rows = [
+            (code, semester, None if pd.isna(row.course_name) else str(row.course_name), int(row.reviews),
+             float(row.rating_sum), int(row.rating_count), int(row.positive), int(row.neutral),
+             int(row.negative), float(row.compound_sum))
+            for (code, semester), row in zip(cells.index, cells.itertuples(index=False))
+        ]
+        with self.conn:
+            self.conn.executemany(
+                'INSERT INTO cells (course_code, semester, course_name, reviews, rating_sum, rating_count, '
+                'positive, neutral, negative, compound_sum) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?) '
+                'ON CONFLICT (course_code, semester) DO UPDATE SET '
+                'course_name = COALESCE(course_name, excluded.course_name), '
+                + ', '.join(f'{column} = {column} + excluded.{column}' for column in CELL_COLUMNS),
+                rows
+            )
+            if batch_id is not None:
+                self.conn.execute('INSERT INTO batches (batch_id) VALUES (?)', (batch_id,))
+            if source is not None:
+                self._record_source(*source)
+        return len(frame)
+
+    def _record_source(self, source, rows, digest):
+        self.conn.execute(
+            'INSERT INTO sources (source, rows, digest) VALUES (?, ?, ?) '
+            'ON CONFLICT (source) DO UPDATE SET rows = excluded.rows, digest = excluded.digest',
+            (source, rows, digest)
+        )
+
+    def source_state(self, source):
+        """(rows merged, digest of those rows) of a source, or (0, None) if it was never merged."""
+        row = self.conn.execute('SELECT rows, digest FROM sources WHERE source = ?', (source,)).fetchone()
+        return (row[0], row[1]) if row else (0, None)
+
+    def appended(self, source):
+        """
+        Start merging the rows a source gained since the store last saw it.
+
+        Args:
+            source: Identifier of an append-only sequence of analyzed reviews,
+                such as the absolute path of the analyzer's input file
+
+        Returns:
+            AppendedRows to feed the source's rows to, in order
+        """
+        return AppendedRows(self, source)
+
+    def rebuild(self, df, source=None):
+        """
+        Replace the store's contents with aggregates of df.
+
+        This is the repair path: use it when reviews already merged were
+        changed or rescored. Pass source to resume append-only merging of
+        that source afterwards.
+        """
+        self.clear()
+        if source is None:
+            self.update(df)
+            return
+        rows = self.appended(source)
+        rows.update(df)
+        rows.finish()
+
+    def cells(self, course_code=None):
+        """
+        Stored cells in chronological order.
+
+        Args:
+            course_code: Only this course's cells (defaults to every course)
+
+        Returns:
+            DataFrame of course_code, semester, course_name and the counted columns
+        """
+        query = 'SELECT course_code, semester, course_name, ' + ', '.join(CELL_COLUMNS) + ' FROM cells'
+        params = ()
+        if course_code is not None:
+            query += ' WHERE course_code = ?'
+            params = (course_code,)
+        cells = pd.DataFrame(
+            self.conn.execute(query, params).fetchall(),
+            columns=['course_code', 'semester', 'course_name', *CELL_COLUMNS]
+        )
+        keys = [(semester_key(semester), code) for semester, code in zip(cells['semester'], cells['course_code'])]
+        order = sorted(range(len(cells)), key=keys.__getitem__)
+        return cells.iloc[order].reset_index(drop=True)
+
+    def semesters(self):
+        """Every semester in the store, oldest first."""
+        rows = self.conn.execute('SELECT DISTINCT semester FROM cells').fetchall()
+        return sorted((row[0] for row in rows), key=semester_key)
+
+    def course_trend(self, course_code, window=1):
+        """
+        Sentiment and rating trend of one course.
+
+        Args:
+            course_code: Course to report
+            window: Number of consecutive semesters (with reviews) pooled into
+                each row; 1 reports every semester on its own
+
+        Returns:
+            DataFrame indexed by semester with reviews, avg_rating,
+            positive_share, negative_share, net_sentiment and avg_compound
+            (empty if the course has no reviews)
+        """
+        cells = self.cells(course_code)
+        counts = cells.set_index('semester')[list(CELL_COLUMNS)]
+        if window > 1:
+            counts = counts.rolling(window, min_periods=1).sum()
+        return _add_rates(counts.copy())[
+            ['reviews', 'avg_rating', 'positive_share', 'negative_share', 'net_sentiment', 'avg_compound']
+        ]
+
+    def overall_trend(self):
+        """Sentiment and rating trend of all courses combined, indexed by semester."""
+        cells = self.cells()
+        counts = cells.groupby('semester', sort=False)[list(CELL_COLUMNS)].sum()
+        return _add_rates(counts)[
+            ['reviews', 'avg_rating', 'positive_share', 'negative_share', 'net_sentiment', 'avg_compound']
+        ]
+
+    def detect_changes(self, semester=None, window=3, min_reviews=5, sentiment_threshold=0.3,
+                       rating_threshold=0.75):
+        """
+        Find courses whose sentiment or rating moved sharply in a semester.
+
+        Each course's semester is compared with its pooled previous `window`
+        semesters that have reviews.
+
+        Args:
+            semester: Semester to check (defaults to the latest in the store)
+            window: Earlier semesters pooled into the baseline
+            min_reviews: Reviews required in both the semester and the baseline
+            sentiment_threshold: Change in net sentiment (-1 to 1) that raises an alert
+            rating_threshold: Change in average rating (1 to 5) that raises an alert
+
+        Returns:
+            List of alert dicts (course_code, course_name, semester, metric,
+            baseline, current, change, message), largest relative change first
+        """
+        if semester is None:
+            semesters = self.semesters()
+            if not semesters:
+                return []
+            semester = semesters[-1]
+        target = semester_key(semester)
+
+        alerts = []
+        for course_code, cells in self.cells().groupby('course_code', sort=False):
+            keys = [semester_key(s) for s in cells['semester']]
+            current = cells[[key == target for key in keys]]
+            baseline = cells[[key < target for key in keys]].tail(window)
+            if current.empty or baseline.empty:
+                continue
+            now = _add_rates(current[list(CELL_COLUMNS)].sum().to_frame().T)
+            before = _add_rates(baseline[list(CELL_COLUMNS)].sum().to_frame().T)
+            if now['reviews'].iat[0] < min_reviews or before['reviews'].iat[0] < min_reviews:
+                continue
+
+            for metric, threshold, label, fmt in (
+                ('net_sentiment', sentiment_threshold, 'sentiment', '+.2f'),
+                ('avg_rating', rating_threshold, 'average rating', '.2f')
+            ):
+                old, new = before[metric].iat[0], now[metric].iat[0]
+                if pd.isna(old) or pd.isna(new) or abs(new - old) < threshold:
+                    continue
+                direction = 'rose' if new > old else 'dropped'
+                # Ranked by how far past its threshold each change is
+                alerts.append((abs(new - old) / threshold, {
+                    'course_code': course_code,
+                    'course_name': cells['course_name'].iat[-1],
+                    'semester': semester,
+                    'metric': metric,
+                    'baseline': float(old),
+                    'current': float(new),
+                    'change': float(new - old),
+                    'message': f"{label} for {course_code} {direction} sharply in {semester} "
+                               f"({old:{fmt}} -> {new:{fmt}} vs. previous {len(baseline)} semesters)"
+                }))
+
+        alerts.sort(key=lambda entry: entry[0], reverse=True)
+        return [alert for _, alert in alerts]
+
+    def close(self):
+        """Close the database connection."""
+        self.conn.close()
+
+
+class AppendedRows:
+    """
+    Merges the rows appended to a source since a TrendStore last saw it.
+
+    Rows up to the count the store remembers are only hashed; the rest are
+    merged, with the source's progress recorded in the same transaction. If
+    the remembered rows no longer match their digest (the source was
+    rewritten or rescored), or the store already holds cells but none from
+    this source (it may hold the same reviews under another name), nothing
+    more is merged and finish() returns False so the caller can rebuild.
+    """
+
+    def __init__(self, store, source):
+        self.store = store
+        self.source = source
+        self.known_rows, self.known_digest = store.source_state(source)
+        self.rows = 0
+        self.merged = 0
+        self.digest = hashlib.sha1()
+        # Cells the store holds from elsewhere may overlap this source's rows
+        self.stale = self.known_rows == 0 and len(store) > 0
+
+    def update(self, df):
+        """
+        Feed the next rows of the source.
+
+        Returns:
+            Number of reviews merged
+        """
+        if self.stale:
+            return 0
+        hashes = _row_hashes(df, self.store.sentiment_column)
+        start = self.rows
+        split = min(len(df), max(0, self.known_rows - start))
+        self.rows += len(df)
+        self.digest.update(hashes[:split].tobytes())
+        if split and start + split == self.known_rows and self.digest.hexdigest() != self.known_digest:
+            self.stale = True
+            return 0
+        if split == len(df):
+            return 0
+        self.digest.update(hashes[split:].tobytes())
+        merged = self.store._merge(df.iloc[split:], source=(self.source, self.rows, self.digest.hexdigest()))
+        self.merged += merged
+        return merged
+
+    def finish(self):
+        """
+        Whether the source's earlier rows were unchanged (so the store is now current).
+
+        False means the caller should rebuild the store from the whole source.
+        """
+        if self.rows < self.known_rows:
+            self.stale = True
+        if self.stale:
+            return False
+        with self.store.conn:
+            self.store._record_source(self.source, self.rows, self.digest.hexdigest())
+        return True
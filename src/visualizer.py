@@ -1,247 +1,688 @@
 """
 UIUC Course Review Visualizer
 Generates visualizations from analyzed course reviews.
+
+Each chart is split into a data step, which reduces the reviews to the small
+summary the chart needs, and a render step that only draws that summary.
+generate_all() fingerprints every chart's summary and skips charts whose
+image is already up to date, and can render the rest in a process pool.
+
+In approximate mode the reviews are read once, chunk by chunk, into fixed-
+size sketches (see sketches.py): word clouds come from count-min top-k
+summaries and box plots from reservoir samples, so memory does not grow
+with the number of reviews. Counts and averages stay exact.
 """
 
 import pandas as pd
+import matplotlib
 import matplotlib.pyplot as plt
 import seaborn as sns
-from wordcloud import WordCloud
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from matplotlib import cbook
+from wordcloud import STOPWORDS, WordCloud
+import hashlib
+import json
 import os
+import re
+
+from columnar import ColumnarStore, is_columnar
+from instrumentation import NULL_METRICS, metrics_from_env
+from sketches import ReservoirSample, SketchSettings, TopK
+from topic_matcher import count_topics
+from trends import TrendStore
+
+# Color scheme
+COLORS = {
+    'Positive': '#2ecc71',  # Green
+    'Neutral': '#95a5a6',   # Gray
+    'Negative': '#e74c3c'   # Red
+}
+
+SENTIMENT_ORDER = ['Positive', 'Neutral', 'Negative']
+
+# Bump whenever a renderer changes so cached charts are redrawn
+RENDER_VERSION = 1
+
+WORD_PATTERN = re.compile(r"\w[\w']*")
+
+# Most frequent words handed to WordCloud (it draws at most max_words=100)
+WORDCLOUD_VOCABULARY = 1000
+
+# Courses with the most reviews drawn on the semester trend chart
+TREND_COURSES = 8
+
+
+def cloud_words(texts):
+    """
+    Yield the words of reviews as a word cloud counts them.
+
+    Drops trailing 's, numbers and stopwords and folds case, as the first
+    steps of WordCloud.process_text do. Its later steps, which need counts
+    over all reviews, are skipped: plurals are not merged into their
+    singular ('exam' and 'exams' are separate words) and no collocation
+    bigrams ('office hours') are counted.
+    """
+    stopwords = {word.lower() for word in STOPWORDS}
+    for text in texts:
+        if not isinstance(text, str):
+            continue
+        for word in WORD_PATTERN.findall(text.lower()):
+            if word.endswith("'s"):
+                word = word[:-2]
+            if word and not word.isdigit() and word not in stopwords:
+                yield word
+
+
+def word_frequencies(texts, counter=None):
+    """
+    Count words for a word cloud, one review at a time.
+
+    Args:
+        texts: Iterable of review texts
+        counter: Counter to update (a new one by default)
+
+    Returns:
+        Counter of lowercase word to frequency
+    """
+    counter = counter if counter is not None else Counter()
+    counter.update(cloud_words(texts))
+    return counter
+
+
+def _box_stats(ratings):
+    """Box plot summary of an array of ratings."""
+    box = cbook.boxplot_stats(ratings, whis=1.5)[0]
+    return {
+        'med': float(box['med']), 'q1': float(box['q1']), 'q3': float(box['q3']),
+        'whislo': float(box['whislo']), 'whishi': float(box['whishi']),
+        'fliers': sorted(set(float(f) for f in box['fliers']))
+    }
 
 
-class ReviewVisualizer:
-    """Generates visualizations for course review analysis."""
+def _wordcloud_chart(name):
+    """Sentiment label, colormap and title of a word cloud chart."""
+    label, colormap = ('Positive', 'Greens') if name == 'wordcloud_positive' else ('Negative', 'Reds')
+    return label, colormap, f'Word Cloud - {label} Reviews'
 
-    # Color scheme
-    COLORS = {
-        'Positive': '#2ecc71',  # Green
-        'Neutral': '#95a5a6',   # Gray
-        'Negative': '#e74c3c'   # Red
-    }
 
-    def __init__(self, data_path='results/analyzed_reviews.csv'):
-        """Initialize visualizer with analyzed data."""
-        self.data_path = data_path
-        self.df = pd.read_csv(data_path)
-        self.output_dir = 'visualizations'
+def _finish(output_path, dpi):
+    """Save and close the current figure."""
+    plt.tight_layout()
+    plt.savefig(output_path, dpi=dpi)
+    plt.close()
 
-        # Create output directory if it doesn't exist
-        os.makedirs(self.output_dir, exist_ok=True)
 
-        # Set style
-        plt.style.use('seaborn-v0_8-whitegrid')
-        sns.set_palette([self.COLORS['Positive'], self.COLORS['Neutral'], self.COLORS['Negative']])
+def _render_sentiment_distribution(data, output_path, dpi):
+    plt.figure(figsize=(10, 6))
 
-    def plot_sentiment_distribution(self):
-        """Create bar chart of overall sentiment distribution."""
-        plt.figure(figsize=(10, 6))
+    sentiment_counts = pd.Series(data['counts'], index=data['labels'])
+    colors = [COLORS.get(s, '#333333') for s in sentiment_counts.index]
 
-        sentiment_counts = self.df['sentiment_vader'].value_counts()
-        colors = [self.COLORS.get(s, '#333333') for s in sentiment_counts.index]
+    ax = sentiment_counts.plot(kind='bar', color=colors, edgecolor='black')
+    plt.title('Overall Sentiment Distribution', fontsize=14, fontweight='bold')
+    plt.xlabel('Sentiment', fontsize=12)
+    plt.ylabel('Number of Reviews', fontsize=12)
+    plt.xticks(rotation=0)
 
-        ax = sentiment_counts.plot(kind='bar', color=colors, edgecolor='black')
-        plt.title('Overall Sentiment Distribution', fontsize=14, fontweight='bold')
-        plt.xlabel('Sentiment', fontsize=12)
-        plt.ylabel('Number of Reviews', fontsize=12)
-        plt.xticks(rotation=0)
+    # Add value labels on bars
+    for i, v in enumerate(sentiment_counts.values):
+        ax.text(i, v + 0.5, str(v), ha='center', fontweight='bold')
 
-        # Add value labels on bars
-        for i, v in enumerate(sentiment_counts.values):
-            ax.text(i, v + 0.5, str(v), ha='center', fontweight='bold')
+    _finish(output_path, dpi)
 
-        plt.tight_layout()
-        plt.savefig(f'{self.output_dir}/sentiment_distribution.png', dpi=300)
-        plt.close()
-        print("Created: sentiment_distribution.png")
 
-    def plot_course_comparison(self):
-        """Create stacked bar chart comparing sentiment across courses."""
-        plt.figure(figsize=(12, 6))
+def _render_course_comparison(data, output_path, dpi):
+    plt.figure(figsize=(12, 6))
 
-        # Calculate sentiment percentages per course
-        course_sentiment = pd.crosstab(
-            self.df['course_code'],
-            self.df['sentiment_vader'],
-            normalize='index'
-        ) * 100
+    course_sentiment = pd.DataFrame(data['values'], index=data['courses'], columns=data['sentiments'])
+    colors = [COLORS.get(c, '#333333') for c in course_sentiment.columns]
+    course_sentiment.plot(kind='bar', stacked=True, color=colors, edgecolor='black', ax=plt.gca())
 
-        # Reorder columns
-        cols = ['Positive', 'Neutral', 'Negative']
-        course_sentiment = course_sentiment.reindex(columns=[c for c in cols if c in course_sentiment.columns])
+    plt.title('Sentiment Distribution by Course', fontsize=14, fontweight='bold')
+    plt.xlabel('Course Code', fontsize=12)
+    plt.ylabel('Percentage (%)', fontsize=12)
+    plt.legend(title='Sentiment', bbox_to_anchor=(1.02, 1), loc='upper left')
+    plt.xticks(rotation=45, ha='right')
 
-        colors = [self.COLORS.get(c, '#333333') for c in course_sentiment.columns]
-        course_sentiment.plot(kind='bar', stacked=True, color=colors, edgecolor='black')
+    _finish(output_path, dpi)
 
-        plt.title('Sentiment Distribution by Course', fontsize=14, fontweight='bold')
-        plt.xlabel('Course Code', fontsize=12)
-        plt.ylabel('Percentage (%)', fontsize=12)
-        plt.legend(title='Sentiment', bbox_to_anchor=(1.02, 1), loc='upper left')
-        plt.xticks(rotation=45, ha='right')
 
-        plt.tight_layout()
-        plt.savefig(f'{self.output_dir}/course_comparison.png', dpi=300)
-        plt.close()
-        print("Created: course_comparison.png")
+def _render_rating_vs_sentiment(data, output_path, dpi):
+    plt.figure(figsize=(10, 6))
+    ax = plt.gca()
 
-    def plot_rating_vs_sentiment(self):
-        """Create box plot comparing ratings by sentiment."""
-        plt.figure(figsize=(10, 6))
+    # Box statistics are precomputed, so only the summary is drawn
+    artists = ax.bxp(data['stats'], patch_artist=True, widths=0.8)
+    for patch, sentiment in zip(artists['boxes'], data['sentiments']):
+        patch.set_facecolor(COLORS.get(sentiment, '#333333'))
+        patch.set_edgecolor('#3f3f3f')
+    for median in artists['medians']:
+        median.set_color('#3f3f3f')
+    ax.set_xticks(range(1, len(data['sentiments']) + 1), data['sentiments'])
 
-        order = ['Positive', 'Neutral', 'Negative']
-        colors = [self.COLORS.get(s, '#333333') for s in order if s in self.df['sentiment_vader'].unique()]
+    plt.title('Rating Distribution by Sentiment', fontsize=14, fontweight='bold')
+    plt.xlabel('Sentiment', fontsize=12)
+    plt.ylabel('Rating (1-5)', fontsize=12)
 
-        sns.boxplot(
-            data=self.df,
-            x='sentiment_vader',
-            y='rating',
-            order=[o for o in order if o in self.df['sentiment_vader'].unique()],
-            palette=colors
-        )
+    _finish(output_path, dpi)
 
-        plt.title('Rating Distribution by Sentiment', fontsize=14, fontweight='bold')
-        plt.xlabel('Sentiment', fontsize=12)
-        plt.ylabel('Rating (1-5)', fontsize=12)
 
-        plt.tight_layout()
-        plt.savefig(f'{self.output_dir}/rating_vs_sentiment.png', dpi=300)
-        plt.close()
-        print("Created: rating_vs_sentiment.png")
+def _render_course_ratings(data, output_path, dpi):
+    plt.figure(figsize=(12, 6))
 
-    def plot_course_ratings(self):
-        """Create bar chart of average ratings by course."""
-        plt.figure(figsize=(12, 6))
+    avg_ratings = pd.Series(data['ratings'], index=data['courses'])
 
-        avg_ratings = self.df.groupby('course_code')['rating'].mean().sort_values(ascending=False)
+    colors = plt.cm.RdYlGn([(r - 1) / 4 for r in avg_ratings.values])
+    ax = avg_ratings.plot(kind='bar', color=colors, edgecolor='black')
 
-        colors = plt.cm.RdYlGn([(r - 1) / 4 for r in avg_ratings.values])
-        ax = avg_ratings.plot(kind='bar', color=colors, edgecolor='black')
+    plt.title('Average Rating by Course', fontsize=14, fontweight='bold')
+    plt.xlabel('Course Code', fontsize=12)
+    plt.ylabel('Average Rating', fontsize=12)
+    plt.ylim(0, 5.5)
+    plt.axhline(y=avg_ratings.mean(), color='red', linestyle='--', label=f'Overall Avg: {avg_ratings.mean():.2f}')
+    plt.legend()
+    plt.xticks(rotation=45, ha='right')
 
-        plt.title('Average Rating by Course', fontsize=14, fontweight='bold')
-        plt.xlabel('Course Code', fontsize=12)
-        plt.ylabel('Average Rating', fontsize=12)
-        plt.ylim(0, 5.5)
-        plt.axhline(y=avg_ratings.mean(), color='red', linestyle='--', label=f'Overall Avg: {avg_ratings.mean():.2f}')
-        plt.legend()
-        plt.xticks(rotation=45, ha='right')
+    # Add value labels
+    for i, v in enumerate(avg_ratings.values):
+        ax.text(i, v + 0.1, f'{v:.1f}', ha='center', fontsize=9)
 
-        # Add value labels
-        for i, v in enumerate(avg_ratings.values):
-            ax.text(i, v + 0.1, f'{v:.1f}', ha='center', fontsize=9)
+    _finish(output_path, dpi)
 
-        plt.tight_layout()
-        plt.savefig(f'{self.output_dir}/course_ratings.png', dpi=300)
-        plt.close()
-        print("Created: course_ratings.png")
 
-    def plot_wordcloud_positive(self):
-        """Create word cloud from positive reviews."""
-        positive_text = ' '.join(self.df[self.df['sentiment_vader'] == 'Positive']['review'].astype(str))
+def _render_wordcloud(data, output_path, dpi):
+    wordcloud = WordCloud(
+        width=800,
+        height=400,
+        background_color='white',
+        colormap=data['colormap'],
+        max_words=100
+    ).generate_from_frequencies(data['frequencies'])
 
-        if not positive_text.strip():
-            print("Skipped: wordcloud_positive.png (no positive reviews)")
-            return
+    plt.figure(figsize=(12, 6))
+    plt.imshow(wordcloud, interpolation='bilinear')
+    plt.axis('off')
+    plt.title(data['title'], fontsize=14, fontweight='bold')
 
-        wordcloud = WordCloud(
-            width=800,
-            height=400,
-            background_color='white',
-            colormap='Greens',
-            max_words=100
-        ).generate(positive_text)
+    _finish(output_path, dpi)
 
-        plt.figure(figsize=(12, 6))
-        plt.imshow(wordcloud, interpolation='bilinear')
-        plt.axis('off')
-        plt.title('Word Cloud - Positive Reviews', fontsize=14, fontweight='bold')
 
-        plt.tight_layout()
-        plt.savefig(f'{self.output_dir}/wordcloud_positive.png', dpi=300)
-        plt.close()
-        print("Created: wordcloud_positive.png")
+def _render_topic_distribution(data, output_path, dpi):
+    plt.figure(figsize=(10, 6))
 
-    def plot_wordcloud_negative(self):
-        """Create word cloud from negative reviews."""
-        negative_text = ' '.join(self.df[self.df['sentiment_vader'] == 'Negative']['review'].astype(str))
+    topics = data['topics']
+    counts = data['counts']
 
-        if not negative_text.strip():
-            print("Skipped: wordcloud_negative.png (no negative reviews)")
-            return
+    colors = plt.cm.viridis([i / len(topics) for i in range(len(topics))])
 
-        wordcloud = WordCloud(
-            width=800,
-            height=400,
-            background_color='white',
-            colormap='Reds',
-            max_words=100
-        ).generate(negative_text)
+    plt.barh(topics, counts, color=colors, edgecolor='black')
+    plt.title('Topic Distribution in Reviews', fontsize=14, fontweight='bold')
+    plt.xlabel('Number of Mentions', fontsize=12)
+    plt.ylabel('Topic', fontsize=12)
 
-        plt.figure(figsize=(12, 6))
-        plt.imshow(wordcloud, interpolation='bilinear')
-        plt.axis('off')
-        plt.title('Word Cloud - Negative Reviews', fontsize=14, fontweight='bold')
+    # Add value labels
+    for i, v in enumerate(counts):
+        plt.text(v + 0.5, i, str(v), va='center')
 
-        plt.tight_layout()
-        plt.savefig(f'{self.output_dir}/wordcloud_negative.png', dpi=300)
-        plt.close()
-        print("Created: wordcloud_negative.png")
+    _finish(output_path, dpi)
 
-    def plot_topic_distribution(self):
-        """Create horizontal bar chart of topic frequencies."""
-        # Extract all topics
-        all_topics = []
-        for topics in self.df['topics']:
-            if isinstance(topics, list):
-                all_topics.extend(topics)
+
+def _render_semester_trends(data, output_path, dpi):
+    plt.figure(figsize=(12, 6))
+
+    semesters = data['semesters']
+    positions = range(len(semesters))
+    # The seaborn palette only has the three sentiment colors, so courses use tab10
+    for i, (course, values) in enumerate(data['courses'].items()):
+        series = pd.Series(values, index=positions, dtype=float)
+        plt.plot(series.index, series.values, marker='o', linewidth=1.5, color=plt.cm.tab10(i % 10), label=course)
+    overall = pd.Series(data['overall'], index=positions, dtype=float)
+    plt.plot(overall.index, overall.values, color='black', linestyle='--', linewidth=2.5, label='All courses')
+
+    plt.title('Net Sentiment by Semester', fontsize=14, fontweight='bold')
+    plt.xlabel('Semester', fontsize=12)
+    plt.ylabel('Positive share - Negative share', fontsize=12)
+    plt.ylim(-1.05, 1.05)
+    plt.axhline(y=0, color='#95a5a6', linewidth=1)
+    plt.xticks(list(positions), semesters, rotation=45, ha='right')
+    plt.legend(title='Course', bbox_to_anchor=(1.02, 1), loc='upper left')
+
+    _finish(output_path, dpi)
+
+
+# Chart name -> (renderer, message printed when there is nothing to draw)
+CHARTS = {
+    'sentiment_distribution': (_render_sentiment_distribution, 'no reviews'),
+    'course_comparison': (_render_course_comparison, 'no reviews'),
+    'rating_vs_sentiment': (_render_rating_vs_sentiment, 'no rated reviews'),
+    'course_ratings': (_render_course_ratings, 'no rated reviews'),
+    'wordcloud_positive': (_render_wordcloud, 'no positive reviews'),
+    'wordcloud_negative': (_render_wordcloud, 'no negative reviews'),
+    'topic_distribution': (_render_topic_distribution, 'no topics found'),
+    'semester_trends': (_render_semester_trends, 'no trend store'),
+}
+
+
+def _init_render_worker():
+    """Use the non-interactive Agg backend in chart worker processes."""
+    matplotlib.use('Agg', force=True)
+    plt.style.use('seaborn-v0_8-whitegrid')
+
+
+def _render_chart(name, data, output_path, dpi):
+    """Render one chart from its precomputed data (runs in worker processes too)."""
+    renderer, _ = CHARTS[name]
+    renderer(data, output_path, dpi)
+    return name
+
+
+class ReviewVisualizer:
+    """Generates visualizations for course review analysis."""
+
+    COLORS = COLORS
+
+    # Resolution of saved charts
+    DPI = 300
+
+    # Chart fingerprints from the last render, stored in the output directory
+    FINGERPRINT_FILE = '.render_fingerprints.json'
+
+    def __init__(self, data_path='results/analyzed_reviews.csv', output_dir='visualizations', metrics=None, df=None,
+                 trends=None, approximate=False):
+        """
+        Initialize visualizer with analyzed data.
+
+        Args:
+            data_path: Analyzed reviews (a CSV file or a columnar store)
+            output_dir: Directory charts are saved to
+            metrics: instrumentation.Metrics recording per-chart timings (optional)
+            df: Analyzed reviews already in memory, e.g. a compact
+                CourseReviewAnalyzer.df; data_path is not read when given
+            trends: TrendStore the semester trend chart is drawn from (optional)
+            approximate: Chart from one chunked pass over the reviews in
+                bounded memory (True, or SketchSettings with the error bounds)
+        """
+        self.data_path = data_path
+        self.metrics = metrics or NULL_METRICS
+        self.store = None
+        self.trends = trends
+        self.sketch_settings = None
+        self._summaries = None
+        if approximate:
+            self.sketch_settings = approximate if isinstance(approximate, SketchSettings) else SketchSettings()
+        with self.metrics.stage('visualizer.load') as stage:
+            if df is not None:
+                self.df = df
+            elif self.sketch_settings is not None:
+                # Read chunk by chunk on first use
+                self.df = None
+                if is_columnar(data_path):
+                    self.store = ColumnarStore(data_path, mmap=True)
+            elif is_columnar(data_path):
+                # Text columns stay memory-mapped and are only decoded for word clouds
+                self.store = ColumnarStore(data_path, mmap=True)
+                self.df = self.store.to_frame(include_text=False)
             else:
-                try:
-                    topics_list = eval(topics)
-                    all_topics.extend(topics_list)
-                except:
-                    pass
-
-        if not all_topics:
-            print("Skipped: topic_distribution.png (no topics found)")
+                self.df = pd.read_csv(data_path)
+            stage.rows = len(self.df) if self.df is not None else None
+        self.output_dir = output_dir
+
+        # Create output directory if it doesn't exist
+        os.makedirs(self.output_dir, exist_ok=True)
+
+        # Set style
+        plt.style.use('seaborn-v0_8-whitegrid')
+        sns.set_palette([self.COLORS['Positive'], self.COLORS['Neutral'], self.COLORS['Negative']])
+
+    def _reviews(self, sentiment):
+        """Review texts with the given VADER sentiment."""
+        mask = (self.df['sentiment_vader'] == sentiment).to_numpy()
+        if 'review' in self.df.columns:
+            return self.df.loc[mask, 'review']
+        return self.store.text('review', mask.nonzero()[0])
+
+    @property
+    def rows(self):
+        """Number of reviews charted."""
+        if self.df is not None:
+            return len(self.df)
+        return self._approximate_summaries()['rows']
+
+    def _chunks(self, chunk_size):
+        """Yield the reviews as DataFrames of at most chunk_size rows."""
+        columns = {'course_code', 'rating', 'sentiment_vader', 'review', 'topics', 'topic_mask'}
+        if self.df is not None:
+            for start in range(0, len(self.df), chunk_size):
+                yield self.df.iloc[start:start + chunk_size]
+        elif self.store is not None:
+            frame = self.store.to_frame(columns=[c for c in self.store.columns if c in columns], include_text=False)
+            has_text = 'review' in self.store.columns
+            for start in range(0, len(frame), chunk_size):
+                chunk = frame.iloc[start:start + chunk_size].copy()
+                if has_text:
+                    chunk['review'] = self.store.text('review', range(start, start + len(chunk)))
+                yield chunk
+        else:
+            yield from pd.read_csv(self.data_path, chunksize=chunk_size, usecols=lambda c: c in columns)
+
+    def _approximate_summaries(self):
+        """Sketches and exact counts from one pass over the reviews (computed once)."""
+        if self._summaries is not None:
+            return self._summaries
+        settings = self.sketch_settings or SketchSettings()
+        words = {
+            label: TopK(settings.top_k, settings.epsilon, settings.delta, settings.seed)
+            for label in ('Positive', 'Negative')
+        }
+        ratings = {
+            label: ReservoirSample(settings.sample_size, settings.seed + i)
+            for i, label in enumerate(SENTIMENT_ORDER)
+        }
+        course_sentiment = None
+        rating_totals = None
+        topic_counts = Counter()
+        rows = 0
+
+        with self.metrics.stage('visualizer.sketch') as stage:
+            for chunk in self._chunks(settings.chunk_size):
+                rows += len(chunk)
+                sentiment = chunk['sentiment_vader'].astype(object)
+                counts = chunk.groupby(['course_code', sentiment], observed=True).size()
+                course_sentiment = counts if course_sentiment is None else course_sentiment.add(counts, fill_value=0)
+                totals = chunk.groupby('course_code', observed=True)['rating'].agg(['sum', 'count'])
+                rating_totals = totals if rating_totals is None else rating_totals.add(totals, fill_value=0)
+
+                for label, sample in ratings.items():
+                    values = chunk.loc[(sentiment == label).to_numpy(), 'rating'].dropna()
+                    sample.update(values.to_numpy(dtype=float))
+                if 'review' in chunk.columns:
+                    for label, top in words.items():
+                        top.update(cloud_words(chunk.loc[(sentiment == label).to_numpy(), 'review']))
+                topic_counts.update(count_topics(chunk))
+            stage.rows = rows
+
+        self._summaries = {
+            'rows': rows,
+            'course_sentiment': course_sentiment,
+            'rating_totals': rating_totals,
+            'ratings': {label: sample.sample() for label, sample in ratings.items()},
+            'words': words,
+            'topic_counts': topic_counts
+        }
+        return self._summaries
+
+    def _approximate_chart_data(self, name):
+        """chart_data computed from the approximate summaries."""
+        summaries = self._approximate_summaries()
+        course_sentiment = summaries['course_sentiment']
+
+        if name == 'sentiment_distribution':
+            if course_sentiment is None:
+                return None
+            counts = course_sentiment.groupby(level=1).sum().sort_values(ascending=False, kind='stable')
+            counts = counts[counts > 0]
+            if counts.empty:
+                return None
+            return {'labels': [str(s) for s in counts.index], 'counts': [int(c) for c in counts.values]}
+
+        if name == 'course_comparison':
+            if course_sentiment is None or course_sentiment.empty:
+                return None
+            table = course_sentiment.unstack(fill_value=0).sort_index()
+            table = table.div(table.sum(axis=1), axis=0) * 100
+            table = table.reindex(columns=[c for c in SENTIMENT_ORDER if c in table.columns])
+            return {
+                'courses': [str(c) for c in table.index],
+                'sentiments': list(table.columns),
+                'values': table.to_numpy().tolist()
+            }
+
+        if name == 'rating_vs_sentiment':
+            sentiments, stats = [], []
+            for label in SENTIMENT_ORDER:
+                sample = summaries['ratings'][label]
+                if len(sample):
+                    sentiments.append(label)
+                    stats.append(_box_stats(sample))
+            return {'sentiments': sentiments, 'stats': stats} if stats else None
+
+        if name == 'course_ratings':
+            totals = summaries['rating_totals']
+            if totals is None:
+                return None
+            avg_ratings = (totals['sum'] / totals['count'].where(totals['count'] > 0)).dropna()
+            avg_ratings = avg_ratings.sort_values(ascending=False)
+            if avg_ratings.empty:
+                return None
+            return {'courses': [str(c) for c in avg_ratings.index], 'ratings': [float(r) for r in avg_ratings.values]}
+
+        if name in ('wordcloud_positive', 'wordcloud_negative'):
+            label, colormap, title = _wordcloud_chart(name)
+            frequencies = summaries['words'][label].most_common(WORDCLOUD_VOCABULARY)
+            if not frequencies:
+                return None
+            return {'frequencies': dict(frequencies), 'colormap': colormap, 'title': title}
+
+        if name == 'topic_distribution':
+            topic_counts = summaries['topic_counts']
+            if not topic_counts:
+                return None
+            return {'topics': list(topic_counts), 'counts': list(topic_counts.values())}
+
+        raise ValueError(f"Unknown chart: {name!r}")
+
+    def chart_data(self, name):
+        """
+        Reduce the reviews to the summary one chart needs.
+
+        Args:
+            name: Chart name (a key of CHARTS)
+
+        Returns:
+            JSON-serializable dict, or None when there is nothing to draw
+        """
+        if name == 'semester_trends':
+            return self._trend_data()
+        if self.sketch_settings is not None:
+            return self._approximate_chart_data(name)
+
+        df = self.df
+        sentiment = df['sentiment_vader']
+
+        if name == 'sentiment_distribution':
+            counts = sentiment.value_counts()
+            counts = counts[counts > 0]
+            if counts.empty:
+                return None
+            return {'labels': [str(s) for s in counts.index], 'counts': [int(c) for c in counts.values]}
+
+        if name == 'course_comparison':
+            if df.empty:
+                return None
+            # Calculate sentiment percentages per course
+            course_sentiment = pd.crosstab(df['course_code'], sentiment, normalize='index') * 100
+            course_sentiment = course_sentiment.reindex(
+                columns=[c for c in SENTIMENT_ORDER if c in course_sentiment.columns]
+            )
+            return {
+                'courses': [str(c) for c in course_sentiment.index],
+                'sentiments': list(course_sentiment.columns),
+                'values': course_sentiment.to_numpy().tolist()
+            }
+
+        if name == 'rating_vs_sentiment':
+            sentiments, stats = [], []
+            for label in SENTIMENT_ORDER:
+                ratings = df.loc[(sentiment == label).to_numpy(), 'rating'].dropna().to_numpy(dtype=float)
+                if len(ratings):
+                    sentiments.append(label)
+                    stats.append(_box_stats(ratings))
+            return {'sentiments': sentiments, 'stats': stats} if stats else None
+
+        if name == 'course_ratings':
+            avg_ratings = df.groupby('course_code', observed=True)['rating'].mean().dropna()
+            avg_ratings = avg_ratings.sort_values(ascending=False)
+            if avg_ratings.empty:
+                return None
+            return {'courses': [str(c) for c in avg_ratings.index], 'ratings': [float(r) for r in avg_ratings.values]}
+
+        if name in ('wordcloud_positive', 'wordcloud_negative'):
+            label, colormap, title = _wordcloud_chart(name)
+            frequencies = word_frequencies(self._reviews(label))
+            if not frequencies:
+                return None
+            return {
+                'frequencies': dict(frequencies.most_common(WORDCLOUD_VOCABULARY)),
+                'colormap': colormap,
+                'title': title
+            }
+
+        if name == 'topic_distribution':
+            topic_counts = count_topics(self.df)
+            if not topic_counts:
+                return None
+            return {'topics': list(topic_counts), 'counts': list(topic_counts.values())}
+
+        raise ValueError(f"Unknown chart: {name!r}")
+
+    def _trend_data(self):
+        """Net sentiment per semester of the most reviewed courses, read from the trend store only."""
+        if self.trends is None:
+            return None
+        cells = self.trends.cells()
+        if cells.empty:
+            return None
+        semesters = list(dict.fromkeys(cells['semester']))
+        top = cells.groupby('course_code')['reviews'].sum().nlargest(TREND_COURSES).index
+
+        courses = {}
+        for code in top:
+            trend = self.trends.course_trend(code)['net_sentiment'].reindex(semesters)
+            courses[str(code)] = [None if pd.isna(v) else round(float(v), 4) for v in trend]
+        overall = self.trends.overall_trend()['net_sentiment'].reindex(semesters)
+        return {
+            'semesters': semesters,
+            'courses': courses,
+            'overall': [None if pd.isna(v) else round(float(v), 4) for v in overall]
+        }
+
+    def _output_path(self, name):
+        return f'{self.output_dir}/{name}.png'
+
+    def _fingerprint(self, data):
+        """Hash of everything a chart's image depends on."""
+        payload = json.dumps(
+            {'version': RENDER_VERSION, 'dpi': self.DPI, 'colors': self.COLORS, 'data': data},
+            sort_keys=True
+        )
+        return hashlib.sha1(payload.encode('utf-8')).hexdigest()
+
+    def _plot(self, name):
+        """Compute a chart's data and render it in this process."""
+        data = self.chart_data(name)
+        if data is None:
+            print(f"Skipped: {name}.png ({CHARTS[name][1]})")
             return
+        _render_chart(name, data, self._output_path(name), self.DPI)
+        print(f"Created: {name}.png")
 
-        from collections import Counter
-        topic_counts = Counter(all_topics)
+    def plot_sentiment_distribution(self):
+        """Create bar chart of overall sentiment distribution."""
+        self._plot('sentiment_distribution')
 
-        plt.figure(figsize=(10, 6))
+    def plot_course_comparison(self):
+        """Create stacked bar chart comparing sentiment across courses."""
+        self._plot('course_comparison')
 
-        topics = list(topic_counts.keys())
-        counts = list(topic_counts.values())
+    def plot_rating_vs_sentiment(self):
+        """Create box plot comparing ratings by sentiment."""
+        self._plot('rating_vs_sentiment')
 
-        colors = plt.cm.viridis([i / len(topics) for i in range(len(topics))])
+    def plot_course_ratings(self):
+        """Create bar chart of average ratings by course."""
+        self._plot('course_ratings')
 
-        plt.barh(topics, counts, color=colors, edgecolor='black')
-        plt.title('Topic Distribution in Reviews', fontsize=14, fontweight='bold')
-        plt.xlabel('Number of Mentions', fontsize=12)
-        plt.ylabel('Topic', fontsize=12)
+    def plot_wordcloud_positive(self):
+        """Create word cloud from positive reviews."""
+        self._plot('wordcloud_positive')
 
-        # Add value labels
-        for i, v in enumerate(counts):
-            plt.text(v + 0.5, i, str(v), va='center')
+    def plot_wordcloud_negative(self):
+        """Create word cloud from negative reviews."""
+        self._plot('wordcloud_negative')
 
-        plt.tight_layout()
-        plt.savefig(f'{self.output_dir}/topic_distribution.png', dpi=300)
-        plt.close()
-        print("Created: topic_distribution.png")
+    def plot_topic_distribution(self):
+        """Create horizontal bar chart of topic frequencies."""
+        self._plot('topic_distribution')
+
+    def plot_semester_trends(self):
+        """Create line chart of net sentiment per semester from the trend store."""
+        self._plot('semester_trends')
+
+    def _load_fingerprints(self):
+        path = os.path.join(self.output_dir, self.FINGERPRINT_FILE)
+        if not os.path.exists(path):
+            return {}
+        try:
+            with open(path) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _save_fingerprints(self, fingerprints):
+        with open(os.path.join(self.output_dir, self.FINGERPRINT_FILE), 'w') as f:
+            json.dump(fingerprints, f, indent=2, sort_keys=True)
+
+    def generate_all(self, workers=1, force=False):
+        """
+        Generate all visualizations.
+
+        Args:
+            workers: Number of processes rendering charts concurrently
+                (None uses every core)
+            force: Redraw charts even if their data is unchanged since the last run
+        """
+        if workers is None:
+            workers = os.cpu_count() or 1
 
-    def generate_all(self):
-        """Generate all visualizations."""
         print("=" * 60)
         print("Generating Visualizations")
         print("=" * 60)
         print(f"Output directory: {self.output_dir}/\n")
 
-        self.plot_sentiment_distribution()
-        self.plot_course_comparison()
-        self.plot_rating_vs_sentiment()
-        self.plot_course_ratings()
-        self.plot_wordcloud_positive()
-        self.plot_wordcloud_negative()
-        self.plot_topic_distribution()
+        fingerprints = self._load_fingerprints()
+        pending = []
+        for name in CHARTS:
+            with self.metrics.stage(f'visualizer.data.{name}', rows=self.rows):
+                data = self.chart_data(name)
+            if data is None:
+                print(f"Skipped: {name}.png ({CHARTS[name][1]})")
+                fingerprints.pop(name, None)
+                continue
+
+            fingerprint = self._fingerprint(data)
+            output_path = self._output_path(name)
+            if not force and fingerprints.get(name) == fingerprint and os.path.exists(output_path):
+                print(f"Unchanged: {name}.png")
+                continue
+            fingerprints[name] = fingerprint
+            pending.append((name, data, output_path))
+
+        if workers > 1 and len(pending) > 1:
+            with self.metrics.stage('visualizer.render_parallel'), \
+                    ProcessPoolExecutor(max_workers=min(workers, len(pending)),
+                                        initializer=_init_render_worker) as executor:
+                futures = [executor.submit(_render_chart, name, data, path, self.DPI) for name, data, path in pending]
+                for future in futures:
+                    print(f"Created: {future.result()}.png")
+        else:
+            for name, data, output_path in pending:
+                with self.metrics.stage(f'visualizer.render.{name}'):
+                    _render_chart(name, data, output_path, self.DPI)
+                print(f"Created: {name}.png")
+        self.metrics.count('charts_rendered', len(pending))
+
+        self._save_fingerprints(fingerprints)
 
         print("\n" + "=" * 60)
         print("All visualizations generated successfully!")
@@ -250,8 +691,13 @@ class ReviewVisualizer:
 
 def main():
     """Main function to generate all visualizations."""
-    visualizer = ReviewVisualizer()
+    metrics = metrics_from_env()
+    trends = TrendStore() if os.path.exists('results/trends.sqlite') else None
+    visualizer = ReviewVisualizer(metrics=metrics, trends=trends)
     visualizer.generate_all()
+    if metrics.enabled:
+        metrics.print_summary()
+        metrics.export()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,71 @@
+"""In-memory stand-in for the parts of praw.Reddit the scraper uses."""
+
+import threading
+
+
+class FakeComment:
+    def __init__(self, comment_id, body, created_utc, score=1):
+        self.id = comment_id
+        self.body = body
+        self.created_utc = created_utc
+        self.score = score
+
+
+class FakeComments:
+    def __init__(self, comments):
+        self._comments = comments
+
+    def replace_more(self, limit=None):
+        pass
+
+    def list(self):
+        return list(self._comments)
+
+
+class FakePost:
+    def __init__(self, post_id, title, created_utc, selftext='', score=1, comments=()):
+        self.id = post_id
+        self.fullname = f't3_{post_id}'
+        self.title = title
+        self.selftext = selftext
+        self.created_utc = created_utc
+        self.score = score
+        self.comments = FakeComments(list(comments))
+
+
+class Throttled(Exception):
+    """Error shaped like a 429 response."""
+
+    class response:
+        status_code = 429
+
+
+class FakeSubreddit:
+    def __init__(self, posts):
+        self.posts = posts
+        self.requests = []
+        self.fail = set()
+        self.lock = threading.Lock()
+
+    def search(self, query, limit=100, params=None, sort=None):
+        """One listing request: posts mentioning query, newest first, after params['after']."""
+        after = (params or {}).get('after')
+        with self.lock:
+            self.requests.append((query, after))
+            if (query, after) in self.fail:
+                self.fail.discard((query, after))
+                raise Throttled()
+        matches = sorted((post for post in self.posts if query in post.title),
+                         key=lambda post: post.created_utc, reverse=True)
+        if after is not None:
+            start = [post.fullname for post in matches].index(after) + 1
+            matches = matches[start:]
+        return iter(matches[:limit])
+
+
+class FakeReddit:
+    def __init__(self, posts):
+        self.sub = FakeSubreddit(posts)
+
+    def subreddit(self, name):
+        return self.sub
@@ -0,0 +1,44 @@
+import math
+
+import pytest
+
+from aspects import split_clauses
+from sentiment_analyzer import CourseReviewAnalyzer
+
+
+def test_split_clauses_at_sentences_and_contrast():
+    assert split_clauses('Lectures were great but exams were brutal') == [
+        'Lectures were great', 'but exams were brutal']
+    assert split_clauses('Fun MPs. However, the exam\n\nwas long!') == [
+        'Fun MPs.', 'However, the exam', 'was long!']
+    assert split_clauses('A butterfly') == ['A butterfly']
+
+
+def test_contrastive_review_scores_each_topic_from_its_own_clause():
+    analyzer = CourseReviewAnalyzer()
+    polarity = analyzer.vader.polarity_scores
+    review = 'The lectures were great but the exams were brutal'
+
+    row = analyzer.score_texts([review]).iloc[0]
+
+    assert row['aspect_teaching'] == pytest.approx(polarity('The lectures were great')['compound'])
+    assert row['aspect_exams'] == pytest.approx(polarity('but the exams were brutal')['compound'])
+    assert row['aspect_teaching'] > 0 > row['aspect_exams']
+    assert math.isnan(row['aspect_workload'])
+
+
+def test_topic_in_several_clauses_gets_their_mean():
+    analyzer = CourseReviewAnalyzer()
+    polarity = analyzer.vader.polarity_scores
+    clauses = ['The midterm was awful.', 'The final was great.']
+
+    row = analyzer.score_texts([' '.join(clauses)]).iloc[0]
+
+    expected = (polarity(clauses[0])['compound'] + polarity(clauses[1])['compound']) / 2
+    assert row['aspect_exams'] == pytest.approx(expected)
+
+
+def test_single_clause_review_reuses_the_whole_review_score():
+    analyzer = CourseReviewAnalyzer()
+    row = analyzer.score_texts(['Brutal exams and a helpful professor']).iloc[0]
+    assert row['aspect_exams'] == row['aspect_teaching'] == row['aspect_helpful'] == row['vader_compound']
@@ -0,0 +1,96 @@
+import os
+
+import pandas as pd
+import pytest
+
+from batch_scorer import CascadePolicy, CascadeReport
+from sentiment_analyzer import CourseReviewAnalyzer
+
+SAMPLE_REVIEWS = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                              'data', 'sample_reviews.csv')
+
+# Reviews the lexicon shortcuts must not misjudge: no lexicon word, emoticons
+# split by whitespace, punctuation glued to a word, empty text
+EDGE_CASES = ['', 'CS 374 in Siebel', 'loved it :)', 'meh : (', 'great!!!', '"awful," said everyone', 'ok']
+
+
+def test_batch_scores_match_per_review_methods():
+    analyzer = CourseReviewAnalyzer(data_path=SAMPLE_REVIEWS)
+    texts = list(pd.read_csv(SAMPLE_REVIEWS)['review']) + EDGE_CASES
+
+    scores = analyzer.score_batch(texts)
+
+    assert list(scores['sentiment_vader']) == [analyzer.analyze_sentiment_vader(text) for text in texts]
+    assert list(scores['sentiment_textblob']) == [analyzer.analyze_sentiment_textblob(text) for text in texts]
+    assert list(scores['vader_compound']) == pytest.approx(
+        [analyzer.vader.polarity_scores(text)['compound'] for text in texts])
+    assert list(scores['textblob_polarity']) == pytest.approx(
+        [analyzer.scorer.textblob.analyze(text).polarity for text in texts])
+
+
+def test_cascade_escalates_strictly_inside_the_band():
+    policy = CascadePolicy(band=0.5, rating_conflict=False)
+    compound = [-0.9, -0.5, -0.4999, 0.0, 0.4999, 0.5, 0.9]
+    assert list(policy.escalate(compound)) == [False, False, True, True, True, False, False]
+
+    policy = CascadePolicy(band=0.5)
+    # Positive VADER at 1 star and Negative at 5 stars conflict; unrated rows do not
+    ratings = [1, 5, 3, None]
+    assert list(policy.escalate([0.9, -0.9, 0.9, -0.9], ratings)) == [True, True, False, False]
+
+
+def test_cascade_runs_textblob_only_on_escalated_reviews(tmp_path, monkeypatch):
+    reviews = pd.read_csv(SAMPLE_REVIEWS)
+    analyzer = CourseReviewAnalyzer(data_path=SAMPLE_REVIEWS)
+    compound = analyzer.score_batch(reviews['review'])['vader_compound']
+    # A band edge that is some review's exact |compound|, so that review sits on the boundary
+    band = sorted(abs(compound))[len(compound) // 2]
+
+    scored = []
+    textblob_polarities = analyzer.scorer.textblob_polarities
+    monkeypatch.setattr(analyzer.scorer, 'textblob_polarities',
+                        lambda texts: scored.extend(texts) or textblob_polarities(texts))
+    df = analyzer.analyze_all(output_path=str(tmp_path / 'out.csv'),
+                              cascade=CascadePolicy(band=band, rating_conflict=False))
+
+    inside = df['vader_compound'].abs() < band
+    assert (df['escalated'] == inside).all()
+    assert (~inside & (df['vader_compound'].abs() == band)).any()
+    assert sorted(scored) == sorted(df.loc[inside, 'review'])
+    assert df.loc[~inside, 'textblob_polarity'].isna().all()
+    assert df.loc[~inside, 'sentiment_textblob'].isna().all()
+    assert list(df.loc[inside, 'textblob_polarity']) == pytest.approx(
+        [analyzer.scorer.textblob.analyze(text).polarity for text in df.loc[inside, 'review']])
+    assert list(df.loc[inside, 'sentiment_textblob']) == [
+        analyzer.analyze_sentiment_textblob(text) for text in df.loc[inside, 'review']]
+
+
+def test_cascade_report_counts():
+    report = CascadeReport()
+    report.update(pd.DataFrame({
+        'escalated': [True, True, True, False, False, True],
+        'sentiment_vader': ['Positive', 'Neutral', 'Negative', 'Positive', 'Negative', 'Neutral'],
+        'sentiment_textblob': ['Negative', 'Neutral', 'Negative', None, None, 'Positive'],
+        'rating': [1, 3, 4, 5, 5, None],
+        'is_duplicate': [False, False, False, False, False, False],
+    }))
+    report.update(pd.DataFrame({
+        'escalated': [True],
+        'sentiment_vader': ['Neutral'],
+        'sentiment_textblob': ['Positive'],
+        'rating': [5],
+        'is_duplicate': [True],
+    }))
+
+    assert report.summary() == {
+        'reviews': 6,
+        'escalated': 4,
+        'escalated_share': 4 / 6,
+        # Rated rows 0-4: VADER matches the rating on rows 1 and 3
+        'vader_rating_agreement': 2 / 5,
+        # Escalated and rated rows 0-2: VADER matches on row 1, TextBlob on rows 0 and 1
+        'escalated_vader_rating_agreement': 1 / 3,
+        'textblob_rating_agreement': 2 / 3,
+        # Escalated rows 0, 1, 2 and 5: the labels agree on rows 1 and 2
+        'vader_textblob_agreement': 2 / 4,
+    }
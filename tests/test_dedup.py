@@ -0,0 +1,53 @@
+import numpy as np
+import pandas as pd
+
+from dedup import DuplicateIndex, NearDuplicateDetector
+
+BASE = 'the course was great and the professor was amazing at explaining every single topic'
+
+
+def _texts():
+    texts = [BASE] + [f'unique review number {i} about topic {i * 7} with words {i * 13}' for i in range(60)]
+    texts += [BASE + '!', BASE.replace('topic', 'subject'), ''] * 3
+    return texts
+
+
+def test_chunked_index_matches_whole_dataset_clustering():
+    texts = _texts()
+    expected = NearDuplicateDetector().cluster(texts)
+
+    index = DuplicateIndex()
+    try:
+        chunked = np.concatenate([index.add(texts[start:start + 17]) for start in range(0, len(texts), 17)])
+    finally:
+        index.close()
+
+    assert np.array_equal(chunked, expected)
+    assert index.duplicates == int(np.count_nonzero(expected != np.arange(len(texts))))
+    assert set(chunked[-9:]) >= {0}
+
+
+def test_cluster_accepts_a_series():
+    texts = pd.Series(_texts())
+    assert np.array_equal(NearDuplicateDetector().cluster(texts), NearDuplicateDetector().cluster(list(texts)))
+
+
+def test_analyze_stream_flags_duplicates_across_chunks(tmp_path):
+    from sentiment_analyzer import CourseReviewAnalyzer
+
+    data_path = tmp_path / 'reviews.csv'
+    pd.DataFrame({
+        'course_code': ['CS124'] * 4,
+        'course_name': ['Intro to CS'] * 4,
+        'review': [BASE, 'Too much homework and the pace is way too fast', BASE + '!', 'Loved the labs'],
+        'rating': [5, 2, 5, 4],
+        'semester': ['Fall 2024'] * 4
+    }).to_csv(data_path, index=False)
+
+    analyzer = CourseReviewAnalyzer(data_path=str(data_path))
+    aggregates = analyzer.analyze_stream(chunk_size=2, output_path=str(tmp_path / 'out.csv'), dedup=True)
+
+    out = pd.read_csv(tmp_path / 'out.csv')
+    assert list(out['duplicate_of']) == [0, 1, 0, 3]
+    assert list(out['is_duplicate']) == [False, False, True, False]
+    assert aggregates.total_reviews == 3
@@ -0,0 +1,37 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from benchmark import write_synthetic_csv
+from linear_sentiment import LinearSentimentModel
+
+
+@pytest.fixture
+def reviews(tmp_path):
+    path = tmp_path / 'reviews.csv'
+    write_synthetic_csv(str(path), 3000, 2)
+    return pd.read_csv(path)
+
+
+def test_partial_fit_after_load_continues_training(reviews, tmp_path):
+    first, second = reviews.iloc[:2000], reviews.iloc[2000:]
+    model = LinearSentimentModel(n_features=2 ** 16)
+    model.partial_fit(first['review'], first['rating'])
+    model.save(tmp_path / 'model.npz')
+
+    loaded = LinearSentimentModel.load(tmp_path / 'model.npz')
+    loaded.partial_fit(second['review'], second['rating'])
+    model.partial_fit(second['review'], second['rating'])
+
+    assert loaded.trained_rows == model.trained_rows
+    np.testing.assert_allclose(loaded.decision(reviews['review']), model.decision(reviews['review']), atol=1e-6)
+
+
+def test_saved_model_predicts_the_same(reviews, tmp_path):
+    model = LinearSentimentModel(n_features=2 ** 16)
+    model.partial_fit(reviews['review'], reviews['rating'])
+    model.save(tmp_path / 'model.npz')
+
+    loaded = LinearSentimentModel.load(tmp_path / 'model.npz')
+    assert list(loaded.predict(reviews['review'])['sentiment_linear']) == \
+        list(model.predict(reviews['review'])['sentiment_linear'])
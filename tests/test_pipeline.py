@@ -0,0 +1,54 @@
+import shutil
+
+import pytest
+
+import pipeline
+
+STAGE_FUNCTIONS = ['_run_scrape', '_run_clean', '_run_score', '_run_aggregate', '_run_visualize']
+
+
+@pytest.fixture
+def edit_pipeline(tmp_path, monkeypatch):
+    """Point the fingerprints at a copy of pipeline.py and return a function editing it."""
+    copy = tmp_path / 'pipeline.py'
+    shutil.copy(pipeline.__file__, copy)
+    monkeypatch.setattr(pipeline, '__file__', str(copy))
+
+    def edit(old, new):
+        source = copy.read_text()
+        assert source.count(old) == 1
+        copy.write_text(source.replace(old, new))
+    return edit
+
+
+def _fingerprints():
+    return {name: pipeline.function_fingerprint(name) for name in STAGE_FUNCTIONS}
+
+
+def test_editing_one_stage_changes_only_its_fingerprint(edit_pipeline):
+    before = _fingerprints()
+    edit_pipeline('"""Draw the charts of the scored reviews."""', '"""Draw the charts."""')
+    after = _fingerprints()
+
+    assert [name for name in STAGE_FUNCTIONS if before[name] != after[name]] == ['_run_visualize']
+
+
+def test_editing_the_runner_changes_no_fingerprint(edit_pipeline):
+    before = _fingerprints()
+    edit_pipeline('print("PIPELINE SUMMARY")', 'print("SUMMARY")')
+    assert _fingerprints() == before
+
+
+def test_shared_helpers_count_for_the_stages_calling_them(edit_pipeline):
+    before = _fingerprints()
+    edit_pipeline('def _make_parent(path):\n', 'def _make_parent(path):\n    # Parent directory of an output\n')
+    after = _fingerprints()
+
+    assert {name for name in STAGE_FUNCTIONS if before[name] != after[name]} == {
+        '_run_clean', '_run_score', '_run_aggregate'
+    }
+
+
+def test_imported_modules_are_fingerprinted():
+    assert pipeline.function_fingerprint('_run_visualize') != \
+        pipeline.function_fingerprint('_run_visualize', modules=['benchmark'])
@@ -0,0 +1,38 @@
+import os
+
+import pandas as pd
+
+from preprocess import MAX_MASK_TOPICS
+from sentiment_analyzer import CourseReviewAnalyzer
+
+SAMPLE_REVIEWS = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                              'data', 'sample_reviews.csv')
+
+# Punctuation inside tokens, phrases split by punctuation, repeats and missing values
+EDGE_CASES = [
+    None, float('nan'), '', '   ', 'Exam/midterm were fine', 'office-hours helped', 'OFFICE\nHOURS',
+    "MP1's autograder", 'C++ and 3 exams!!', 'Exam/midterm were fine', ':) great TAs', 'homework; lectures',
+]
+
+
+def _assert_matches_per_review(analyzer, texts):
+    batch = analyzer.preprocessor.process(texts)
+    assert list(batch.cleaned_column()) == [analyzer.clean_text(text) for text in texts]
+    assert batch.topics_column(analyzer.topic_matcher) == [analyzer.extract_topics(text) for text in texts]
+
+
+def test_preprocessed_batch_matches_clean_text_and_extract_topics():
+    analyzer = CourseReviewAnalyzer(data_path=SAMPLE_REVIEWS)
+    texts = list(pd.read_csv(SAMPLE_REVIEWS)['review']) + EDGE_CASES
+    _assert_matches_per_review(analyzer, texts)
+    # A second batch reuses the vocabulary built by the first
+    _assert_matches_per_review(analyzer, EDGE_CASES[::-1])
+
+
+def test_parity_without_topic_masks():
+    # Too many topics for uint64 masks, so every review goes through the matcher
+    keywords = {f'topic{i}': [f'word{i}'] for i in range(MAX_MASK_TOPICS)}
+    keywords['office_hours'] = ['office hours']
+    analyzer = CourseReviewAnalyzer(data_path=SAMPLE_REVIEWS, topic_keywords=keywords)
+    assert not analyzer.preprocessor.use_masks
+    _assert_matches_per_review(analyzer, EDGE_CASES + ['word3 and Word63 in office hours'])
@@ -0,0 +1,36 @@
+import json
+
+import pytest
+
+import resources
+from resources import LEXICON_CACHE_ENV, load_vader, prepare_resources
+
+
+@pytest.fixture(autouse=True)
+def vader_only(monkeypatch):
+    # The other NLTK resources are not needed here and may not be installed
+    monkeypatch.setattr(resources, 'NLTK_RESOURCES',
+                        {'vader_lexicon': resources.NLTK_RESOURCES['vader_lexicon']})
+
+
+def test_lexicon_cache_named_by_env_var_is_rebuilt_from_nltk(tmp_path, monkeypatch):
+    cache = tmp_path / 'lex.json'
+    cache.write_text(json.dumps({'stale': 1.0}))
+    monkeypatch.setenv(LEXICON_CACHE_ENV, str(cache))
+
+    prepare_resources(download=False, lexicon_cache=str(cache))
+
+    lexicon = json.loads(cache.read_text())
+    assert 'stale' not in lexicon
+    assert lexicon['good'] == pytest.approx(1.9)
+    assert not (tmp_path / 'lex.json.tmp').exists()
+    assert load_vader().polarity_scores('good course')['compound'] > 0
+
+
+def test_cached_lexicon_scores_like_nltk(tmp_path, monkeypatch):
+    monkeypatch.delenv(LEXICON_CACHE_ENV, raising=False)
+    cache = tmp_path / 'lex.json'
+    prepare_resources(download=False, lexicon_cache=str(cache))
+
+    text = 'The lectures were great but the exams were brutal :('
+    assert load_vader(str(cache)).polarity_scores(text) == load_vader().polarity_scores(text)
@@ -0,0 +1,24 @@
+from score_cache import ScoreCache, text_key
+
+
+def _entries(texts, compound=0.5):
+    return [(text_key(text), compound, 0.1, ['exams'], {'exams': compound}) for text in texts]
+
+
+def test_entry_count_tracks_inserts_replacements_and_eviction(tmp_path):
+    cache = ScoreCache(str(tmp_path / 'cache.sqlite'), max_entries=5)
+    cache.put_many(_entries(['a', 'b', 'c']))
+    cache.put_many(_entries(['b', 'c', 'd', 'd'], compound=0.9))
+    assert len(cache) == 4
+
+    cache.get_many([text_key('a')])
+    cache.put_many(_entries(['e', 'f', 'g']))
+    assert len(cache) == 5
+    assert cache.conn.execute('SELECT COUNT(*) FROM scores').fetchone()[0] == 5
+    # 'a' was used more recently than 'b', 'c' and 'd'
+    assert text_key('a') in cache.get_many([text_key(t) for t in 'abcd'])
+    cache.close()
+
+    reopened = ScoreCache(str(tmp_path / 'cache.sqlite'), max_entries=5)
+    assert len(reopened) == 5
+    reopened.close()
@@ -0,0 +1,100 @@
+import pytest
+
+from fake_reddit import FakeComment, FakePost, FakeReddit
+from scraper import RateLimiter, RedditScraper
+
+
+@pytest.fixture
+def limiter_calls(monkeypatch):
+    """Count rate limit tokens and skip throttling pauses."""
+    calls = {'acquire': 0, 'pause': 0}
+
+    def acquire(self):
+        calls['acquire'] += 1
+
+    def pause(self, seconds):
+        calls['pause'] += 1
+
+    monkeypatch.setattr(RateLimiter, 'acquire', acquire)
+    monkeypatch.setattr(RateLimiter, 'pause', pause)
+    return calls
+
+
+def _posts(code, n, comments=0):
+    return [
+        FakePost(f'{code}-{i}', f'{code} post {i}', created_utc=1_700_000_000 + i,
+                 comments=[FakeComment(f'{code}-{i}-c{j}', f'comment {j}', 1_700_000_000 + i) for j in range(comments)])
+        for i in range(n)
+    ]
+
+
+def test_every_listing_page_takes_a_token(limiter_calls):
+    reddit = FakeReddit(_posts('CS374', 250))
+    scraper = RedditScraper(reddit=reddit)
+
+    df = scraper.scrape_courses_concurrently(['CS374'], limit_per_course=1000, workers=1)
+
+    assert len(df) == 250
+    assert len(reddit.sub.requests) == 3
+    assert limiter_calls['acquire'] == 3
+
+
+def test_throttled_page_is_retried_alone(limiter_calls):
+    reddit = FakeReddit(_posts('CS374', 250))
+    # Newest first, so the second page starts after post 150
+    reddit.sub.fail.add(('CS374', 't3_CS374-150'))
+    scraper = RedditScraper(reddit=reddit)
+
+    df = scraper.scrape_courses_concurrently(['CS374'], limit_per_course=1000, workers=1)
+
+    assert len(df) == 250
+    assert df['review'].is_unique
+    assert [after for _, after in reddit.sub.requests] == [None, 't3_CS374-150', 't3_CS374-150', 't3_CS374-50']
+    assert limiter_calls['pause'] == 1
+
+
+def test_limit_caps_the_last_page(limiter_calls):
+    reddit = FakeReddit(_posts('CS225', 250))
+    scraper = RedditScraper(reddit=reddit)
+
+    df = scraper.scrape_courses_concurrently(['CS225'], limit_per_course=120, workers=1)
+
+    assert len(df) == 120
+    assert len(reddit.sub.requests) == 2
+
+
+def test_concurrent_scrape_keeps_course_order_and_comments(limiter_calls):
+    courses = ['CS124', 'CS225', 'CS374', 'STAT400']
+    reddit = FakeReddit([post for code in courses for post in _posts(code, 5, comments=2)])
+    scraper = RedditScraper(reddit=reddit)
+
+    df = scraper.scrape_courses_concurrently(courses, limit_per_course=50, workers=4, include_comments=True)
+
+    assert len(df) == 4 * 5 * 3
+    assert list(dict.fromkeys(df['course_code'])) == courses
+    assert (df['source'] == 'reddit_comment').sum() == 4 * 5 * 2
+    # One search request per course plus one per post for its comments
+    assert limiter_calls['acquire'] == 4 + 4 * 5
+
+
+def test_concurrent_scrape_resumes_from_checkpoints(limiter_calls, tmp_path):
+    courses = ['CS124', 'CS225']
+    reddit = FakeReddit([post for code in courses for post in _posts(code, 3)])
+    checkpoints = str(tmp_path / 'checkpoints')
+    first = RedditScraper(reddit=reddit).scrape_courses_concurrently(courses, workers=2, checkpoint_dir=checkpoints)
+
+    reddit.sub.requests.clear()
+    second = RedditScraper(reddit=reddit).scrape_courses_concurrently(courses, workers=2, checkpoint_dir=checkpoints)
+
+    assert reddit.sub.requests == []
+    assert second.equals(first)
+
+
+def test_iter_reviews_with_workers_yields_every_row(limiter_calls):
+    courses = ['CS124', 'CS225', 'CS374']
+    reddit = FakeReddit([post for code in courses for post in _posts(code, 4)])
+    scraper = RedditScraper(reddit=reddit)
+
+    rows = list(scraper.iter_reviews(courses, workers=3, buffer_size=2))
+
+    assert sorted(row['review'] for row in rows) == sorted(f'{code} post {i} ' for code in courses for i in range(4))
@@ -0,0 +1,37 @@
+import pandas as pd
+
+from search_index import SearchIndex
+
+
+def _reviews():
+    return pd.DataFrame({
+        'review': [
+            'Terrible final exam, nothing like the homework',
+            'The midterm was awful and rushed',
+            'Great lectures, the exams were fair',
+            'Way too much homework every week'
+        ],
+        'course_code': ['CS374', 'CS374', 'CS374', 'CS374'],
+        'sentiment_vader': ['Negative', 'Negative', 'Positive', 'Negative'],
+        'topics': [['exams', 'workload'], ['exams'], ['teaching', 'exams'], ['workload']]
+    })
+
+
+def test_topic_facet_matches_reviews_without_the_topic_word(tmp_path):
+    index = SearchIndex(str(tmp_path / 'index'), topic_names=['workload', 'teaching', 'exams'])
+    index.add(_reviews())
+
+    terms, filters = index.parse_query('negative CS374 reviews mentioning exams')
+    assert terms == []
+    assert filters == {'course': 'CS374', 'sentiment': 'Negative', 'topic': 'exams'}
+
+    hits = index.search('negative CS374 reviews mentioning exams')
+    assert sorted(hits['row']) == [0, 1]
+
+
+def test_topic_facet_with_other_terms(tmp_path):
+    index = SearchIndex(str(tmp_path / 'index'), topic_names=['workload', 'teaching', 'exams'])
+    index.add(_reviews())
+
+    hits = index.search('awful exams')
+    assert list(hits['row']) == [1]
@@ -0,0 +1,58 @@
+import os
+
+import pandas as pd
+
+from search_index import SearchIndex
+from sentiment_analyzer import CourseReviewAnalyzer
+
+SAMPLE_REVIEWS = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                              'data', 'sample_reviews.csv')
+
+
+def _write_reviews(path):
+    pd.DataFrame({
+        'course_code': ['CS124', 'CS124', 'CS225'],
+        'course_name': ['Intro to CS', 'Intro to CS', 'Data Structures'],
+        'review': ['Fun first course', 'Great lectures and helpful TAs', 'Pointers everywhere, hard but fair'],
+        'rating': [5, 4, 4],
+        'semester': ['Fall 2023', 'Fall 2023', 'Spring 2024']
+    }).to_csv(path, index=False)
+
+
+def test_search_after_analyze_records_does_not_map_hits_onto_old_frame(tmp_path):
+    data_path = tmp_path / 'reviews.csv'
+    _write_reviews(data_path)
+    analyzer = CourseReviewAnalyzer(data_path=str(data_path), index=SearchIndex(str(tmp_path / 'index')))
+    analyzer.analyze_all(output_path=str(tmp_path / 'analyzed.csv'))
+
+    records = [{'course_code': 'CS374', 'course_name': 'Algorithms', 'review': 'The midterm was awful',
+                'rating': 2, 'semester': 'Fall 2024'}]
+    analyzer.analyze_records(records, output_path=str(tmp_path / 'live.csv'))
+
+    hits = analyzer.search('awful')
+    assert list(hits['row']) == [0]
+    assert list(hits['course_code']) == ['CS374']
+    assert 'review' not in hits.columns
+
+
+def test_search_after_analyze_all_returns_reviews(tmp_path):
+    data_path = tmp_path / 'reviews.csv'
+    _write_reviews(data_path)
+    analyzer = CourseReviewAnalyzer(data_path=str(data_path), index=SearchIndex(str(tmp_path / 'index')))
+    analyzer.analyze_all(output_path=str(tmp_path / 'analyzed.csv'))
+
+    hits = analyzer.search('pointers')
+    assert list(hits['review']) == ['Pointers everywhere, hard but fair']
+
+
+def test_analyze_all_with_two_workers_matches_serial(tmp_path):
+    keywords = {'exams': ['exam', 'midterm'], 'workload': ['homework', 'mp']}
+
+    serial = CourseReviewAnalyzer(data_path=SAMPLE_REVIEWS, topic_keywords=keywords)
+    expected = serial.analyze_all(output_path=str(tmp_path / 'serial.csv'))
+    parallel = CourseReviewAnalyzer(data_path=SAMPLE_REVIEWS, topic_keywords=keywords)
+    # Small chunks, so each worker scores several of them
+    result = parallel.analyze_all(workers=2, chunk_size=5, output_path=str(tmp_path / 'parallel.csv'))
+
+    pd.testing.assert_frame_equal(result, expected)
+    assert (tmp_path / 'parallel.csv').read_bytes() == (tmp_path / 'serial.csv').read_bytes()
@@ -0,0 +1,101 @@
+import http.client
+import json
+import threading
+
+import pytest
+
+from sentiment_analyzer import CourseReviewAnalyzer
+from service import MicroBatcher, Overloaded, ScoringRequestHandler, create_server
+
+
+@pytest.fixture(scope='module')
+def analyzer():
+    return CourseReviewAnalyzer()
+
+
+@pytest.fixture
+def serve():
+    servers = []
+
+    def start(batcher):
+        server = create_server(batcher, port=0, quiet=True)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        servers.append(server)
+        return server.server_address[1]
+
+    yield start
+    for server in servers:
+        server.shutdown()
+        server.server_close()
+
+
+def _request(port, method, path, body=None):
+    connection = http.client.HTTPConnection('127.0.0.1', port, timeout=10)
+    connection.request(method, path, body, {'Content-Type': 'application/json'})
+    response = connection.getresponse()
+    payload = json.loads(response.read())
+    connection.close()
+    return response.status, payload
+
+
+def test_concurrent_requests_are_scored_in_one_batch(analyzer):
+    batcher = MicroBatcher(analyzer, max_batch_size=64, max_wait=0.5).start()
+    try:
+        texts = [['Great lectures'], ['Awful exams', 'Boring homework'], ['Fair grading']]
+        requests = [batcher.submit(reviews) for reviews in texts]
+        for request in requests:
+            assert request.done.wait(10)
+    finally:
+        batcher.stop()
+
+    expected = analyzer.score_texts(review for reviews in texts for review in reviews)
+    results = [result for request in requests for result in request.results]
+    assert [r['sentiment_vader'] for r in results] == list(expected['sentiment_vader'])
+    assert [r['topics'] for r in results] == list(expected['topics'])
+    stats = batcher.stats()
+    assert (stats['requests'], stats['reviews'], stats['batches']) == (3, 4, 1)
+
+
+def test_score_endpoint(analyzer, serve):
+    batcher = MicroBatcher(analyzer, max_wait=0.001).start()
+    try:
+        port = serve(batcher)
+        status, payload = _request(port, 'POST', '/score', json.dumps({'reviews': ['Great course', 'Hard exams']}))
+        assert status == 200
+        assert [result['sentiment_vader'] for result in payload['results']] == ['Positive', 'Negative']
+
+        status, payload = _request(port, 'POST', '/score', json.dumps({'review': 'Great course'}))
+        assert status == 200 and len(payload['results']) == 1
+    finally:
+        batcher.stop()
+
+
+@pytest.mark.parametrize('body', ['not json', '{}', '{"reviews": "one string"}', '{"reviews": [1, 2]}', '[]'])
+def test_malformed_requests_get_400(analyzer, serve, body):
+    port = serve(MicroBatcher(analyzer))
+    status, payload = _request(port, 'POST', '/score', body)
+    assert status == 400
+    assert 'error' in payload
+
+
+def test_unknown_paths_and_oversized_bodies(analyzer, serve, monkeypatch):
+    port = serve(MicroBatcher(analyzer))
+    assert _request(port, 'GET', '/nope')[0] == 404
+    assert _request(port, 'POST', '/nope', '{}')[0] == 404
+    assert _request(port, 'GET', '/health') == (200, {'status': 'ok'})
+
+    monkeypatch.setattr(ScoringRequestHandler, 'MAX_BODY', 16)
+    assert _request(port, 'POST', '/score', json.dumps({'review': 'x' * 32}))[0] == 413
+
+
+def test_full_queue_answers_503(analyzer, serve):
+    # Not started, so nothing drains the queue
+    batcher = MicroBatcher(analyzer, max_queue=1)
+    batcher.submit(['queued'])
+    with pytest.raises(Overloaded):
+        batcher.submit(['rejected'])
+
+    port = serve(batcher)
+    status, payload = _request(port, 'POST', '/score', json.dumps({'review': 'Great course'}))
+    assert status == 503
+    assert batcher.stats()['rejected'] == 2
@@ -0,0 +1,87 @@
+import pandas as pd
+import pytest
+
+from fake_reddit import FakeComment, FakePost, FakeReddit
+from scraper import SYNC_COLUMNS, RateLimiter, RedditScraper
+from sync_state import SyncState
+
+DAY = 86400
+
+
+@pytest.fixture(autouse=True)
+def no_rate_limit(monkeypatch):
+    monkeypatch.setattr(RateLimiter, 'acquire', lambda self: None)
+
+
+def _post(i, comments=()):
+    return FakePost(f'p{i}', f'CS374 post {i}', created_utc=i * DAY, comments=comments)
+
+
+def test_sync_appends_only_new_posts(tmp_path):
+    output = str(tmp_path / 'reddit.csv')
+    reddit = FakeReddit([_post(i) for i in range(1, 151)])
+    state = SyncState(':memory:')
+    scraper = RedditScraper(reddit=reddit)
+
+    first = scraper.sync(['CS374'], state, output_path=output)
+    assert len(first) == 150
+    assert state.watermark('CS374') == 150 * DAY
+
+    reddit.sub.posts += [_post(i) for i in range(151, 154)]
+    reddit.sub.requests.clear()
+    second = scraper.sync(['CS374'], state, output_path=output)
+
+    assert list(second['reddit_id']) == ['p153', 'p152', 'p151']
+    # The first page already reaches the watermark, so no older pages are requested
+    assert len(reddit.sub.requests) == 1
+    saved = pd.read_csv(output)
+    assert list(saved.columns) == SYNC_COLUMNS
+    assert len(saved) == 153 and saved['reddit_id'].is_unique
+
+
+def test_sync_fetches_every_post_newer_than_the_watermark(tmp_path):
+    output = str(tmp_path / 'reddit.csv')
+    reddit = FakeReddit([_post(i) for i in range(1, 11)])
+    state = SyncState(':memory:')
+    scraper = RedditScraper(reddit=reddit)
+
+    first = scraper.sync(['CS374'], state, output_path=output, limit_per_course=5)
+    assert list(first['reddit_id']) == ['p10', 'p9', 'p8', 'p7', 'p6']
+
+    # More new posts than the limit: stopping at 5 would skip p11-p17 for good
+    reddit.sub.posts += [_post(i) for i in range(11, 23)]
+    second = scraper.sync(['CS374'], state, output_path=output, limit_per_course=5)
+
+    assert sorted(second['reddit_id'], key=lambda i: int(i[1:])) == [f'p{i}' for i in range(11, 23)]
+    assert state.watermark('CS374') == 22 * DAY
+
+
+def test_sync_picks_up_new_comments_within_lookback(tmp_path):
+    output = str(tmp_path / 'reddit.csv')
+    old = _post(1, [FakeComment('c1', 'first', 1 * DAY)])
+    recent = _post(10, [FakeComment('c2', 'second', 10 * DAY)])
+    reddit = FakeReddit([old, recent])
+    state = SyncState(':memory:')
+    scraper = RedditScraper(reddit=reddit)
+
+    scraper.sync(['CS374'], state, output_path=output, include_comments=True, comment_lookback_days=7)
+    recent.comments._comments.append(FakeComment('c3', 'late reply', 12 * DAY))
+    old.comments._comments.append(FakeComment('c4', 'too old to revisit', 12 * DAY))
+    second = scraper.sync(['CS374'], state, output_path=output, include_comments=True, comment_lookback_days=7)
+
+    assert list(second['reddit_id']) == ['c3']
+    assert len(pd.read_csv(output)) == 5
+
+
+def test_sync_state_persists_between_runs(tmp_path):
+    path = str(tmp_path / 'sync.sqlite')
+    state = SyncState(path)
+    state.record('CS374', [('p1', 'post', 1.0)], watermark=5.0)
+    state.record('CS374', [], watermark=3.0)
+    state.close()
+
+    state = SyncState(path)
+    assert state.watermark('CS374') == 5.0
+    assert state.unseen('CS374', ['p1', 'p2']) == {'p2'}
+    assert state.unseen('CS225', ['p1']) == {'p1'}
+    state.close()
@@ -0,0 +1,35 @@
+from topic_matcher import TopicMatcher
+
+KEYWORDS = {
+    'exams': ['exam', 'midterm'],
+    'office_hours': ['office hours', 'OH'],
+    'workload': ['work', 'hours'],
+}
+
+
+def test_keywords_match_whole_words_only():
+    matcher = TopicMatcher(KEYWORDS)
+    assert matcher.extract('For example, the homework') == ['general']
+    assert matcher.extract('Exams were fine') == ['general']
+    assert matcher.extract('The exam, then the midterm.') == ['exams']
+
+
+def test_multiword_keywords_match_consecutive_tokens():
+    matcher = TopicMatcher(KEYWORDS)
+    assert matcher.extract('Went to office hours weekly') == ['office_hours', 'workload']
+    assert matcher.extract('Office - hours!') == ['office_hours', 'workload']
+    assert matcher.extract('the office had no hours') == ['workload']
+    assert matcher.extract('my office') == ['general']
+
+
+def test_matching_ignores_case():
+    matcher = TopicMatcher(KEYWORDS)
+    assert matcher.extract('EXAM') == ['exams']
+    assert matcher.extract('went to oh twice') == ['office_hours']
+    assert matcher.extract('OFFICE HOURS') == matcher.extract('office hours')
+
+
+def test_match_matrix_rows_follow_topics():
+    matcher = TopicMatcher(KEYWORDS)
+    matrix = matcher.match_matrix(['exam and work', 'nothing here', ''])
+    assert matrix.toarray().tolist() == [[1, 0, 1], [0, 0, 0], [0, 0, 0]]
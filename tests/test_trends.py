@@ -0,0 +1,79 @@
+import os
+import pandas as pd
+
+from trends import TrendStore
+
+
+def _analyzed(n, start=0, label='Positive'):
+    return pd.DataFrame({
+        'course_code': ['CS225'] * n,
+        'course_name': ['Data Structures'] * n,
+        'semester': ['Fall 2024' if i % 2 else 'Spring 2024' for i in range(start, start + n)],
+        'rating': [4] * n,
+        'sentiment_vader': [label] * n,
+        'vader_compound': [0.5] * n
+    })
+
+
+def _merge(store, df, source='reviews.csv', chunk_size=None):
+    rows = store.appended(source)
+    for start in range(0, len(df), chunk_size or max(len(df), 1)):
+        rows.update(df.iloc[start:start + (chunk_size or len(df))])
+    return rows.finish(), rows.merged
+
+
+def test_appended_merges_only_new_rows():
+    store = TrendStore(':memory:')
+    first = _analyzed(10)
+    assert _merge(store, first) == (True, 10)
+
+    grown = pd.concat([first, _analyzed(3, start=10)], ignore_index=True)
+    assert _merge(store, grown, chunk_size=4) == (True, 3)
+    assert _merge(store, grown) == (True, 0)
+    assert store.cells()['reviews'].sum() == 13
+
+
+def test_changed_history_asks_for_rebuild():
+    store = TrendStore(':memory:')
+    _merge(store, _analyzed(10))
+
+    rescored = _analyzed(12, label='Negative')
+    assert _merge(store, rescored) == (False, 0)
+    assert store.cells()['reviews'].sum() == 10
+
+    store.rebuild(rescored, source='reviews.csv')
+    assert store.cells()['negative'].sum() == 12
+    assert _merge(store, rescored) == (True, 0)
+
+
+def test_analyzer_merges_appended_reviews(tmp_path):
+    from sentiment_analyzer import CourseReviewAnalyzer
+
+    data_path = tmp_path / 'reviews.csv'
+    reviews = pd.DataFrame({
+        'course_code': ['CS124', 'CS225'],
+        'course_name': ['Intro to CS', 'Data Structures'],
+        'review': ['Great course', 'Hard but fair'],
+        'rating': [5, 4],
+        'semester': ['Fall 2023', 'Fall 2023']
+    })
+    reviews.to_csv(data_path, index=False)
+    trends = TrendStore(str(tmp_path / 'trends.sqlite'))
+    CourseReviewAnalyzer(data_path=str(data_path), trends=trends).analyze_all(output_path=str(tmp_path / 'a.csv'))
+
+    extra = reviews.iloc[:1].assign(semester='Spring 2024')
+    pd.concat([reviews, extra]).to_csv(data_path, index=False)
+    CourseReviewAnalyzer(data_path=str(data_path), trends=trends).analyze_stream(
+        chunk_size=2, output_path=str(tmp_path / 'b.csv'))
+
+    cells = trends.cells()
+    assert cells['reviews'].sum() == 3
+    assert trends.source_state(os.path.abspath(data_path))[0] == 3
+
+
+def test_unknown_source_on_filled_store_asks_for_rebuild():
+    store = TrendStore(':memory:')
+    _merge(store, _analyzed(10), source='analyzed.csv')
+
+    assert _merge(store, _analyzed(10), source='reviews.csv') == (False, 0)
+    assert store.cells()['reviews'].sum() == 10